@@ -1,12 +1,90 @@
+import asyncio
+import json
+import os
 import uvicorn
-from fastapi import FastAPI
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from time import time
+from typing import AsyncIterator
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.params import Query
 from fastapi.middleware.cors import CORSMiddleware
-from rubik.cubes import Cube
-from rubik.solvers import KociembaSolver
+from starlette.requests import ClientDisconnect
+from rubik.cubes import Cube, Tables
+from rubik.solvers import (
+    Solution,
+    SolutionCache,
+    SolutionStore,
+    SolverEngine,
+    SolverPool,
+)
 
 
-app = FastAPI(docs_url="/api/docs", openapi_url="/api/openapi.json")
+# The number of worker processes solving cubes (default: one per CPU). With 0, cubes are solved
+# on a thread of this process instead, e.g. where processes cannot be started.
+workers = int(os.environ.get("RUBIK_WORKERS", os.cpu_count() or 1))
+# The most cubes solved at once. Further requests wait for a free slot.
+max_concurrency = int(os.environ.get("RUBIK_MAX_CONCURRENCY", max(workers, 1)))
+# The number of cubes that may wait for a slot on top of those being solved. Further requests
+# are turned away with 503 and a Retry-After of RUBIK_RETRY_AFTER seconds.
+queue_depth = int(os.environ.get("RUBIK_QUEUE_DEPTH", 4 * max_concurrency))
+retry_after = int(os.environ.get("RUBIK_RETRY_AFTER", 1))
+# The number of seconds a request may take, including the wait for a free slot
+solve_timeout = float(os.environ.get("RUBIK_SOLVE_TIMEOUT", 10))
+# The solutions of the last RUBIK_CACHE_SIZE cubes (up to symmetry) are kept by every worker, 0
+# disables the cache
+cache_size = int(os.environ.get("RUBIK_CACHE_SIZE", 4096))
+# If RUBIK_STORE names an SQLite database, the solutions are also kept there, which every worker
+# shares and which outlives them. They expire after RUBIK_STORE_TTL seconds (default: 30 days).
+store = None
+if "RUBIK_STORE" in os.environ:
+    store = {
+        "path": os.environ["RUBIK_STORE"],
+        "size": int(os.environ.get("RUBIK_STORE_SIZE", 1_000_000)),
+        "ttl": float(os.environ.get("RUBIK_STORE_TTL", 30 * 24 * 60 * 60)),
+    }
+
+pool: SolverPool | None = None
+# Without worker processes, the engine and the thread it solves on
+engine: SolverEngine | None = None
+thread: ThreadPoolExecutor | None = None
+slots: asyncio.Semaphore
+# Held by every solve from the time it is queued until it is done
+admission: asyncio.Semaphore
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global pool, engine, thread, slots, admission
+    # Load the tables when the server starts instead of on the first request. If
+    # RUBIK_SHARED_TABLES names a shared memory segment, every process uses the same copy.
+    shared = os.environ.get("RUBIK_SHARED_TABLES")
+    if workers > 0:
+        pool = SolverPool(workers, shared=shared, cache_size=cache_size, store=store)
+    else:
+        if shared is not None:
+            Tables.load_shared(shared)
+        Tables.preload()
+        engine = SolverEngine(
+            cache=SolutionCache(cache_size) if cache_size > 0 else None,
+            store=SolutionStore(**store) if store is not None else None,
+        )
+        thread = ThreadPoolExecutor(1)
+    slots = asyncio.Semaphore(max_concurrency)
+    admission = asyncio.Semaphore(max_concurrency + queue_depth)
+
+    yield
+
+    if pool is not None:
+        pool.shutdown()
+    else:
+        thread.shutdown(cancel_futures=True)
+        if engine.store is not None:
+            engine.store.close()
+
+
+app = FastAPI(docs_url="/api/docs", openapi_url="/api/openapi.json", lifespan=lifespan)
 # origins = [
 #     "http://localhost:3000",
 #     "localhost:3000",
@@ -22,11 +100,145 @@ app = FastAPI(docs_url="/api/docs", openapi_url="/api/openapi.json")
 # )
 
 
+class ServerBusy(Exception):
+    """Raised when a cube cannot be queued because the queue is full."""
+
+
+# The solves in flight by normalized cube string and budget, with the number of requests waiting
+# for each. Requests for a cube that is already being solved with the same budget wait for that
+# solve instead of starting one.
+in_flight: dict[tuple[str, float | None], tuple[asyncio.Task, int]] = {}
+# The number of cubes requested, the number of solves started for them and the number of cubes
+# turned away because the queue was full
+stats = {"requests": 0, "solves": 0, "rejected": 0}
+
+
+async def solve_cube(
+    cube_str: str, budget: float | None = None, wait: bool = False
+) -> Solution:
+    """
+    Solves `cube_str` off the event loop once a slot is free, or waits for the solve of the same
+    cube if one is in flight. Raises `TimeoutError` if that takes longer than `solve_timeout`
+    seconds. A solve that no request waits for anymore is cancelled if it has not started yet.
+
+    If the queue is full, raises `ServerBusy`, or with `wait`, waits until there is room.
+
+    :param budget: If given, the number of seconds to search for shorter solutions for, from
+        now. The first solution is returned either way.
+    """
+    key = cube_str.strip().upper(), budget
+    stats["requests"] += 1
+    if key not in in_flight:
+        if not wait and admission.locked():
+            stats["rejected"] += 1
+            raise ServerBusy("The server is busy, try again later.")
+        await admission.acquire()
+        if key in in_flight:
+            # The same cube was queued while this request waited
+            admission.release()
+        else:
+            stats["solves"] += 1
+            task = asyncio.ensure_future(run_solve(key[0], budget))
+            task.add_done_callback(lambda task: finish_solve(key, task))
+            in_flight[key] = task, 0
+    task, waiting = in_flight[key]
+    in_flight[key] = task, waiting + 1
+
+    try:
+        # A request that times out or goes away does not cancel the solve for the others
+        return await asyncio.wait_for(asyncio.shield(task), solve_timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError("The cube could not be solved in time.")
+    finally:
+        if in_flight.get(key, (None,))[0] is task:
+            waiting = in_flight[key][1] - 1
+            if waiting > 0:
+                in_flight[key] = task, waiting
+            else:
+                # No request waits for the solve anymore
+                del in_flight[key]
+                task.cancel()
+
+
+async def run_solve(cube_str: str, budget: float | None) -> Solution:
+    """
+    Solves `cube_str` once a slot is free. The search ends by the deadline, with the best
+    solution found so far or with `TimeoutError`, which frees its worker for the next cube.
+    """
+    # The search ends a little before the request times out, so that the best solution found
+    # by then still reaches it
+    deadline = time() + solve_timeout - min(solve_timeout / 10, 0.25)
+    search_until = min(time() + budget, deadline) if budget is not None else None
+
+    try:
+        await asyncio.wait_for(slots.acquire(), deadline - time())
+    except asyncio.TimeoutError:
+        raise TimeoutError("The cube could not be solved in time.")
+
+    try:
+        if pool is not None:
+            future = pool.submit(cube_str, deadline, search_until)
+        elif search_until is not None:
+            future = thread.submit(engine.solve, cube_str, search_until, True, deadline)
+        else:
+            future = thread.submit(engine.solve, cube_str, deadline, None, deadline)
+
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # A solve that has started cannot be interrupted, but it ends by the deadline. The
+            # slot is kept until then, so that no more cubes are handed out than can be solved.
+            if not future.cancel():
+                await asyncio.wait([asyncio.wrap_future(future)])
+            raise
+    finally:
+        slots.release()
+
+
+def finish_solve(key: tuple[str, float | None], task: asyncio.Task):
+    admission.release()
+    if in_flight.get(key, (None,))[0] is task:
+        del in_flight[key]
+    if not task.cancelled():
+        # Mark the error as retrieved, as the requests waiting for it may have timed out
+        task.exception()
+
+
+@app.get("/api/stats")
+async def get_stats():
+    """
+    Returns the number of cubes requested, the number of solves started for them and their
+    ratio, which is above 1 when requests for the same cube share a solve, and the number of
+    cubes turned away because the queue was full.
+    """
+    return {
+        "requests": stats["requests"],
+        "solves": stats["solves"],
+        "coalesced": stats["requests"] - stats["solves"] - stats["rejected"],
+        "coalescingRatio": stats["requests"] / max(stats["solves"], 1),
+        "rejected": stats["rejected"],
+    }
+
+
+def busy_response() -> JSONResponse:
+    return JSONResponse(
+        {"error": "The server is busy, try again later."},
+        status_code=503,
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
 @app.get("/api/solve")
-async def solve(cube_str: str = Query(..., alias="cube", min_length=54, max_length=54)):  # type: ignore
+async def solve(
+    cube_str: str = Query(..., alias="cube", min_length=54, max_length=54),  # type: ignore
+    budget_ms: int | None = Query(None, ge=1),  # type: ignore
+):
+    """
+    Solves `cube`. With `budget_ms`, the search goes on for shorter solutions for that many
+    milliseconds, otherwise the first solution found is returned.
+    """
     # print(cube_str)
     cube: Cube
-    solver: KociembaSolver
     try:
         cube = Cube(cube_str)
     except ValueError as e:
@@ -34,19 +246,170 @@ async def solve(cube_str: str = Query(..., alias="cube", min_length=54, max_leng
         return {"error": str(e)}
 
     try:
-        solver = KociembaSolver(cube)
-        solver.solve()
+        solution = await solve_cube(
+            cube_str, budget_ms / 1000 if budget_ms is not None else None
+        )
+    except ServerBusy:
+        return busy_response()
     except KeyError as e:  # Merge this logic into error handling for solver
         return {"error": "Piece for a color is missing."}
     except Exception as e:
         return {"error": str(e)}
 
+    for move in solution.moves:
+        cube.transform(move)
+
     return {
         "cube": str(cube),
-        "moves": solver.moves,
-        "timeToSolve": solver.time_to_solve,
+        "moves": solution.moves,
+        "timeToSolve": round(solution.elapsed, 5),
     }
 
 
+class BatchResponse(StreamingResponse):
+    """
+    Streams the result lines of a batch while its cubes are still coming in.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        # Unlike `StreamingResponse`, do not listen for the client to disconnect meanwhile,
+        # which would take the messages of the request body from `read_lines`. `solve_lines`
+        # notices the disconnect instead.
+        await self.stream_response(send)
+
+
+@app.post("/api/solve/batch")
+async def solve_batch(
+    request: Request, budget_ms: int | None = Query(None, ge=1)  # type: ignore
+):
+    """
+    Solves a JSON list of cube strings, or an NDJSON body with one cube string per line (as a
+    JSON string or plain text), and streams back one line of JSON per cube as soon as it is
+    solved, in the format of `rubik batch`. The lines are in the order the cubes are solved in,
+    so each one holds the index of its cube. `budget_ms` applies to every cube.
+
+    The cubes of an NDJSON body are solved as their lines come in. A JSON list is only solved
+    once all of it has been read.
+
+    A batch is turned away if the queue is full when it comes in. Once it has started, its cubes
+    wait for room in the queue instead.
+    """
+    if admission.locked():
+        return busy_response()
+
+    if request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            cube_strs = json.loads(await request.body())
+            if not isinstance(cube_strs, list):
+                raise ValueError("The body must be a list of cube strings.")
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        items = iterate(cube_strs)
+    else:
+        items = read_lines(request)
+
+    return BatchResponse(
+        solve_lines(request, items, budget_ms / 1000 if budget_ms is not None else None)
+    )
+
+
+async def iterate(items: list) -> AsyncIterator:
+    for item in items:
+        yield item
+
+
+async def read_lines(request: Request) -> AsyncIterator[bytes]:
+    """
+    Yields the lines of the body of `request` that are not blank as soon as they come in.
+    """
+    rest = b""
+    async for chunk in request.stream():
+        *lines, rest = (rest + chunk).split(b"\n")
+        for line in map(bytes.strip, lines):
+            if line:
+                yield line
+    if rest.strip():
+        yield rest.strip()
+
+
+async def solve_lines(
+    request: Request, items: AsyncIterator, budget: float | None
+) -> AsyncIterator[str]:
+    """
+    Yields the result line of every cube string in `items` as soon as it is solved, while later
+    ones are still coming in. Lines of an NDJSON body (as bytes) are parsed here, so that a bad
+    line only fails its own cube. At most `max_concurrency` cubes are handed to the solver at
+    once, so that every cube gets a slot soon after it is started and the batch does not time
+    out while it waits. Stops once the client of `request` has gone away.
+    """
+
+    async def solve_line(index: int, cube_str) -> dict:
+        line = {"index": index, "cube": cube_str}
+        try:
+            if isinstance(cube_str, bytes):
+                line["cube"] = cube_str.decode(errors="replace")
+                if cube_str.startswith(b'"'):
+                    line["cube"] = json.loads(cube_str)
+                cube_str = line["cube"]
+            if not isinstance(cube_str, str):
+                raise ValueError("The cube must be given as a string.")
+            solution = await solve_cube(cube_str, budget, wait=True)
+        except KeyError:
+            line["error"] = "Piece for a color is missing."
+        except Exception as e:
+            line["error"] = str(e) or type(e).__name__
+        else:
+            line["moves"] = solution.moves
+            line["timeToSolve"] = round(solution.elapsed, 5)
+        return line
+
+    async def disconnected():
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+
+    end = object()
+    index = 0
+    pending: set[asyncio.Future] = set()
+    # Reads the next item while there is room for another cube, and waits for the client to go
+    # away once all of them have been read
+    reading: asyncio.Future | None = None
+    watching: asyncio.Future | None = None
+    try:
+        while True:
+            if items is not None and reading is None and len(pending) < max_concurrency:
+                reading = asyncio.ensure_future(anext(items, end))
+            if items is None and not pending:
+                break
+            if items is None and watching is None:
+                watching = asyncio.ensure_future(disconnected())
+
+            waiting = pending | {
+                task for task in (reading, watching) if task is not None
+            }
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            if watching in done:
+                break
+            if reading in done:
+                cube_str = reading.result()
+                reading = None
+                if cube_str is end:
+                    items = None
+                else:
+                    pending.add(asyncio.ensure_future(solve_line(index, cube_str)))
+                    index += 1
+
+            for task in done & pending:
+                pending.remove(task)
+                yield json.dumps(task.result()) + "\n"
+    except ClientDisconnect:
+        pass
+    finally:
+        for task in (*pending, reading, watching):
+            if task is not None:
+                task.cancel()
+
+
 if __name__ == "__main__":
     uvicorn.run("index:app", host="localhost", port=8000, reload=True)
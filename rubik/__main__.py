@@ -1,12 +1,159 @@
-from argparse import ArgumentParser
-from rubik.cubes import Cube, print_cube
-from rubik.solvers import KociembaSolver
+import json
+import os
+import sys
+from argparse import ArgumentParser, FileType
+from rubik.cubes import Cube, Tables, print_cube, sharedtables
+from rubik.cubes.tablebuild import build_tables
+from rubik.solvers import KociembaSolver, solve_many
+
+
+def tables_main(argv: list[str]):
+    """
+    The entry point for `rubik tables`, which manages the move and pruning tables.
+    """
+    parser = ArgumentParser(
+        prog="rubik tables", description="Manage the move and pruning tables"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser(
+        "build",
+        help="Build the table file, resuming an interrupted build",
+    )
+    build.add_argument(
+        "table_set",
+        nargs="?",
+        choices=list(Tables.TABLE_SETS),
+        help="Build one of the optional table sets instead of the table file",
+    )
+    build.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="The number of worker processes (default: the number of CPUs)",
+    )
+    build.add_argument(
+        "-o",
+        "--output",
+        help=f"Where to write the tables (default: {Tables.path}, or "
+        + f"{Tables.set_path('<table_set>')} for a table set)",
+    )
+    build.add_argument(
+        "--restart",
+        action="store_true",
+        help="Discard the tables built by an interrupted build",
+    )
+
+    publish = commands.add_parser(
+        "publish",
+        help="Copy the tables into a shared memory segment for other processes to use",
+    )
+    unlink = commands.add_parser("unlink", help="Remove the shared memory segment")
+    for command in (publish, unlink):
+        command.add_argument(
+            "--name",
+            default=sharedtables.DEFAULT_NAME,
+            help=f"The name of the segment (default: {sharedtables.DEFAULT_NAME})",
+        )
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        if args.output is None:
+            args.output = (
+                Tables.path
+                if args.table_set is None
+                else Tables.set_path(args.table_set)
+            )
+        build_tables(
+            args.output,
+            jobs=max(args.jobs, 1),
+            restart=args.restart,
+            table_set=args.table_set,
+        )
+    elif args.command == "publish":
+        Tables.load_tables()
+        sharedtables.publish(args.name, Tables.path)
+        for table_set in Tables.TABLE_SETS:
+            if Tables.has_tables(table_set):
+                sharedtables.publish(
+                    f"{args.name}-{table_set}", Tables.set_path(table_set)
+                )
+    elif args.command == "unlink":
+        sharedtables.unlink(args.name)
+        for table_set in Tables.TABLE_SETS:
+            sharedtables.unlink(f"{args.name}-{table_set}")
+
+
+def batch_main(argv: list[str]):
+    """
+    The entry point for `rubik batch`, which solves one cube string per line and writes one
+    JSON object per line with its solution or error.
+    """
+    parser = ArgumentParser(
+        prog="rubik batch", description="Solve many cubes on several processes"
+    )
+    parser.add_argument(
+        "input",
+        nargs="?",
+        type=FileType("r"),
+        default=sys.stdin,
+        help="A file with one cube string per line (default: standard input)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="The number of worker processes (default: the number of CPUs)",
+    )
+    parser.add_argument(
+        "--chunk",
+        type=int,
+        default=64,
+        help="The number of cubes handed to a worker at once (default: 64)",
+    )
+    parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="Write every result as soon as it is ready instead of in the input order",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Keep searching for shorter solutions for this many seconds per cube",
+    )
+
+    args = parser.parse_args(argv)
+    cube_strs = (line.strip() for line in args.input if line.strip())
+    results = solve_many(
+        cube_strs,
+        jobs=args.jobs,
+        chunk=args.chunk,
+        ordered=not args.unordered,
+        timeout=args.timeout,
+    )
+    for result in results:
+        line = {"index": result.index, "cube": result.cube}
+        if result.solution is None:
+            line["error"] = result.error
+        else:
+            line["moves"] = result.solution.moves
+            line["timeToSolve"] = round(result.solution.elapsed, 5)
+        print(json.dumps(line), flush=True)
 
 
 def main():
     """
     The entry point for the CLI.
     """
+    if sys.argv[1:2] == ["tables"]:
+        tables_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["batch"]:
+        batch_main(sys.argv[2:])
+        return
+
     parser = ArgumentParser(description="Solve a 3x3 Rubik's cube")
     parser.add_argument(
         "cube_str",
@@ -16,6 +163,44 @@ def main():
         type=str,
         help="A 54-character string with the colors of each face of the cube",
     )
+    parser.add_argument(
+        "--search",
+        choices=["iterative", "recursive"],
+        default="iterative",
+        help="The implementation of the search (default: iterative)",
+    )
+    parser.add_argument(
+        "--max-length",
+        type=int,
+        help="Keep searching until a solution with at most this many moves is found",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Keep searching for shorter solutions for this many seconds",
+    )
+    parser.add_argument(
+        "--orientations",
+        type=int,
+        default=1,
+        choices=range(1, 7),
+        help="Search the cube and its inverse turned to up to 3 axes in parallel and keep "
+        + "the shortest solution (default: 1)",
+    )
+    parser.add_argument(
+        "--split",
+        type=int,
+        default=0,
+        choices=range(3),
+        help="Split the search into the subtrees of every sequence of this many moves and "
+        + "search them in parallel (default: 0)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="The number of worker processes for --orientations or --split",
+    )
 
     args = parser.parse_args()
     cube_str: str = args.cube_str
@@ -41,12 +226,24 @@ def main():
     print()
 
     try:
-        solver = KociembaSolver(cube)
+        solver = KociembaSolver(
+            cube,
+            search=args.search,
+            max_length=args.max_length,
+            timeout=args.timeout,
+            orientations=args.orientations,
+            split=args.split,
+            jobs=args.jobs,
+        )
         solver.solve()
     except Exception as e:
         print(f"rubik: error: {e}")
         return
 
+    if solver.time_to_solve > 0:
+        rate = solver.nodes / solver.time_to_solve
+        print(f"Searched {solver.nodes} nodes ({rate:.0f} per second).")
+
     # After solver
     print()
     print_cube(cube)
@@ -1,15 +1,16 @@
 from prettytable import PrettyTable
-from rubik.cubes import Cube
-from rubik.solvers import KociembaSolver, Solver, KociembaFastSolver
+from rubik.cubes import Cube, Tables
+from rubik.solvers import KociembaSolver, Solver, KociembaFastSolver, OptimalSolver
 
 
 def benchmark(
     trials: int = 100,
     shuffles_num: int = 10,
     solver_cls: type[Solver] = KociembaSolver,
-) -> list[int | float]:
+) -> list[int | float | str]:
     times: list[float] = []
     moves: list[int] = []
+    nodes: list[int] = []
 
     for i in range(trials):
         cube = Cube("RRRRRRRRRBBBBBBBBBWWWWWWWWWGGGGGGGGGYYYYYYYYYOOOOOOOOO")
@@ -20,9 +21,13 @@ def benchmark(
 
         times.append(solver.time_to_solve)
         moves.append(len(solver.moves))
+        # Only the solvers written in Python count the nodes they visit
+        if hasattr(solver, "nodes"):
+            nodes.append(solver.nodes)
 
     average_time = round(sum(times) / trials, 5)
     average_moves = sum(moves) / trials
+    nodes_per_second = round(sum(nodes) / sum(times)) if nodes and sum(times) else "-"
 
     return [
         shuffles_num,
@@ -32,6 +37,7 @@ def benchmark(
         average_moves,
         min(moves),
         max(moves),
+        nodes_per_second,
     ]
 
 
@@ -50,6 +56,7 @@ def main():
         "Moves",
         "Min Moves",
         "Max Moves",
+        "Nodes/s",
     ]
     table.add_row(benchmark(trials=100, shuffles_num=10))
     table.add_row(benchmark(trials=100, shuffles_num=25))
@@ -65,6 +72,7 @@ def main():
         "Moves",
         "Min Moves",
         "Max Moves",
+        "Nodes/s",
     ]
     table_c.add_row(benchmark(shuffles_num=10, solver_cls=KociembaFastSolver))
     table_c.add_row(benchmark(shuffles_num=25, solver_cls=KociembaFastSolver))
@@ -73,6 +81,20 @@ def main():
     print(table)
     print(table_c)
 
+    # The optimal solver takes about 13 times longer with every move, so it is only measured on
+    # lightly scrambled cubes, and only if its tables have been built
+    if Tables.has_tables("optimal"):
+        table_o = PrettyTable()
+        table_o.title = "Optimal Solver"
+        table_o.field_names = table.field_names
+        for shuffles_num in (6, 8, 10, 12):
+            table_o.add_row(
+                benchmark(
+                    trials=10, shuffles_num=shuffles_num, solver_cls=OptimalSolver
+                )
+            )
+        print(table_o)
+
 
 if __name__ == "__main__":
     main()
@@ -4,4 +4,5 @@ from .cube import *
 from .cubiecube import *
 from .facecube import *
 from .printer import print_cube
-from .tables import PruningTable, Tables
+from . import sharedtables
+from .tables import NibblePruningTable, PruningTable, Tables
@@ -0,0 +1,282 @@
+"""
+Vectorized versions of the `CubieCube` coordinates.
+
+Every coordinate has a `decode_*` function, which turns an array of N coordinates into an (N, 8)
+or (N, 12) array of permutations or orientations, and an `encode_*` function that does the
+reverse. Together with `corner_move` and `edge_move`, which apply a move to all N cubes with a
+single fancy-indexing operation, they let a whole move table be built with a few NumPy calls
+instead of one `CubieCube` multiplication per coordinate and move.
+
+The encodings match the `CubieCube` properties exactly, so tables built from either are the same.
+"""
+
+from __future__ import annotations
+from itertools import combinations, permutations
+from math import comb
+import numpy as np
+from .cubiecube import MOVE_CUBE, CubieCube
+
+
+def _make_move_arrays():
+    cp = np.zeros((18, 8), dtype=np.int64)
+    co = np.zeros((18, 8), dtype=np.int64)
+    ep = np.zeros((18, 12), dtype=np.int64)
+    eo = np.zeros((18, 12), dtype=np.int64)
+
+    for i in range(6):
+        cube = CubieCube()
+        for j in range(3):
+            cube.multiply(MOVE_CUBE[i])
+            cp[3 * i + j] = cube.corner_permutations
+            co[3 * i + j] = cube.corner_orientations
+            ep[3 * i + j] = cube.edge_permutations
+            eo[3 * i + j] = cube.edge_orientations
+
+    return cp, co, ep, eo
+
+
+# The permutations and orientations of the 18 moves (U, U2, U', R, R2, R', ...)
+MOVE_CP, MOVE_CO, MOVE_EP, MOVE_EO = _make_move_arrays()
+
+# The moves that may be used in phase 2 (U*, D*, R2, L2, F2, B2). The phase 2 move tables store
+# -1 for every other move.
+PHASE_2_MOVES = np.array([0, 1, 2, 4, 7, 9, 10, 11, 13, 16])
+
+_COMB = np.array([[comb(n, k) for k in range(12)] for n in range(12)], dtype=np.int64)
+
+
+def corner_move(cp: np.ndarray, co: np.ndarray, move: int):
+    """
+    Applies `move` to N cubes given as (N, 8) corner permutation and orientation arrays.
+    """
+    index = MOVE_CP[move]
+    return cp[:, index], (co[:, index] + MOVE_CO[move]) % 3
+
+
+def edge_move(ep: np.ndarray, eo: np.ndarray, move: int):
+    """
+    Applies `move` to N cubes given as (N, 12) edge permutation and orientation arrays.
+    """
+    index = MOVE_EP[move]
+    return ep[:, index], (eo[:, index] + MOVE_EO[move]) % 2
+
+
+def encode_permutation(p: np.ndarray) -> np.ndarray:
+    """
+    The coordinate used by `phase_2_corner`, `phase_2_edge` and `phase_2_ud_slice`, computed for
+    every row of `p`.
+    """
+    coord = np.zeros(len(p), dtype=np.int64)
+    for j in range(p.shape[1] - 1, 0, -1):
+        s = (p[:, :j] > p[:, j : j + 1]).sum(axis=1)
+        coord = j * (coord + s)
+    return coord
+
+
+def _decode_all(elements, encode) -> np.ndarray:
+    """
+    Returns the rows of `elements` ordered by their coordinate, i.e. row `i` of the result
+    decodes coordinate `i`. This only works for coordinates that are a bijection onto
+    0...len(elements) - 1.
+    """
+    elements = np.array(elements, dtype=np.int64)
+    ordered = np.empty_like(elements)
+    ordered[encode(elements)] = elements
+    return ordered
+
+
+def encode_twist(co: np.ndarray) -> np.ndarray:
+    return co[:, :7] @ (3 ** np.arange(6, -1, -1))
+
+
+def decode_twist(coords: np.ndarray) -> np.ndarray:
+    co = np.zeros((len(coords), 8), dtype=np.int64)
+    co[:, :7] = coords[:, None] // (3 ** np.arange(6, -1, -1)) % 3
+    co[:, 7] = -co[:, :7].sum(axis=1) % 3
+    return co
+
+
+def encode_flip(eo: np.ndarray) -> np.ndarray:
+    return eo[:, :11] @ (2 ** np.arange(10, -1, -1))
+
+
+def decode_flip(coords: np.ndarray) -> np.ndarray:
+    eo = np.zeros((len(coords), 12), dtype=np.int64)
+    eo[:, :11] = coords[:, None] // (2 ** np.arange(10, -1, -1)) % 2
+    eo[:, 11] = -eo[:, :11].sum(axis=1) % 2
+    return eo
+
+
+def encode_udslice(ep: np.ndarray) -> np.ndarray:
+    is_slice = ep >= 8
+    seen = np.cumsum(is_slice, axis=1)
+    positions = np.broadcast_to(np.arange(12), ep.shape)
+    values = _COMB[positions, np.maximum(seen - 1, 0)]
+    return np.where(~is_slice & (seen >= 1), values, 0).sum(axis=1)
+
+
+def decode_udslice(coords: np.ndarray) -> np.ndarray:
+    """
+    The UD slice coordinate only describes where the slice edges are, so the slice and other
+    edges are placed in the same order as the `phase_1_ud_slice` setter does.
+    """
+    layouts = []
+    for positions in combinations(range(12), 4):
+        ep = [0] * 12
+        slice_edges = iter(range(8, 12))
+        other_edges = iter(range(8))
+        for i in range(12):
+            ep[i] = next(slice_edges) if i in positions else next(other_edges)
+        layouts.append(ep)
+
+    return _decode_all(layouts, encode_udslice)[coords]
+
+
+def encode_edge4(ep: np.ndarray) -> np.ndarray:
+    return encode_permutation(ep[:, 8:])
+
+
+def decode_edge4(coords: np.ndarray) -> np.ndarray:
+    slices = _decode_all(list(permutations(range(8, 12))), encode_permutation)
+    ep = np.broadcast_to(np.arange(12), (len(coords), 12)).copy()
+    ep[:, 8:] = slices[coords]
+    return ep
+
+
+def encode_edge8(ep: np.ndarray) -> np.ndarray:
+    return encode_permutation(ep[:, :8])
+
+
+def decode_edge8(coords: np.ndarray) -> np.ndarray:
+    edges = _decode_all(list(permutations(range(8))), encode_permutation)
+    ep = np.broadcast_to(np.arange(12), (len(coords), 12)).copy()
+    ep[:, :8] = edges[coords]
+    return ep
+
+
+def encode_corner(cp: np.ndarray) -> np.ndarray:
+    return encode_permutation(cp)
+
+
+def decode_corner(coords: np.ndarray) -> np.ndarray:
+    return _decode_all(list(permutations(range(8))), encode_permutation)[coords]
+
+
+def _encode_sorted(ep: np.ndarray, first: int, rank) -> np.ndarray:
+    """
+    Encodes the positions of the edges `first`...`first + 3` with `rank` and their order with
+    `encode_permutation`, as `24 * rank + order`.
+    """
+    members = (ep >= first) & (ep < first + 4)
+    order = encode_permutation(ep[members].reshape(-1, 4))
+    return 24 * rank(members) + order
+
+
+def _decode_sorted(coords: np.ndarray, first: int, encode) -> np.ndarray:
+    layouts = []
+    for positions in combinations(range(12), 4):
+        for order in permutations(range(first, first + 4)):
+            ep = [0] * 12
+            members = iter(order)
+            others = iter([e for e in range(12) if not first <= e < first + 4])
+            for i in range(12):
+                ep[i] = next(members) if i in positions else next(others)
+            layouts.append(ep)
+
+    return _decode_all(layouts, encode)[coords]
+
+
+def _rank_positions(members: np.ndarray) -> np.ndarray:
+    """
+    The rank of the 4 positions in `members` among all sets of 4 positions, in which all sets
+    within the first 8 positions come first.
+    """
+    seen = np.cumsum(members, axis=1)
+    positions = np.broadcast_to(np.arange(12), members.shape)
+    return np.where(members, _COMB[positions, seen], 0).sum(axis=1)
+
+
+def encode_slice_sorted(ep: np.ndarray) -> np.ndarray:
+    """
+    The positions and order of the UD slice edges. It is `24 * udslice + edge4`, so once the
+    slice edges are back in the slice, it equals the edge4 coordinate.
+    """
+    return _encode_sorted(ep, 8, lambda members: encode_udslice(ep))
+
+
+def decode_slice_sorted(coords: np.ndarray) -> np.ndarray:
+    return _decode_sorted(coords, 8, encode_slice_sorted)
+
+
+def encode_u_edges(ep: np.ndarray) -> np.ndarray:
+    """
+    The positions and order of the U edges. While they are in the U and D layers, it is below
+    1680 (see `make_ud_edges_edge8`).
+    """
+    return _encode_sorted(ep, 0, _rank_positions)
+
+
+def decode_u_edges(coords: np.ndarray) -> np.ndarray:
+    return _decode_sorted(coords, 0, encode_u_edges)
+
+
+def encode_d_edges(ep: np.ndarray) -> np.ndarray:
+    """
+    The positions and order of the D edges, like `encode_u_edges`.
+    """
+    return _encode_sorted(ep, 4, _rank_positions)
+
+
+def decode_d_edges(coords: np.ndarray) -> np.ndarray:
+    return _decode_sorted(coords, 4, encode_d_edges)
+
+
+def make_ud_edges_edge8() -> np.ndarray:
+    """
+    Returns the edge8 coordinate of every cube whose U and D edges are in the U and D layers,
+    indexed by its `u_edges` coordinate (which is below 1680) and the order of its D edges,
+    `d_edges % 24`. The positions of the D edges are the ones the U edges leave free.
+    """
+    u_edges = np.arange(1680)
+    ep = decode_u_edges(u_edges)
+    table = np.zeros((1680, 24), dtype=np.int64)
+    for d_order, order in enumerate(
+        _decode_all(list(permutations(range(4, 8))), encode_permutation)
+    ):
+        filled = ep.copy()
+        free = filled[:, :8] >= 4
+        filled[:, :8][free] = np.tile(order, len(u_edges))
+        table[:, d_order] = encode_edge8(filled)
+    return table
+
+
+def make_move_table(
+    size: int,
+    decode,
+    encode,
+    corners: bool,
+    orientation: bool,
+    phase_2: bool = False,
+) -> np.ndarray:
+    """
+    Builds the move table of a coordinate with `size` values. `decode` and `encode` convert
+    between the coordinate and the corner or edge (`corners`) orientations or permutations
+    (`orientation`); whatever the coordinate does not describe is left solved.
+
+    If `phase_2` is set, the moves that are not allowed in phase 2 are marked with -1.
+    """
+    width = 8 if corners else 12
+    move = corner_move if corners else edge_move
+    perm = np.broadcast_to(np.arange(width), (size, width))
+    ori = np.zeros((size, width), dtype=np.int64)
+    if orientation:
+        ori = decode(np.arange(size))
+    else:
+        perm = decode(np.arange(size))
+
+    table = np.full((size, 18), -1, dtype=np.int64)
+    for m in PHASE_2_MOVES if phase_2 else range(18):
+        new_perm, new_ori = move(perm, ori, m)
+        table[:, m] = encode(new_ori if orientation else new_perm)
+
+    return table
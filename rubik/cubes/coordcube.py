@@ -20,7 +20,6 @@ class CoordCube:
         self.phase_2_corner = phase_2_corner
         self.phase_2_edge = phase_2_edge
         self.phase_2_ud_slice = phase_2_ud_slice
-        self.tables = Tables()
 
     @classmethod
     def from_cubie_cube(cls, cube: CubieCube) -> CoordCube:
@@ -38,9 +37,11 @@ class CoordCube:
         )
 
     def move(self, move_num: int):
-        self.phase_1_corner = self.tables.twist_move[self.phase_1_corner][move_num]
-        self.phase_1_edge = self.tables.flip_move[self.phase_1_edge][move_num]
-        self.phase_1_ud_slice = self.tables.udslice_move[self.phase_1_ud_slice][move_num]  # fmt: skip
-        self.phase_2_corner = self.tables.corner_move[self.phase_2_corner][move_num]
-        self.phase_2_edge = self.tables.edge8_move[self.phase_2_edge][move_num]
-        self.phase_2_ud_slice = self.tables.edge4_move[self.phase_2_ud_slice][move_num]
+        # fmt: off
+        self.phase_1_corner = int(Tables.twist_move[self.phase_1_corner, move_num])
+        self.phase_1_edge = int(Tables.flip_move[self.phase_1_edge, move_num])
+        self.phase_1_ud_slice = int(Tables.udslice_move[self.phase_1_ud_slice, move_num])
+        self.phase_2_corner = int(Tables.corner_move[self.phase_2_corner, move_num])
+        self.phase_2_edge = int(Tables.edge8_move[self.phase_2_edge, move_num])
+        self.phase_2_ud_slice = int(Tables.edge4_move[self.phase_2_ud_slice, move_num])
+        # fmt: on
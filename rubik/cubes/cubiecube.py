@@ -1,7 +1,7 @@
 from __future__ import annotations
 from functools import reduce
 from math import comb
-from .pieces import Corner, Edge
+from .pieces import Corner, Edge, Face
 
 
 class CubieCube:
@@ -30,18 +30,27 @@ class CubieCube:
             return 0
 
     def corner_multiply(self, other: CubieCube):
+        """
+        Corner orientations of 3 to 5 mark a mirrored corner, which only occurs in the
+        reflections among the symmetry cubes (see `SYM_CUBE`).
+        """
         cp = []
         co = []
 
         for corner in Corner:
             cp.append(self.corner_permutations[other.corner_permutations[corner]])
-            co.append(
-                (
-                    self.corner_orientations[other.corner_permutations[corner]]
-                    + other.corner_orientations[corner]
-                )
-                % 3
-            )
+            a = self.corner_orientations[other.corner_permutations[corner]]
+            b = other.corner_orientations[corner]
+            if a < 3 and b < 3:
+                co.append((a + b) % 3)
+            elif a < 3:
+                # Only `other` is mirrored, so the product is mirrored too
+                co.append(3 + (a + b) % 3)
+            elif b < 3:
+                co.append(3 + (a - b) % 3)
+            else:
+                # Two reflections cancel out
+                co.append((a - b) % 3)
 
         self.corner_orientations = co
         self.corner_permutations = cp
@@ -73,6 +82,41 @@ class CubieCube:
         """
         self.multiply(MOVE_CUBE[move_num])
 
+    def copy(self) -> CubieCube:
+        return CubieCube(
+            list(self.corner_permutations),
+            list(self.corner_orientations),
+            list(self.edge_permutations),
+            list(self.edge_orientations),
+        )
+
+    def inverse(self) -> CubieCube:
+        """
+        Returns the cube that undoes this one, i.e. the cube reached by applying the inverse of
+        a sequence of moves leading to this one in reverse order.
+        """
+        cube = self.copy()
+        for i, corner in enumerate(self.corner_permutations):
+            cube.corner_permutations[corner] = Corner(i)
+            o = self.corner_orientations[i]
+            # Mirrored corners are their own inverse
+            cube.corner_orientations[corner] = o if o >= 3 else (-o) % 3
+        for i, edge in enumerate(self.edge_permutations):
+            cube.edge_permutations[edge] = Edge(i)
+            cube.edge_orientations[edge] = self.edge_orientations[i]
+        return cube
+
+    def conjugate(self, s: int) -> CubieCube:
+        """
+        Returns `S cube S^-1`, where `S` is the symmetry `SYM_CUBE[s]`. If a sequence of moves
+        solves the conjugate, the same moves conjugated by `SYM_INVERSE[s]` (see `SYM_MOVE`)
+        solve this cube.
+        """
+        cube = SYM_CUBE[s].copy()
+        cube.multiply(self)
+        cube.multiply(SYM_CUBE[SYM_INVERSE[s]])
+        return cube
+
     # COORDINATES NEEDED FOR KOCIEMBA ALGORITHM
 
     @property
@@ -518,3 +562,193 @@ MOVE_CUBE[5].corner_permutations = _cpB
 MOVE_CUBE[5].corner_orientations = _coB
 MOVE_CUBE[5].edge_permutations = _epB
 MOVE_CUBE[5].edge_orientations = _eoB
+
+
+# The cubes describing the basic symmetries of the cube, from which all 48 symmetries are built.
+# 120° clockwise rotation around the long diagonal through URF and DBL
+_cpROT_URF3 = (
+    Corner.URF,
+    Corner.DFR,
+    Corner.DLF,
+    Corner.UFL,
+    Corner.UBR,
+    Corner.DRB,
+    Corner.DBL,
+    Corner.ULB,
+)
+_coROT_URF3 = (1, 2, 1, 2, 2, 1, 2, 1)
+_epROT_URF3 = (
+    Edge.UF,
+    Edge.FR,
+    Edge.DF,
+    Edge.FL,
+    Edge.UB,
+    Edge.BR,
+    Edge.DB,
+    Edge.BL,
+    Edge.UR,
+    Edge.DR,
+    Edge.DL,
+    Edge.UL,
+)
+_eoROT_URF3 = (1, 0, 1, 0, 1, 0, 1, 0, 1, 1, 1, 1)
+
+# 180° rotation around the axis through the F and B centres
+_cpROT_F2 = (
+    Corner.DLF,
+    Corner.DFR,
+    Corner.DRB,
+    Corner.DBL,
+    Corner.UFL,
+    Corner.URF,
+    Corner.UBR,
+    Corner.ULB,
+)
+_coROT_F2 = (0, 0, 0, 0, 0, 0, 0, 0)
+_epROT_F2 = (
+    Edge.DL,
+    Edge.DF,
+    Edge.DR,
+    Edge.DB,
+    Edge.UL,
+    Edge.UF,
+    Edge.UR,
+    Edge.UB,
+    Edge.FL,
+    Edge.FR,
+    Edge.BR,
+    Edge.BL,
+)
+_eoROT_F2 = (0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+
+# 90° clockwise rotation around the axis through the U and D centres
+_cpROT_U4 = (
+    Corner.UBR,
+    Corner.URF,
+    Corner.UFL,
+    Corner.ULB,
+    Corner.DRB,
+    Corner.DFR,
+    Corner.DLF,
+    Corner.DBL,
+)
+_coROT_U4 = (0, 0, 0, 0, 0, 0, 0, 0)
+_epROT_U4 = (
+    Edge.UB,
+    Edge.UR,
+    Edge.UF,
+    Edge.UL,
+    Edge.DB,
+    Edge.DR,
+    Edge.DF,
+    Edge.DL,
+    Edge.BR,
+    Edge.FR,
+    Edge.FL,
+    Edge.BL,
+)
+_eoROT_U4 = (0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1)
+
+# Reflection at the plane through the U, D, F and B centres
+_cpMIRR_LR2 = (
+    Corner.UFL,
+    Corner.URF,
+    Corner.UBR,
+    Corner.ULB,
+    Corner.DLF,
+    Corner.DFR,
+    Corner.DRB,
+    Corner.DBL,
+)
+_coMIRR_LR2 = (3, 3, 3, 3, 3, 3, 3, 3)
+_epMIRR_LR2 = (
+    Edge.UL,
+    Edge.UF,
+    Edge.UR,
+    Edge.UB,
+    Edge.DL,
+    Edge.DF,
+    Edge.DR,
+    Edge.DB,
+    Edge.FL,
+    Edge.FR,
+    Edge.BR,
+    Edge.BL,
+)
+_eoMIRR_LR2 = (0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+
+
+def _make_symmetries():
+    rot_urf3 = CubieCube(_cpROT_URF3, _coROT_URF3, _epROT_URF3, _eoROT_URF3)
+    rot_f2 = CubieCube(_cpROT_F2, _coROT_F2, _epROT_F2, _eoROT_F2)
+    rot_u4 = CubieCube(_cpROT_U4, _coROT_U4, _epROT_U4, _eoROT_U4)
+    mirr_lr2 = CubieCube(_cpMIRR_LR2, _coMIRR_LR2, _epMIRR_LR2, _eoMIRR_LR2)
+
+    symmetries = []
+    cube = CubieCube()
+    for urf3 in range(3):
+        for f2 in range(2):
+            for u4 in range(4):
+                for lr2 in range(2):
+                    symmetries.append(
+                        CubieCube(
+                            list(cube.corner_permutations),
+                            list(cube.corner_orientations),
+                            list(cube.edge_permutations),
+                            list(cube.edge_orientations),
+                        )
+                    )
+                    cube.multiply(mirr_lr2)
+                cube.multiply(rot_u4)
+            cube.multiply(rot_f2)
+        cube.multiply(rot_urf3)
+
+    inverse = []
+    for s in symmetries:
+        for i, t in enumerate(symmetries):
+            product = CubieCube(
+                list(s.corner_permutations),
+                list(s.corner_orientations),
+                list(s.edge_permutations),
+                list(s.edge_orientations),
+            )
+            product.multiply(t)
+            if product.corner_permutations[:3] == [0, 1, 2]:
+                inverse.append(i)
+                break
+
+    return symmetries, inverse
+
+
+# The 48 symmetries of the cube. Symmetry `16 * urf3 + 8 * f2 + 2 * u4 + lr2` is the product of
+# the basic symmetries above, applied the given number of times, so the first 16 are exactly the
+# symmetries that keep the UD axis in place. `SYM_INVERSE[s]` is the index of the inverse of `s`.
+SYM_CUBE, SYM_INVERSE = _make_symmetries()
+
+
+def _make_symmetric_moves():
+    moves = []
+    for face in range(6):
+        cube = CubieCube()
+        for turn in range(3):
+            cube.move(face)
+            moves.append(cube.copy())
+
+    def key(cube: CubieCube):
+        return (
+            list(cube.corner_permutations),
+            list(cube.corner_orientations),
+            list(cube.edge_permutations),
+            list(cube.edge_orientations),
+        )
+
+    keys = [key(move) for move in moves]
+    return [[keys.index(key(move.conjugate(s))) for move in moves] for s in range(48)]
+
+
+# The name of every move, with moves numbered `3 * face + turns - 1`
+MOVE_NAMES = [Face(move // 3).name + ("", "2", "'")[move % 3] for move in range(18)]
+
+# `SYM_MOVE[s][m]` is the move `S M S^-1`, with moves numbered `3 * face + turns - 1` as in the
+# move tables
+SYM_MOVE = _make_symmetric_moves()
@@ -0,0 +1,107 @@
+"""
+Sharing the tables between processes through a named POSIX shared memory segment.
+
+The segment holds an exact copy of the table file, so its header carries the tables version and
+checksum. The first process to attach publishes the segment; every later process maps it and
+wraps the tables in place. A segment that is out of date or corrupted (for example because the
+publishing process died half-way) is detected by its header and published again.
+"""
+
+from __future__ import annotations
+import fcntl
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from typing import Callable
+from .tablefile import HEADER_SIZE, parse_tables
+
+
+DEFAULT_NAME = "rubik-tables"
+
+
+@contextmanager
+def _lock(name: str):
+    """
+    Serializes publishing and attaching across processes.
+    """
+    with open(os.path.join(tempfile.gettempdir(), f"{name}.lock"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _open(name: str, create: bool = False, size: int = 0) -> SharedMemory:
+    segment = SharedMemory(name, create=create, size=size)
+    # The segment outlives this process, so the resource tracker must not unlink it at exit
+    resource_tracker.unregister(segment._name, "shared_memory")  # type: ignore
+    return segment
+
+
+def _map(name: str) -> mmap.mmap:
+    """
+    Maps the shared memory segment called `name` read-only. The mapping stays valid after the
+    `SharedMemory` object is closed, so it can be kept alive by the arrays alone.
+    """
+    segment = _open(name)
+    try:
+        return mmap.mmap(segment._fd, segment.size, access=mmap.ACCESS_READ)  # type: ignore
+    finally:
+        segment.close()
+
+
+def publish(name: str, path: str):
+    """
+    Copies the table file at `path` into a new shared memory segment called `name`, replacing
+    any existing segment of that name.
+    """
+    unlink(name)
+
+    size = os.path.getsize(path)
+    segment = _open(name, create=True, size=size)
+    with open(path, "rb") as f, segment.buf[HEADER_SIZE:size] as rest:
+        # Copy everything but the header first, so that a partial copy is never valid
+        header = f.read(HEADER_SIZE)
+        f.readinto(rest)
+        segment.buf[:HEADER_SIZE] = header
+
+    segment.close()
+
+
+def unlink(name: str):
+    """
+    Removes the shared memory segment called `name`, if it exists. Processes that are attached
+    to it keep their mapping.
+    """
+    try:
+        # Unlinking unregisters the segment from the resource tracker, so it is opened without
+        # `_open` here
+        segment = SharedMemory(name)
+    except FileNotFoundError:
+        return
+
+    segment.close()
+    segment.unlink()
+
+
+def attach(
+    name: str, tables_version: int, make_file: Callable[[], str]
+) -> dict[str, np.ndarray]:
+    """
+    Attaches to the shared memory segment called `name` and returns the tables it holds. If the
+    segment does not exist or is stale, it is first published from the table file whose path is
+    returned by `make_file`.
+    """
+    with _lock(name):
+        try:
+            return parse_tables(_map(name), tables_version, verify=True)
+        except (FileNotFoundError, ValueError):
+            pass
+
+        publish(name, make_file())
+        return parse_tables(_map(name), tables_version, verify=True)
@@ -0,0 +1,239 @@
+"""
+Symmetry reduction of coordinates, vectorized with NumPy.
+
+Conjugating a cube by one of the 16 symmetries that keep the UD axis in place (`S x S^-1`) maps
+phase 1 and phase 2 states to states of the same kind at the same distance from the goal. A
+coordinate can therefore be reduced to its equivalence classes under these symmetries, and a
+pruning table only needs one entry per class and value of a second coordinate, which is
+conjugated along with it.
+
+In the tables built here, every class is represented by its smallest raw coordinate. The class
+of a raw coordinate `x` is stored together with a symmetry `s` that maps `x` to the
+representative, and the second coordinate is conjugated by `s` through a conjugation table
+before the pruning table is indexed.
+"""
+
+from __future__ import annotations
+import numpy as np
+from . import coordarrays as ca
+from .cubiecube import SYM_CUBE, SYM_INVERSE, CubieCube
+
+# The symmetries that keep the UD axis in place
+N_SYM = 16
+
+SYM_CP = np.array([s.corner_permutations for s in SYM_CUBE], dtype=np.int64)
+SYM_CO = np.array([s.corner_orientations for s in SYM_CUBE], dtype=np.int64)
+SYM_EP = np.array([s.edge_permutations for s in SYM_CUBE], dtype=np.int64)
+SYM_EO = np.array([s.edge_orientations for s in SYM_CUBE], dtype=np.int64)
+
+
+def _add_orientations(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Vectorized version of the corner orientation rule of `CubieCube.corner_multiply`.
+    """
+    return np.where(
+        a < 3,
+        np.where(b < 3, (a + b) % 3, 3 + (a + b) % 3),
+        np.where(b < 3, 3 + (a - b) % 3, (a - b) % 3),
+    )
+
+
+def conjugate_corners(cp: np.ndarray, co: np.ndarray, s: int):
+    """
+    Conjugates N cubes given as (N, 8) corner permutation and orientation arrays by symmetry
+    `s`, i.e. computes `S cube S^-1` for each of them.
+    """
+    inverse = SYM_INVERSE[s]
+    cp, co = SYM_CP[s][cp], _add_orientations(SYM_CO[s][cp], co)
+    index = SYM_CP[inverse]
+    return cp[:, index], _add_orientations(co[:, index], SYM_CO[inverse])
+
+
+def conjugate_edges(ep: np.ndarray, eo: np.ndarray, s: int):
+    """
+    Conjugates N cubes given as (N, 12) edge permutation and orientation arrays by symmetry `s`.
+    """
+    inverse = SYM_INVERSE[s]
+    ep, eo = SYM_EP[s][ep], (SYM_EO[s][ep] + eo) % 2
+    index = SYM_EP[inverse]
+    return ep[:, index], (eo[:, index] + SYM_EO[inverse]) % 2
+
+
+def conjugate_twist(coords: np.ndarray, s: int) -> np.ndarray:
+    co = ca.decode_twist(coords)
+    cp = np.broadcast_to(np.arange(8), co.shape)
+    return ca.encode_twist(conjugate_corners(cp, co, s)[1])
+
+
+def conjugate_flipslice(coords: np.ndarray, s: int) -> np.ndarray:
+    """
+    Conjugates the combined flip and UD slice coordinate `2048 * udslice + flip`.
+    """
+    udslice, flip = np.divmod(coords, 2048)
+    ep, eo = conjugate_edges(ca.decode_udslice(udslice), ca.decode_flip(flip), s)
+    return 2048 * ca.encode_udslice(ep) + ca.encode_flip(eo)
+
+
+def conjugate_corner(coords: np.ndarray, s: int) -> np.ndarray:
+    cp = ca.decode_corner(coords)
+    cp, co = conjugate_corners(cp, np.zeros_like(cp), s)
+    return ca.encode_corner(cp)
+
+
+def conjugate_edge8(coords: np.ndarray, s: int) -> np.ndarray:
+    """
+    Conjugates the permutation of the U and D edges, which the symmetries keep in place.
+    """
+    ep = ca.decode_edge8(coords)
+    ep, eo = conjugate_edges(ep, np.zeros_like(ep), s)
+    return ca.encode_edge8(ep)
+
+
+# The permutations and orientations of the inverse of every symmetry, for `canonical_form`
+_ROWS = np.arange(len(SYM_CUBE))[:, None]
+_INVERSE_CP = SYM_CP[SYM_INVERSE]
+_INVERSE_CO = SYM_CO[SYM_INVERSE]
+_INVERSE_EP = SYM_EP[SYM_INVERSE]
+_INVERSE_EO = SYM_EO[SYM_INVERSE]
+
+
+def canonical_form(cube: CubieCube) -> tuple[bytes, int]:
+    """
+    Returns the smallest of the conjugates of `cube` by all 48 symmetries, compared by their
+    corner and edge permutations and orientations and given as the bytes of those, together
+    with a symmetry that conjugates `cube` to it. Two cubes have the same canonical form exactly
+    when one is a rotated or mirrored version of the other.
+    """
+    cp = np.array(cube.corner_permutations)
+    co = np.array(cube.corner_orientations)
+    ep = np.array(cube.edge_permutations)
+    eo = np.array(cube.edge_orientations)
+    # The conjugates by every symmetry at once, as in `conjugate_corners` and `conjugate_edges`
+    cps, cos = SYM_CP[:, cp], _add_orientations(SYM_CO[:, cp], co)
+    cps = cps[_ROWS, _INVERSE_CP]
+    cos = _add_orientations(cos[_ROWS, _INVERSE_CP], _INVERSE_CO)
+    eps, eos = SYM_EP[:, ep], (SYM_EO[:, ep] + eo) % 2
+    eps = eps[_ROWS, _INVERSE_EP]
+    eos = (eos[_ROWS, _INVERSE_EP] + _INVERSE_EO) % 2
+
+    conjugates = np.concatenate([cps, cos, eps, eos], axis=1).astype(np.uint8)
+    # Compared as byte strings, the rows are in lexicographic order
+    s = int(conjugates.view("S40").argmin())
+    return conjugates[s].tobytes(), s
+
+
+def make_conjugation_table(conjugate, count: int) -> np.ndarray:
+    """
+    Returns the (N_SYM, count) table of the coordinate of every conjugate of every coordinate.
+    `conjugate(coords, s)` must return the coordinates of the conjugates of `coords` by `s`.
+    """
+    coords = np.arange(count)
+    return np.stack([conjugate(coords, s) for s in range(N_SYM)])
+
+
+def make_classes(conjugates: np.ndarray):
+    """
+    Splits a coordinate into classes, given the table of its conjugates from
+    `make_conjugation_table`.
+
+    Returns the class of every coordinate and a symmetry that conjugates it to the
+    representative of its class. Classes are numbered in the order of their representatives,
+    and the representative of a class is mapped to itself by symmetry 0, the identity.
+    """
+    representative = conjugates.min(axis=0)
+    sym = (conjugates == representative).argmax(axis=0)
+    classidx = np.searchsorted(np.flatnonzero(sym == 0), representative)
+    return classidx, sym
+
+
+def make_stabilizers(conjugate, representatives: np.ndarray) -> np.ndarray:
+    """
+    Returns the bit mask of the symmetries that leave each of `representatives` unchanged.
+    """
+    stabilizers = np.zeros(len(representatives), dtype=np.int64)
+    for s in range(N_SYM):
+        fixed = conjugate(representatives, s) == representatives
+        stabilizers |= fixed.astype(np.int64) << s
+    return stabilizers
+
+
+def make_symmetric_prune_table(
+    class_move: np.ndarray,
+    class_sym: np.ndarray,
+    stabilizers: np.ndarray,
+    raw_move: np.ndarray,
+    raw_conj: np.ndarray,
+    moves=range(18),
+    chunk: int = 1 << 16,
+    block: int = 1 << 22,
+) -> np.ndarray:
+    """
+    Generates the depth of every pair of a class `c` of a symmetry-reduced coordinate and a raw
+    coordinate `r`, stored at index `c * len(raw_move) + r`, by a breadth-first search from the
+    solved state.
+
+    :param class_move: The class reached by every move from the representative of every class
+    :param class_sym: The symmetry mapping the coordinate reached by every move from every
+        representative to the representative of its class
+    :param stabilizers: The bit mask of the symmetries leaving every representative unchanged
+    :param raw_move: The move table of the raw coordinate
+    :param raw_conj: The (count, N_SYM) conjugation table of the raw coordinate
+    :param moves: The moves the search may use
+
+    The search runs forwards while the frontier is smaller than the set of unvisited states and
+    backwards afterwards, like `Tables.make_prune_table`. The table is scanned in blocks of
+    `block` entries and neighbours are generated for `chunk` states at once, which bounds the
+    memory used on top of the table itself.
+    """
+    moves = np.asarray(moves)
+    class_move = np.asarray(class_move, dtype=np.int64)[:, moves]
+    class_sym = np.asarray(class_sym, dtype=np.int64)[:, moves]
+    raw_move = np.asarray(raw_move, dtype=np.int64)[:, moves]
+    raw_conj = np.asarray(raw_conj, dtype=np.int64)
+    stride = len(raw_move)
+    size = len(class_move) * stride
+
+    table = np.full(size, -1, dtype=np.int8)
+    table[0] = 0
+    depth = 0
+    frontier = 1
+    unvisited = size - 1
+
+    def neighbours(index):
+        c = index // stride
+        r = index % stride
+        return class_move[c], raw_conj[raw_move[r], class_sym[c]]
+
+    while frontier > 0 and unvisited > 0:
+        backwards = frontier > unvisited
+        for start in range(0, size, block):
+            index = np.flatnonzero(
+                table[start : start + block] == (-1 if backwards else depth)
+            )
+            index += start
+            for i in range(0, len(index), chunk):
+                c, r = neighbours(index[i : i + chunk])
+                if backwards:
+                    found = (table[c * stride + r] == depth).any(axis=1)
+                    table[index[i : i + chunk][found]] = depth + 1
+                    continue
+
+                new = table[c * stride + r] == -1
+                c, r = c[new], r[new]
+                table[c * stride + r] = depth + 1
+
+                # States equivalent to the new ones have the same class but a differently
+                # conjugated raw coordinate. They are at the same depth, so they are set here
+                # too, as the search might never reach them directly.
+                mask = stabilizers[c]
+                for s in range(1, N_SYM):
+                    symmetric = (mask >> s & 1).astype(bool)
+                    index2 = c[symmetric] * stride + raw_conj[r[symmetric], s]
+                    index2 = index2[table[index2] == -1]
+                    table[index2] = depth + 1
+
+        depth += 1
+        frontier = int(np.count_nonzero(table == depth))
+        unvisited -= frontier
+
+    return table
@@ -0,0 +1,137 @@
+"""
+Building the table file from scratch.
+
+Every table is written to its own checkpoint file as soon as it is finished, so an interrupted
+build picks up where it stopped. Tables that do not depend on each other are built in parallel,
+and all files are written atomically, so no process ever reads a partially written table.
+"""
+
+from __future__ import annotations
+import os
+import shutil
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, as_completed
+import numpy as np
+from .tablefile import read_tables, write_tables
+from .tables import Tables
+
+
+class _SerialExecutor(Executor):
+    """
+    Runs every task as soon as it is submitted, in the current process.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def checkpoint_directory(path: str) -> str:
+    return path + ".parts"
+
+
+def _checkpoint_path(directory: str, name: str) -> str:
+    return os.path.join(directory, name + ".bin")
+
+
+def _load_checkpoint(directory: str, name: str) -> np.ndarray | None:
+    """
+    Returns the checkpointed table `name`, or `None` if there is no usable checkpoint.
+    """
+    try:
+        table = read_tables(_checkpoint_path(directory, name), Tables.VERSION)[name]
+    except (OSError, ValueError, KeyError):
+        return None
+
+    # Checkpoints left behind by a build with different settings are ignored
+    try:
+        Tables.check_table(name, table)
+    except ValueError:
+        return None
+
+    return table
+
+
+def _build_table(name: str, directory: str, names: tuple[str, ...]) -> float:
+    """
+    Builds the table `name`, writes it to its checkpoint and returns the time it took. The
+    tables it depends on are read from their checkpoints if they are part of the build (`names`),
+    and loaded from the table file otherwise.
+    """
+    start = time.perf_counter()
+    dependencies = {
+        dependency: (
+            _load_checkpoint(directory, dependency)
+            if dependency in names
+            else getattr(Tables, dependency)
+        )
+        for dependency in Tables.DEPENDENCIES.get(name, ())
+    }
+    table = Tables.make_table(name, dependencies)
+    write_tables(_checkpoint_path(directory, name), {name: table}, Tables.VERSION)
+    return time.perf_counter() - start
+
+
+def build_tables(
+    path: str,
+    jobs: int = 1,
+    restart: bool = False,
+    log=print,
+    table_set: str | None = None,
+):
+    """
+    Builds every table of the table file, or of `table_set` if given, and writes them to `path`.
+
+    :param jobs: The number of worker processes. With 1, the tables are built in this process.
+    :param restart: Discard the checkpoints of a previous, interrupted build
+    :param log: Called with a message whenever a table is finished
+    :param table_set: One of `Tables.TABLE_SETS`
+    """
+    directory = checkpoint_directory(path)
+    if restart:
+        shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+    names = Tables.table_names(table_set)
+    done = {name for name in names if _load_checkpoint(directory, name) is not None}
+    pending = [name for name in names if name not in done]
+    if done:
+        log(f"Resuming build, {len(done)} of {len(names)} tables already built")
+
+    start = time.perf_counter()
+    timings = []
+    executor = ProcessPoolExecutor(jobs) if jobs > 1 else _SerialExecutor()
+
+    with executor:
+        futures: dict[Future, str] = {}
+        while pending or futures:
+            # Tables can only be started once the tables they depend on are finished
+            for name in list(pending):
+                if len(futures) >= jobs:
+                    break
+                dependencies = Tables.DEPENDENCIES.get(name, ())
+                if all(d in done or d not in names for d in dependencies):
+                    pending.remove(name)
+                    future = executor.submit(_build_table, name, directory, names)
+                    futures[future] = name
+
+            future = next(as_completed(futures))
+            name = futures.pop(future)
+            timings.append(future.result())
+            done.add(name)
+
+            remaining = len(names) - len(done)
+            eta = sum(timings) / len(timings) * remaining / max(min(jobs, remaining), 1)
+            log(
+                f"[{len(done)}/{len(names)}] Built {name} in {timings[-1]:.2f}s"
+                + (f", about {eta:.1f}s left" if remaining else "")
+            )
+
+    tables = {name: _load_checkpoint(directory, name) for name in names}
+    write_tables(path, tables, Tables.VERSION)
+    shutil.rmtree(directory, ignore_errors=True)
+    log(f"Wrote {path} in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,158 @@
+"""
+Reading and writing of the binary table file.
+
+The file starts with a fixed-size header followed by a directory with one entry per table.
+Every table is stored as a flat, little-endian array aligned to `ALIGNMENT` bytes so that it can
+be mapped straight into memory with `mmap` and wrapped by NumPy without copying.
+
+    header:    magic (8s), version (u32), entry count (u32), tables version (u32),
+               checksum (u32), length (u64)
+    entry:     name (32s), dtype (8s), rows (u64), columns (u64), offset (u64)
+
+`version` is the version of the file format itself, while `tables version` is chosen by the
+writer to identify what the tables contain, so that files written by an older generator can be
+detected. The checksum is the CRC-32 of everything after the header, up to `length`.
+"""
+
+from __future__ import annotations
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+import numpy as np
+
+
+MAGIC = b"RUBIKTBL"
+VERSION = 2
+ALIGNMENT = 64
+
+_HEADER = struct.Struct("<8sIIIIQ")
+_ENTRY = struct.Struct("<32s8sQQQ")
+HEADER_SIZE = _HEADER.size
+
+# Only fixed-width little-endian integer types are allowed in the file
+_DTYPES = ("|i1", "|u1", "<i2", "<u2", "<i4", "<u4")
+
+
+def _align(n: int) -> int:
+    return (n + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_tables(path: str, tables: dict[str, np.ndarray], tables_version: int = 0):
+    """
+    Writes `tables` to `path`. The file is written to a temporary file in the same directory
+    first and then moved into place, so readers never see a partially written file.
+    """
+    arrays = {}
+    for name, table in tables.items():
+        array = np.ascontiguousarray(table)
+        if array.dtype.str not in _DTYPES:
+            raise ValueError(f"Table {name} has unsupported type {array.dtype}.")
+        if array.ndim not in (1, 2):
+            raise ValueError(f"Table {name} must be 1- or 2-dimensional.")
+        arrays[name] = array
+
+    entries = []
+    offset = _align(_HEADER.size + _ENTRY.size * len(arrays))
+    for name, array in arrays.items():
+        rows = array.shape[0]
+        columns = array.shape[1] if array.ndim == 2 else 0
+        entries.append(
+            _ENTRY.pack(name.encode(), array.dtype.str.encode(), rows, columns, offset)
+        )
+        offset = _align(offset + array.nbytes)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tables-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w+b") as f:
+            f.write(b"\0" * _HEADER.size)
+            for entry in entries:
+                f.write(entry)
+            for array in arrays.values():
+                f.write(b"\0" * (_align(f.tell()) - f.tell()))
+                f.write(array.tobytes())
+
+            # The header is written last, once the checksum of the rest is known
+            length = f.tell()
+            f.seek(_HEADER.size)
+            checksum = 0
+            while chunk := f.read(1 << 24):
+                checksum = zlib.crc32(chunk, checksum)
+            f.seek(0)
+            f.write(
+                _HEADER.pack(
+                    MAGIC, VERSION, len(arrays), tables_version, checksum, length
+                )
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        # `mkstemp` creates the file readable only by its owner
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_tables(
+    path: str, tables_version: int | None = None, verify: bool = False
+) -> dict[str, np.ndarray]:
+    """
+    Maps the table file at `path` into memory and returns read-only arrays that point directly
+    into the mapping. Raises `ValueError` if the file is not a table file of the current version.
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return parse_tables(buffer, tables_version, verify)
+
+
+def parse_tables(
+    buffer, tables_version: int | None = None, verify: bool = False
+) -> dict[str, np.ndarray]:
+    """
+    Wraps the tables stored in `buffer` (anything supporting the buffer protocol) without
+    copying them. `buffer` may be longer than the file it contains.
+
+    :param tables_version: If given, the tables version the file must have
+    :param verify: Whether to check the checksum, which means reading the whole file
+    """
+    if len(buffer) < _HEADER.size:
+        raise ValueError("Table file is truncated.")
+
+    magic, version, count, file_tables_version, checksum, length = _HEADER.unpack_from(
+        buffer, 0
+    )
+    if magic != MAGIC:
+        raise ValueError("Not a table file.")
+    if version != VERSION:
+        raise ValueError(f"Table file has version {version}, expected {VERSION}.")
+    if tables_version is not None and file_tables_version != tables_version:
+        raise ValueError(
+            f"Tables have version {file_tables_version}, expected {tables_version}."
+        )
+    if length > len(buffer):
+        raise ValueError("Table file is truncated.")
+    if verify:
+        with memoryview(buffer) as view, view[_HEADER.size : length] as data:
+            if zlib.crc32(data) != checksum:
+                raise ValueError("Table file is corrupted.")
+
+    tables = {}
+    for i in range(count):
+        name, dtype, rows, columns, offset = _ENTRY.unpack_from(
+            buffer, _HEADER.size + i * _ENTRY.size
+        )
+        dtype = np.dtype(dtype.rstrip(b"\0").decode())
+        shape = (rows, columns) if columns else (rows,)
+        size = rows * max(columns, 1)
+        if offset + size * dtype.itemsize > length:
+            raise ValueError("Table file is truncated.")
+
+        array = np.frombuffer(buffer, dtype=dtype, count=size, offset=offset)
+        tables[name.rstrip(b"\0").decode()] = array.reshape(shape)
+
+    return tables
@@ -22,25 +22,207 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
+from __future__ import annotations
 import json
+import mmap
 import os
+import numpy as np
 import requests
 
-from .cubiecube import MOVE_CUBE, CubieCube
+from . import coordarrays as ca
+from . import symmetries as sy
+from .sharedtables import DEFAULT_NAME, attach
+from .tablefile import read_tables, write_tables
 from os import path
 
 
 class PruningTable:
     """
     Helper class to allow pruning to be used as though they were 2-D tables
+
+    Every entry is stored in one byte. The subclasses below store the same tables in less
+    memory; all of them are indexed the same way.
     """
 
-    def __init__(self, table, stride):
-        self.table = table
+    # Number of bits used by every entry
+    BITS = 8
+
+    def __init__(self, table, stride, size: int | None = None, moves=None):
+        """
+        :param table: The stored (possibly packed) entries
+        :param stride: The number of values of the second coordinate
+        :param size: The number of entries, if `table` is packed
+        :param moves: The move tables of both coordinates, needed to recover exact distances
+            from a `Mod3PruningTable` without a known neighbouring distance
+        """
+        dtype = np.int8 if self.BITS == 8 else np.uint8
+        self.table = np.asarray(table, dtype=dtype)
         self.stride = stride
+        self.size = len(self.table) * 8 // self.BITS if size is None else size
+        self.moves = moves
+        # Indexing a memoryview returns plain ints and is much faster than indexing NumPy
+        self._view = memoryview(self.table)
+
+        if len(self.table) != -(-self.size * self.BITS // 8):
+            raise ValueError("Pruning table has the wrong size.")
+
+    def __getitem__(self, x):
+        return self._view[x[0] * self.stride + x[1]]
+
+    @classmethod
+    def pack(cls, depths, stride: int, moves=None) -> PruningTable:
+        """
+        Creates a pruning table from the depth of every entry.
+        """
+        depths = np.asarray(depths)
+        if cls.BITS == 8:
+            return cls(depths, stride, moves=moves)
+
+        per_byte = 8 // cls.BITS
+        values = np.zeros(-(-len(depths) // per_byte) * per_byte, dtype=np.uint8)
+        values[: len(depths)] = cls._encode(depths)
+        shifts = np.arange(per_byte, dtype=np.uint8) * cls.BITS
+        packed = np.bitwise_or.reduce(values.reshape(-1, per_byte) << shifts, axis=1)
+        return cls(packed, stride, len(depths), moves)
+
+    @classmethod
+    def _encode(cls, depths: np.ndarray) -> np.ndarray:
+        return depths.astype(np.uint8)
+
+    def unpack(self) -> np.ndarray:
+        """
+        Returns the stored value of every entry as an int8 array.
+        """
+        if self.BITS == 8:
+            return self.table
+
+        per_byte = 8 // self.BITS
+        shifts = np.arange(per_byte, dtype=np.uint8) * self.BITS
+        values = (self.table[:, None] >> shifts) & ((1 << self.BITS) - 1)
+        return values.reshape(-1)[: self.size].astype(np.int8)
+
+    def distance(self, x, previous: int | None = None) -> int:
+        """
+        Returns the exact distance stored for `x`. `previous` is the distance of a state one
+        move away from `x`, which is only needed by `Mod3PruningTable`.
+        """
+        return self[x]
+
+
+class NibblePruningTable(PruningTable):
+    """
+    A pruning table storing two entries per byte, which is enough for depths up to 15.
+    """
+
+    BITS = 4
+
+    def __getitem__(self, x):
+        i = x[0] * self.stride + x[1]
+        return self._view[i >> 1] >> ((i & 1) << 2) & 15
+
+
+class Mod3PruningTable(PruningTable):
+    """
+    A pruning table storing four entries per byte. Only the depth modulo 3 is stored, which is
+    all that is needed during a search: the depths of neighbouring states differ by at most
+    one, so knowing the depth of the previous state determines the depth of the next one.
+
+    Indexing returns the stored depth modulo 3, so the search must go through `distance`. The
+    solver only reads the symmetry-reduced tables this way (see `SymmetricPruningTable`).
+    """
+
+    BITS = 2
+    # No state is further than this from the solved state
+    MAX_DEPTH = 20
+
+    def __getitem__(self, x):
+        i = x[0] * self.stride + x[1]
+        return self._view[i >> 2] >> ((i & 3) << 1) & 3
+
+    @classmethod
+    def _encode(cls, depths: np.ndarray) -> np.ndarray:
+        return (depths % 3).astype(np.uint8)
+
+    def distance(self, x, previous: int | None = None) -> int:
+        if previous is not None:
+            return previous + (self[x] - previous + 1) % 3 - 1
+
+        # Without a known neighbour, walk towards the solved state, which is always possible
+        # by moving to a neighbour one step closer
+        move_a, move_b = self.moves
+        a, b = x
+        depth = 0
+        while a * self.stride + b != 0:
+            if depth == self.MAX_DEPTH:
+                raise ValueError(f"Entry {x} cannot reach the solved state.")
+            target = (self[a, b] - 1) % 3
+            for move in range(18):
+                next_a = int(move_a[a, move])
+                next_b = int(move_b[b, move])
+                if next_a >= 0 and next_b >= 0 and self[next_a, next_b] == target:
+                    a, b = next_a, next_b
+                    break
+            else:
+                raise ValueError(f"Entry {x} cannot reach the solved state.")
+            depth += 1
+
+        return depth
+
+
+class SymmetricPruningTable(Mod3PruningTable):
+    """
+    A `Mod3PruningTable` whose first coordinate is reduced to its classes under symmetry (see
+    `symmetries`). It is indexed by the raw coordinates like the other tables: the first one is
+    looked up in `classes`, which stores `16 * class + symmetry`, and the second one is
+    conjugated by that symmetry through `conj`.
+    """
+
+    def __init__(self, table, stride, size: int, classes, conj, moves=None):
+        super().__init__(table, stride, size, moves)
+        self.classes = np.asarray(classes)
+        self.conj = np.asarray(conj)
+        self._classes = memoryview(self.classes)
+        self._conj = memoryview(self.conj)
 
     def __getitem__(self, x):
-        return self.table[x[0] * self.stride + x[1]]
+        c = self._classes[x[0]]
+        i = (c >> 4) * self.stride + self._conj[x[1], c & 15]
+        return self._view[i >> 2] >> ((i & 3) << 1) & 3
+
+
+class _FlipSliceMove:
+    """
+    The move table of the coordinate `FLIP * udslice + flip`, computed from the move tables of
+    its two parts instead of being stored.
+    """
+
+    def __init__(self, udslice_move, flip_move):
+        self._udslice_move = memoryview(np.asarray(udslice_move))
+        self._flip_move = memoryview(np.asarray(flip_move))
+
+    def __getitem__(self, x):
+        a, move = x
+        udslice, flip = divmod(a, Tables.FLIP)
+        return (
+            Tables.FLIP * self._udslice_move[udslice, move]
+            + self._flip_move[flip, move]
+        )
+
+
+class _LazyTable:
+    """
+    A table that is loaded when it is first accessed. Loading replaces this descriptor on the
+    class with the table itself, so later accesses cost nothing extra.
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        return owner._load_table(self.name)
 
 
 class Tables:
@@ -52,9 +234,23 @@ class Tables:
 
     Pruning tables are used to obtain lower bounds for the number of moves
     required to reach a solution given a particular pair of coordinates.
+
+    The tables are stored in a binary file (see `tablefile`) which is memory-mapped when loaded,
+    so every table is a read-only NumPy array backed by the page cache rather than a private copy.
+    Each table is only loaded when it is first used; `preload` loads them ahead of time.
+
+    The tables in `TABLE_SETS` take much longer to generate than the others, so they are not
+    part of the table file. Each set has a file of its own which is only built on request, and
+    the solver only uses them if that file exists (see `has_tables`).
     """
 
-    _tables_loaded = False
+    # Version of the generated tables, stored in the table file. Increase it whenever the tables
+    # change so that existing files are regenerated.
+    VERSION = 2
+
+    # Location of the binary table file and of the legacy JSON file
+    path = os.environ.get("RUBIK_TABLES", "tables.bin")
+    json_path = "tables.json"
 
     # 3^7 possible corner orientations
     TWIST = 2187
@@ -68,36 +264,174 @@ class Tables:
     EDGE8 = 40320
     # 8! possible permutations of the corners
     CORNER = 40320
+    # 12!/8! possible positions and orders of the UD slice edges, or of the U or D edges
+    SLICE_SORTED = 11880
+    U_EDGES = 11880
+    D_EDGES = 11880
     # 12! possible permutations of all edges
     EDGE = 479001600
     # 6*3 possible moves
     MOVES = 18
-
-    def __init__(self):
-        if not self._tables_loaded:
-            self.load_tables()
+    # Combined flip and UD slice coordinate, `FLIP * udslice + flip`
+    FLIPSLICE = FLIP * UDSLICE
+    # Classes of the flip and UD slice coordinate under the 16 symmetries of the UD axis
+    FLIPSLICE_CLASSES = 64430
+    # Classes of the corner permutation under the same symmetries
+    CORNER_CLASSES = 2768
+
+    # Name and on-disk type of every move table
+    MOVE_TABLES = {
+        "twist_move": np.int16,
+        "flip_move": np.int16,
+        "udslice_move": np.int16,
+        "edge4_move": np.int16,
+        "edge8_move": np.int32,
+        "corner_move": np.int32,
+        "slice_sorted_move": np.int16,
+        "u_edges_move": np.int16,
+        "d_edges_move": np.int16,
+    }
+    # Name, type and shape of every other lookup table, i.e. those used for symmetry reduction
+    # and the edge8 coordinate at the start of phase 2 (see `ca.make_ud_edges_edge8`)
+    LOOKUP_TABLES = {
+        "ud_edges_edge8": (np.uint16, (1680, EDGE4)),
+        "flipslice_class": (np.uint32, (FLIPSLICE,)),
+        "twist_conj": (np.uint16, (TWIST, sy.N_SYM)),
+        "corner_class": (np.uint16, (CORNER,)),
+        "edge8_conj": (np.uint16, (EDGE8, sy.N_SYM)),
+    }
+    # Name, number of rows and stride of every pruning table
+    PRUNING_TABLES = {
+        "udslice_twist_prune": (UDSLICE, TWIST),
+        "udslice_flip_prune": (UDSLICE, FLIP),
+        "edge4_edge8_prune": (EDGE4, EDGE8),
+        "edge4_corner_prune": (EDGE4, CORNER),
+        "flipslice_twist_prune": (FLIPSLICE_CLASSES, TWIST),
+        "corner_edge8_prune": (CORNER_CLASSES, EDGE8),
+        "corner_twist_prune": (CORNER, TWIST),
+        "slice_sorted_flip_prune": (SLICE_SORTED, FLIP),
+        "u_edges_flip_prune": (U_EDGES, FLIP),
+    }
+    # Pruning tables reduced by symmetry, with the tables holding the classes of their first
+    # coordinate and the conjugates of their second one. They are always stored as
+    # `Mod3PruningTable`s.
+    SYMMETRIC_PRUNING_TABLES = {
+        "flipslice_twist_prune": ("flipslice_class", "twist_conj"),
+        "corner_edge8_prune": ("corner_class", "edge8_conj"),
+    }
+    # The move tables every pruning table is generated from
+    PRUNING_MOVES = {
+        "udslice_twist_prune": ("udslice_move", "twist_move"),
+        "udslice_flip_prune": ("udslice_move", "flip_move"),
+        "edge4_edge8_prune": ("edge4_move", "edge8_move"),
+        "edge4_corner_prune": ("edge4_move", "corner_move"),
+        "corner_twist_prune": ("corner_move", "twist_move"),
+        "slice_sorted_flip_prune": ("slice_sorted_move", "flip_move"),
+        "u_edges_flip_prune": ("u_edges_move", "flip_move"),
+    }
+    # The tables every table is generated from
+    DEPENDENCIES = {
+        **PRUNING_MOVES,
+        "flipslice_twist_prune": (
+            "udslice_move",
+            "flip_move",
+            "twist_move",
+            "flipslice_class",
+            "twist_conj",
+        ),
+        "corner_edge8_prune": (
+            "corner_move",
+            "edge8_move",
+            "corner_class",
+            "edge8_conj",
+        ),
+    }
+    # The optional sets of tables, each stored in the file given by `set_path`
+    TABLE_SETS = {
+        "phase1": ("flipslice_class", "twist_conj", "flipslice_twist_prune"),
+        "phase2": ("corner_class", "edge8_conj", "corner_edge8_prune"),
+        # The pattern databases of `OptimalSolver`: all corners, and the UD slice or U edges
+        # together with the orientation of every edge
+        "optimal": (
+            "corner_twist_prune",
+            "slice_sorted_flip_prune",
+            "u_edges_flip_prune",
+        ),
+    }
+    # The tables used by each phase of the solver
+    PHASES = {
+        1: (
+            "twist_move",
+            "flip_move",
+            "udslice_move",
+            "corner_move",
+            "slice_sorted_move",
+            "u_edges_move",
+            "d_edges_move",
+            "ud_edges_edge8",
+            "udslice_twist_prune",
+            "udslice_flip_prune",
+            "flipslice_class",
+            "twist_conj",
+            "flipslice_twist_prune",
+        ),
+        2: (
+            "edge4_move",
+            "edge8_move",
+            "corner_move",
+            "edge4_edge8_prune",
+            "edge4_corner_prune",
+            "corner_class",
+            "edge8_conj",
+            "corner_edge8_prune",
+        ),
+    }
+    twist_move = _LazyTable()
+    flip_move = _LazyTable()
+    udslice_move = _LazyTable()
+    edge4_move = _LazyTable()
+    edge8_move = _LazyTable()
+    corner_move = _LazyTable()
+    slice_sorted_move = _LazyTable()
+    u_edges_move = _LazyTable()
+    d_edges_move = _LazyTable()
+    ud_edges_edge8 = _LazyTable()
+    udslice_twist_prune = _LazyTable()
+    udslice_flip_prune = _LazyTable()
+    edge4_edge8_prune = _LazyTable()
+    edge4_corner_prune = _LazyTable()
+    flipslice_class = _LazyTable()
+    twist_conj = _LazyTable()
+    flipslice_twist_prune = _LazyTable()
+    corner_class = _LazyTable()
+    edge8_conj = _LazyTable()
+    corner_edge8_prune = _LazyTable()
+    corner_twist_prune = _LazyTable()
+    slice_sorted_flip_prune = _LazyTable()
+    u_edges_flip_prune = _LazyTable()
+
+    # The stored tables that the tables above are loaded from, i.e. the mapped table file
+    _source: dict[str, np.ndarray] | None = None
+    # The stored tables of every table set that has been loaded
+    _set_sources: dict[str, dict[str, np.ndarray]] = {}
 
     @classmethod
     def load_tables(cls):
-        if os.path.isfile("tables.json"):
-            with open("tables.json", "r") as f:
-                tables = json.load(f)
-            cls.twist_move = tables["twist_move"]
-            cls.flip_move = tables["flip_move"]
-            cls.udslice_move = tables["udslice_move"]
-            cls.edge4_move = tables["edge4_move"]
-            cls.edge8_move = tables["edge8_move"]
-            cls.corner_move = tables["corner_move"]
-            cls.udslice_twist_prune = PruningTable(
-                tables["udslice_twist_prune"], cls.TWIST
-            )
-            cls.udslice_flip_prune = PruningTable(
-                tables["udslice_flip_prune"], cls.FLIP
-            )
-            cls.edge4_edge8_prune = PruningTable(tables["edge4_edge8_prune"], cls.EDGE8)
-            cls.edge4_corner_prune = PruningTable(
-                tables["edge4_corner_prune"], cls.CORNER
-            )
+        """
+        Maps the table file, generating it first if it does not exist or is out of date. The
+        tables themselves are loaded from it when they are first accessed.
+        """
+        if os.path.isfile(cls.path):
+            try:
+                cls.read_binary(cls.path)
+            except ValueError as e:
+                print(f"Ignoring out of date table file {cls.path}: {e}")
+            else:
+                return
+
+        if os.path.isfile(cls.json_path):
+            cls.import_json(cls.json_path)
+            cls.write_binary(cls.path)
         else:
             # TODO: Attempt to download a pre-generated one
             # response = requests.get(
@@ -113,218 +447,508 @@ class Tables:
             # return
 
             # Otherwise, generate it mnaually
+            from .tablebuild import build_tables
 
             print(
-                "Generating move and pruning tables. May take a few minutes to complete."
+                "Generating move and pruning tables. May take a few seconds to complete."
+            )
+            build_tables(cls.path)
+
+        # Map the tables back in so that they are shared between processes
+        cls.read_binary(cls.path)
+
+    @classmethod
+    def load_shared(cls, name: str = DEFAULT_NAME):
+        """
+        Uses the tables held in the shared memory segment called `name`, so that all processes
+        calling this share one copy of them. The segment is published from the table file
+        (which is generated if needed) by the first caller, or whenever it is out of date.
+        """
+
+        def make_file():
+            cls.load_tables()
+            return cls.path
+
+        cls.set_tables(attach(name, cls.VERSION, make_file))
+
+        # The table sets that have been built are shared in segments of their own
+        for table_set in cls.TABLE_SETS:
+            if cls.has_tables(table_set):
+                cls._set_sources[table_set] = attach(
+                    f"{name}-{table_set}",
+                    cls.VERSION,
+                    lambda: cls.set_path(table_set),
+                )
+                for table_name in cls.TABLE_SETS[table_set]:
+                    setattr(cls, table_name, _LazyTable(table_name))
+
+    @classmethod
+    def preload(cls, phases=(1, 2)):
+        """
+        Loads the tables needed by the given phases of the solver and reads them into memory,
+        so that the first solve does not have to wait for them. Tables of sets that have not
+        been built are skipped.
+        """
+        for phase in phases:
+            for name in cls.PHASES[phase]:
+                table_set = cls._table_set(name)
+                if table_set is not None and not cls.has_tables(table_set):
+                    continue
+
+                table = getattr(cls, name)
+                stored = table.table if isinstance(table, PruningTable) else table
+                # Reading one byte of every page is enough to fault the whole table in
+                stored.reshape(-1).view(np.uint8)[:: mmap.PAGESIZE].sum()
+
+    @classmethod
+    def set_path(cls, table_set: str) -> str:
+        """
+        Returns the path of the file holding the table set `table_set`, next to the table file.
+        """
+        root, ext = os.path.splitext(cls.path)
+        return f"{root}-{table_set}{ext}"
+
+    @classmethod
+    def table_names(cls, table_set: str | None = None) -> tuple[str, ...]:
+        """
+        Returns the names of the tables in `table_set`, or in the table file if it is `None`.
+        """
+        if table_set is not None:
+            return cls.TABLE_SETS[table_set]
+
+        return tuple(
+            name
+            for name in (*cls.MOVE_TABLES, *cls.LOOKUP_TABLES, *cls.PRUNING_TABLES)
+            if cls._table_set(name) is None
+        )
+
+    @classmethod
+    def _table_set(cls, name: str) -> str | None:
+        for table_set, names in cls.TABLE_SETS.items():
+            if name in names:
+                return table_set
+        return None
+
+    @classmethod
+    def has_tables(cls, table_set: str) -> bool:
+        """
+        Returns whether the tables of `table_set` have been built and are up to date.
+        """
+        try:
+            cls._load_set(table_set)
+        except (OSError, ValueError):
+            return False
+        return True
+
+    @classmethod
+    def _load_set(cls, table_set: str) -> dict[str, np.ndarray]:
+        if table_set not in cls._set_sources:
+            tables = read_tables(cls.set_path(table_set), cls.VERSION)
+            for name in cls.TABLE_SETS[table_set]:
+                if name not in tables:
+                    raise ValueError(f"Table file is missing {name}.")
+                cls.check_table(name, tables[name])
+            cls._set_sources[table_set] = tables
+
+        return cls._set_sources[table_set]
+
+    @classmethod
+    def _load_table(cls, name: str):
+        table_set = cls._table_set(name)
+        if table_set is not None:
+            try:
+                stored = cls._load_set(table_set)[name]
+            except FileNotFoundError:
+                raise FileNotFoundError(
+                    f"Table {name} has not been built, run "
+                    + f"`python -m rubik tables build {table_set}` first."
+                ) from None
+        else:
+            if cls._source is None:
+                cls.load_tables()
+            stored = cls._source[name]  # type: ignore
+
+        if name in cls.MOVE_TABLES:
+            table = np.asarray(stored, dtype=cls.MOVE_TABLES[name])
+        elif name in cls.LOOKUP_TABLES:
+            table = stored
+        elif name in cls.SYMMETRIC_PRUNING_TABLES:
+            classes, conj = cls.SYMMETRIC_PRUNING_TABLES[name]
+            rows, stride = cls.PRUNING_TABLES[name]
+            if name == "flipslice_twist_prune":
+                moves = (
+                    _FlipSliceMove(cls.udslice_move, cls.flip_move),
+                    cls.twist_move,
+                )
+            else:
+                moves = (cls.corner_move, cls.edge8_move)
+            table = SymmetricPruningTable(
+                stored,
+                stride,
+                rows * stride,
+                getattr(cls, classes),
+                getattr(cls, conj),
+                moves,
             )
-            # ----------  Phase 1 move tables  ---------- #
-            print("Generating twist table")
-            cls.twist_move = cls.make_twist_table()
-            print("Generating flip table")
-            cls.flip_move = cls.make_flip_table()
-            print("Generating udslice table")
-            cls.udslice_move = cls.make_udslice_table()
-
-            # ----------  Phase 2 move tables  ---------- #
-            print("Generating edge4 table")
-            cls.edge4_move = cls.make_edge4_table()
-            print("Generating edge8 table")
-            cls.edge8_move = cls.make_edge8_table()
-            print("Generating corner table")
-            cls.corner_move = cls.make_corner_table()
-
-            # ----------  Phase 1 pruning tables  ---------- #
-            print("Generating udslice twist prune table")
-            cls.udslice_twist_prune = cls.make_udslice_twist_prune()
-            print("Generating udslice flip prune table")
-            cls.udslice_flip_prune = cls.make_udslice_flip_prune()
-
-            # --------  Phase 2 pruning tables  ---------- #
-            print("Generating edge4 edge8 prune table")
-            cls.edge4_edge8_prune = cls.make_edge4_edge8_prune()
-            print("Generating edge4 corner prune table\n")
-            cls.edge4_corner_prune = cls.make_edge4_corner_prune()
-
-            tables = {
-                "twist_move": cls.twist_move,
-                "flip_move": cls.flip_move,
-                "udslice_move": cls.udslice_move,
-                "edge4_move": cls.edge4_move,
-                "edge8_move": cls.edge8_move,
-                "corner_move": cls.corner_move,
-                "udslice_twist_prune": cls.udslice_twist_prune.table,
-                "udslice_flip_prune": cls.udslice_flip_prune.table,
-                "edge4_edge8_prune": cls.edge4_edge8_prune.table,
-                "edge4_corner_prune": cls.edge4_corner_prune.table,
-            }
-            with open("tables.json", "w") as f:
-                json.dump(tables, f)
-
-        cls._tables_loaded = True
+        else:
+            rows, stride = cls.PRUNING_TABLES[name]
+            table = NibblePruningTable(stored, stride, rows * stride)
+
+        setattr(cls, name, table)
+        return table
+
+    @classmethod
+    def check_table(cls, name: str, stored: np.ndarray):
+        """
+        Raises `ValueError` if `stored` is not a valid stored form of the table `name`, e.g.
+        because it was generated with different settings.
+        """
+        if name in cls.MOVE_TABLES:
+            if stored.dtype != cls.MOVE_TABLES[name] or stored.shape[1:] != (18,):
+                raise ValueError(f"Table {name} has the wrong type or shape.")
+        elif name in cls.LOOKUP_TABLES:
+            dtype, shape = cls.LOOKUP_TABLES[name]
+            if stored.dtype != dtype or stored.shape != shape:
+                raise ValueError(f"Table {name} has the wrong type or shape.")
+        else:
+            rows, stride = cls.PRUNING_TABLES[name]
+            table_cls = (
+                Mod3PruningTable
+                if name in cls.SYMMETRIC_PRUNING_TABLES
+                else NibblePruningTable
+            )
+            table_cls(stored, stride, rows * stride)
+
+    @classmethod
+    def _get_tables(cls, packed: bool = True) -> dict[str, np.ndarray]:
+        tables = {}
+        for name in cls.table_names():
+            table = getattr(cls, name)
+            if isinstance(table, PruningTable):
+                tables[name] = table.table if packed else table.unpack()
+            else:
+                tables[name] = np.asarray(table)
+        return tables
+
+    @classmethod
+    def read_binary(cls, path: str):
+        """
+        Memory-maps the tables stored in the binary file at `path`.
+        """
+        cls.set_tables(read_tables(path, cls.VERSION))
+
+    @classmethod
+    def set_tables(cls, tables: dict[str, np.ndarray]):
+        """
+        Uses the stored tables in `tables`, as returned by `tablefile.read_tables`. Tables that
+        were already loaded are loaded again from `tables` when next accessed.
+        """
+        names = cls.table_names()
+        missing = [name for name in names if name not in tables]
+        if missing:
+            raise ValueError(f"Table file is missing {', '.join(missing)}.")
+        for name in names:
+            cls.check_table(name, tables[name])
+
+        cls._source = tables
+        for name in names:
+            setattr(cls, name, _LazyTable(name))
+
+    @classmethod
+    def write_binary(cls, path: str):
+        write_tables(path, cls._get_tables(), cls.VERSION)
+
+    @classmethod
+    def import_json(cls, path: str):
+        """
+        Loads the tables from a `tables.json` file written by older versions or `export_json`.
+        """
+        with open(path, "r") as f:
+            tables = json.load(f)
+
+        stored = {}
+        for name in cls.table_names():
+            if name in cls.PRUNING_TABLES:
+                rows, stride = cls.PRUNING_TABLES[name]
+                stored[name] = NibblePruningTable.pack(tables[name], stride).table
+            elif name in tables:
+                dtype = cls.MOVE_TABLES.get(name) or cls.LOOKUP_TABLES[name][0]
+                stored[name] = np.asarray(tables[name], dtype=dtype)
+            else:
+                # Files written by older versions lack the tables used to track the phase 2
+                # coordinates during phase 1
+                stored[name] = cls.make_table(name, stored)
+
+        # In those files, the corner move table only covers the phase 2 moves
+        if (stored["corner_move"] < 0).any():
+            stored["corner_move"] = cls.make_table("corner_move", stored)
+        cls.set_tables(stored)
+
+    @classmethod
+    def export_json(cls, path: str):
+        tables = {
+            name: table.tolist()
+            for name, table in cls._get_tables(packed=False).items()
+        }
+        with open(path, "w") as f:
+            json.dump(tables, f)
+
+    @classmethod
+    def make_table(cls, name: str, tables: dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Generates the table called `name` in the form it is stored in the table file, from the
+        tables it depends on (see `DEPENDENCIES`) in `tables`.
+        """
+        if name in cls.MOVE_TABLES:
+            table = getattr(cls, f"make_{name.removesuffix('_move')}_table")()
+            return np.asarray(table, dtype=cls.MOVE_TABLES[name])
+        if name in cls.LOOKUP_TABLES:
+            dtype, shape = cls.LOOKUP_TABLES[name]
+            return np.asarray(getattr(cls, f"make_{name}")(), dtype=dtype)
+        if name in cls.SYMMETRIC_PRUNING_TABLES:
+            dependencies = (tables[dependency] for dependency in cls.DEPENDENCIES[name])
+            return getattr(cls, f"make_{name}")(*dependencies).table
+
+        move_a, move_b = cls.PRUNING_MOVES[name]
+        rows, stride = cls.PRUNING_TABLES[name]
+        return cls.make_prune_table(tables[move_a], tables[move_b], stride).table
 
     @classmethod
     def make_twist_table(cls):
-        twist_move = [[0] * cls.MOVES for i in range(cls.TWIST)]
-        a = CubieCube()
-        for i in range(cls.TWIST):
-            a.phase_1_corner = i
-            for j in range(6):
-                for k in range(3):
-                    a.corner_multiply(MOVE_CUBE[j])
-                    twist_move[i][3 * j + k] = a.phase_1_corner
-                a.corner_multiply(MOVE_CUBE[j])
-        return twist_move
+        return ca.make_move_table(
+            cls.TWIST, ca.decode_twist, ca.encode_twist, corners=True, orientation=True
+        )
 
     @classmethod
     def make_flip_table(cls):
-        flip_move = [[0] * cls.MOVES for i in range(cls.FLIP)]
-        a = CubieCube()
-        for i in range(cls.FLIP):
-            a.phase_1_edge = i
-            for j in range(6):
-                for k in range(3):
-                    a.edge_multiply(MOVE_CUBE[j])
-                    flip_move[i][3 * j + k] = a.phase_1_edge
-                a.edge_multiply(MOVE_CUBE[j])
-        return flip_move
+        return ca.make_move_table(
+            cls.FLIP, ca.decode_flip, ca.encode_flip, corners=False, orientation=True
+        )
 
     @classmethod
     def make_udslice_table(cls):
-        udslice_move = [[0] * cls.MOVES for i in range(cls.UDSLICE)]
-        a = CubieCube()
-        for i in range(cls.UDSLICE):
-            a.phase_1_ud_slice = i
-            for j in range(6):
-                for k in range(3):
-                    a.edge_multiply(MOVE_CUBE[j])
-                    udslice_move[i][3 * j + k] = a.phase_1_ud_slice
-                a.edge_multiply(MOVE_CUBE[j])
-        return udslice_move
+        return ca.make_move_table(
+            cls.UDSLICE,
+            ca.decode_udslice,
+            ca.encode_udslice,
+            corners=False,
+            orientation=False,
+        )
 
     @classmethod
     def make_edge4_table(cls):
-        edge4_move = [[0] * cls.MOVES for i in range(cls.EDGE4)]
-        a = CubieCube()
-        for i in range(cls.EDGE4):
-            a.phase_2_ud_slice = i
-            for j in range(6):
-                for k in range(3):
-                    a.edge_multiply(MOVE_CUBE[j])
-                    if k % 2 == 0 and j % 3 != 0:
-                        edge4_move[i][3 * j + k] = -1
-                    else:
-                        edge4_move[i][3 * j + k] = a.phase_2_ud_slice
-                a.edge_multiply(MOVE_CUBE[j])
-        return edge4_move
+        return ca.make_move_table(
+            cls.EDGE4,
+            ca.decode_edge4,
+            ca.encode_edge4,
+            corners=False,
+            orientation=False,
+            phase_2=True,
+        )
 
     @classmethod
     def make_edge8_table(cls):
-        edge8_move = [[0] * cls.MOVES for i in range(cls.EDGE8)]
-        a = CubieCube()
-        for i in range(cls.EDGE8):
-            a.phase_2_edge = i
-            for j in range(6):
-                for k in range(3):
-                    a.edge_multiply(MOVE_CUBE[j])
-                    if k % 2 == 0 and j % 3 != 0:
-                        edge8_move[i][3 * j + k] = -1
-                    else:
-                        edge8_move[i][3 * j + k] = a.phase_2_edge
-                a.edge_multiply(MOVE_CUBE[j])
-        return edge8_move
+        return ca.make_move_table(
+            cls.EDGE8,
+            ca.decode_edge8,
+            ca.encode_edge8,
+            corners=False,
+            orientation=False,
+            phase_2=True,
+        )
 
     @classmethod
     def make_corner_table(cls):
-        corner_move = [[0] * cls.MOVES for i in range(cls.CORNER)]
-        a = CubieCube()
-        for i in range(cls.CORNER):
-            a.phase_2_corner = i
-            for j in range(6):
-                for k in range(3):
-                    a.corner_multiply(MOVE_CUBE[j])
-                    if k % 2 == 0 and j % 3 != 0:
-                        corner_move[i][3 * j + k] = -1
-                    else:
-                        corner_move[i][3 * j + k] = a.phase_2_corner
-                a.corner_multiply(MOVE_CUBE[j])
-        return corner_move
+        return ca.make_move_table(
+            cls.CORNER,
+            ca.decode_corner,
+            ca.encode_corner,
+            corners=True,
+            orientation=False,
+        )
 
     @classmethod
-    def make_udslice_twist_prune(cls):
-        udslice_twist_prune = [-1] * (cls.UDSLICE * cls.TWIST)
-        udslice_twist_prune[0] = 0
-        count, depth = 1, 0
-        while count < cls.UDSLICE * cls.TWIST:
-            for i in range(cls.UDSLICE * cls.TWIST):
-                if udslice_twist_prune[i] == depth:
-                    m = [
-                        cls.udslice_move[i // cls.TWIST][j] * cls.TWIST
-                        + cls.twist_move[i % cls.TWIST][j]
-                        for j in range(18)
-                    ]
-                    for x in m:
-                        if udslice_twist_prune[x] == -1:
-                            count += 1
-                            udslice_twist_prune[x] = depth + 1
+    def make_slice_sorted_table(cls):
+        return ca.make_move_table(
+            cls.SLICE_SORTED,
+            ca.decode_slice_sorted,
+            ca.encode_slice_sorted,
+            corners=False,
+            orientation=False,
+        )
+
+    @classmethod
+    def make_u_edges_table(cls):
+        return ca.make_move_table(
+            cls.U_EDGES,
+            ca.decode_u_edges,
+            ca.encode_u_edges,
+            corners=False,
+            orientation=False,
+        )
+
+    @classmethod
+    def make_d_edges_table(cls):
+        return ca.make_move_table(
+            cls.D_EDGES,
+            ca.decode_d_edges,
+            ca.encode_d_edges,
+            corners=False,
+            orientation=False,
+        )
+
+    @classmethod
+    def make_ud_edges_edge8(cls):
+        return ca.make_ud_edges_edge8()
+
+    @classmethod
+    def make_prune_table(cls, move_a, move_b, stride: int, chunk: int = 1 << 16):
+        """
+        Generates the pruning table for the coordinate pair (a, b), stored at index
+        `a * stride + b`, by a breadth-first search from the solved state.
+
+        Whole depth layers are expanded at once by gathering from the move tables. Once the
+        frontier is larger than the set of unvisited states, the search switches direction and
+        instead checks, for every unvisited state, whether one of its neighbours is on the
+        frontier.
+        """
+        move_a = np.asarray(move_a, dtype=np.int64)
+        move_b = np.asarray(move_b, dtype=np.int64)
+        size = move_a.shape[0] * stride
+        table = np.full(size, -1, dtype=np.int8)
+        table[0] = 0
+        depth = 0
+        frontier = np.array([0])
+        unvisited = size - 1
+
+        while len(frontier) > 0 and unvisited > 0:
+            if len(frontier) <= unvisited:
+                for start in range(0, len(frontier), chunk):
+                    index = frontier[start : start + chunk]
+                    a = move_a[index // stride]
+                    neighbours = a * stride + move_b[index % stride]
+                    # Moves that are not allowed in phase 2 are stored as -1
+                    neighbours = neighbours[a >= 0]
+                    neighbours = neighbours[table[neighbours] == -1]
+                    table[neighbours] = depth + 1
+            else:
+                candidates = np.flatnonzero(table == -1)
+                for start in range(0, len(candidates), chunk):
+                    index = candidates[start : start + chunk]
+                    a = move_a[index // stride]
+                    b = move_b[index % stride]
+                    neighbours = a * stride + b
+                    # Every allowed move has its inverse allowed too, so ignoring the -1 entries
+                    # leaves a symmetric graph and the reverse search finds the same layer
+                    found = ((table[neighbours] == depth) & (a >= 0)).any(axis=1)
+                    table[index[found]] = depth + 1
+
             depth += 1
-        return PruningTable(udslice_twist_prune, cls.TWIST)
+            frontier = np.flatnonzero(table == depth)
+            unvisited -= len(frontier)
+
+        # The depths never exceed 15, and the search kernels read them inline (see `_packing` in
+        # `kociembasolver`), which needs every depth stored in full
+        return NibblePruningTable.pack(table, stride)
+
+    @classmethod
+    def make_udslice_twist_prune(cls):
+        return cls.make_prune_table(cls.udslice_move, cls.twist_move, cls.TWIST)
 
     @classmethod
     def make_udslice_flip_prune(cls):
-        udslice_flip_prune = [-1] * (cls.UDSLICE * cls.FLIP)
-        udslice_flip_prune[0] = 0
-        count, depth = 1, 0
-        while count < cls.UDSLICE * cls.FLIP:
-            for i in range(cls.UDSLICE * cls.FLIP):
-                if udslice_flip_prune[i] == depth:
-                    m = [
-                        cls.udslice_move[i // cls.FLIP][j] * cls.FLIP
-                        + cls.flip_move[i % cls.FLIP][j]
-                        for j in range(18)
-                    ]
-                    for x in m:
-                        if udslice_flip_prune[x] == -1:
-                            count += 1
-                            udslice_flip_prune[x] = depth + 1
-            depth += 1
-        return PruningTable(udslice_flip_prune, cls.FLIP)
+        return cls.make_prune_table(cls.udslice_move, cls.flip_move, cls.FLIP)
 
     @classmethod
     def make_edge4_edge8_prune(cls):
-        edge4_edge8_prune = [-1] * (cls.EDGE4 * cls.EDGE8)
-        edge4_edge8_prune[0] = 0
-        count, depth = 1, 0
-        while count < cls.EDGE4 * cls.EDGE8:
-            for i in range(cls.EDGE4 * cls.EDGE8):
-                if edge4_edge8_prune[i] == depth:
-                    m = [
-                        cls.edge4_move[i // cls.EDGE8][j] * cls.EDGE8
-                        + cls.edge8_move[i % cls.EDGE8][j]
-                        for j in range(18)
-                    ]
-                    for x in m:
-                        if edge4_edge8_prune[x] == -1:
-                            count += 1
-                            edge4_edge8_prune[x] = depth + 1
-            depth += 1
-        return PruningTable(edge4_edge8_prune, cls.EDGE8)
+        return cls.make_prune_table(cls.edge4_move, cls.edge8_move, cls.EDGE8)
 
     @classmethod
     def make_edge4_corner_prune(cls):
-        edge4_corner_prune = [-1] * (cls.EDGE4 * cls.CORNER)
-        edge4_corner_prune[0] = 0
-        count, depth = 1, 0
-        while count < cls.EDGE4 * cls.CORNER:
-            for i in range(cls.EDGE4 * cls.CORNER):
-                if edge4_corner_prune[i] == depth:
-                    m = [
-                        cls.edge4_move[i // cls.CORNER][j] * cls.CORNER
-                        + cls.corner_move[i % cls.CORNER][j]
-                        for j in range(18)
-                    ]
-                    for x in m:
-                        if edge4_corner_prune[x] == -1:
-                            count += 1
-                            edge4_corner_prune[x] = depth + 1
-            depth += 1
-        return PruningTable(edge4_corner_prune, cls.CORNER)
+        return cls.make_prune_table(cls.edge4_move, cls.corner_move, cls.CORNER)
+
+    @classmethod
+    def make_corner_twist_prune(cls):
+        return cls.make_prune_table(cls.corner_move, cls.twist_move, cls.TWIST)
+
+    @classmethod
+    def make_slice_sorted_flip_prune(cls):
+        return cls.make_prune_table(cls.slice_sorted_move, cls.flip_move, cls.FLIP)
+
+    @classmethod
+    def make_u_edges_flip_prune(cls):
+        return cls.make_prune_table(cls.u_edges_move, cls.flip_move, cls.FLIP)
+
+    @classmethod
+    def make_flipslice_class(cls):
+        """
+        Generates the class of every flip and UD slice coordinate together with a symmetry
+        that conjugates it to the representative of its class, stored as `16 * class + sym`.
+        """
+        conjugates = sy.make_conjugation_table(sy.conjugate_flipslice, cls.FLIPSLICE)
+        classidx, sym = sy.make_classes(conjugates)
+        return classidx * sy.N_SYM + sym
+
+    @classmethod
+    def make_twist_conj(cls):
+        return sy.make_conjugation_table(sy.conjugate_twist, cls.TWIST).T
+
+    @classmethod
+    def make_flipslice_twist_prune(
+        cls, udslice_move, flip_move, twist_move, flipslice_class, twist_conj
+    ):
+        """
+        Generates the phase 1 pruning table for classes of the flip and UD slice coordinate and
+        the twist coordinate, which holds the exact number of moves needed to finish phase 1.
+        """
+        flipslice_class = np.asarray(flipslice_class, dtype=np.int64)
+        representatives = np.flatnonzero(flipslice_class % sy.N_SYM == 0)
+        stabilizers = sy.make_stabilizers(sy.conjugate_flipslice, representatives)
+
+        udslice_move = np.asarray(udslice_move, dtype=np.int64)
+        flip_move = np.asarray(flip_move, dtype=np.int64)
+        udslice, flip = np.divmod(representatives, cls.FLIP)
+        moved = flipslice_class[cls.FLIP * udslice_move[udslice] + flip_move[flip]]
+
+        table = sy.make_symmetric_prune_table(
+            moved // sy.N_SYM, moved % sy.N_SYM, stabilizers, twist_move, twist_conj
+        )
+        return Mod3PruningTable.pack(table, cls.TWIST)
+
+    @classmethod
+    def make_corner_class(cls):
+        """
+        Generates the class of every corner permutation together with a symmetry that
+        conjugates it to the representative of its class, stored as `16 * class + sym`.
+        """
+        conjugates = sy.make_conjugation_table(sy.conjugate_corner, cls.CORNER)
+        classidx, sym = sy.make_classes(conjugates)
+        return classidx * sy.N_SYM + sym
+
+    @classmethod
+    def make_edge8_conj(cls):
+        return sy.make_conjugation_table(sy.conjugate_edge8, cls.EDGE8).T
+
+    @classmethod
+    def make_corner_edge8_prune(cls, corner_move, edge8_move, corner_class, edge8_conj):
+        """
+        Generates the phase 2 pruning table for classes of the corner permutation and the
+        permutation of the U and D edges. It holds the exact number of phase 2 moves needed to
+        solve both, which ignores only the permutation of the UD slice edges.
+        """
+        corner_class = np.asarray(corner_class, dtype=np.int64)
+        representatives = np.flatnonzero(corner_class % sy.N_SYM == 0)
+        stabilizers = sy.make_stabilizers(sy.conjugate_corner, representatives)
+
+        # Only the entries of phase 2 moves are used by the search
+        moved = corner_class[np.asarray(corner_move, dtype=np.int64)[representatives]]
+
+        table = sy.make_symmetric_prune_table(
+            moved // sy.N_SYM,
+            moved % sy.N_SYM,
+            stabilizers,
+            edge8_move,
+            edge8_conj,
+            moves=ca.PHASE_2_MOVES,
+        )
+        return Mod3PruningTable.pack(table, cls.EDGE8)
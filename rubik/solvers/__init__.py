@@ -1,3 +1,8 @@
 from .kociembasolver import *
 from .solver import *
 from .kociembafastsolver import KociembaFastSolver
+from .optimalsolver import OptimalSolver
+from .batch import BatchResult, solve_many
+from .cache import SolutionCache
+from .store import SolutionStore
+from .pool import SolverPool
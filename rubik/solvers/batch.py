@@ -0,0 +1,110 @@
+"""
+Solving many cubes at once on a pool of worker processes.
+
+The cubes are handed out to the workers in chunks, which are taken from the input as workers
+become free, so the input can be a stream of any length. Every worker maps the tables once when
+it starts and solves every cube of every chunk with the same `SolverEngine`.
+"""
+
+from __future__ import annotations
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from itertools import islice
+from typing import Iterable, Iterator, NamedTuple
+from .kociembasolver import _engine, _pool
+from .solver import Solution
+
+
+class BatchResult(NamedTuple):
+    """The solution of one cube of a batch, or the error that kept it from being solved."""
+
+    index: int
+    cube: str
+    solution: Solution | None
+    error: str | None
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    items = iter(items)
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+
+def _solve_chunk(items: list[tuple[int, str]], options: dict) -> list[BatchResult]:
+    """
+    Solves every `(index, cube_str)` in `items`, usually in a worker process. An error only
+    fails the cube that caused it.
+    """
+    engine = _engine(options)
+    results = []
+    for index, cube_str in items:
+        try:
+            results.append(BatchResult(index, cube_str, engine.solve(cube_str), None))
+        except Exception as e:
+            results.append(
+                BatchResult(index, cube_str, None, str(e) or type(e).__name__)
+            )
+    return results
+
+
+def solve_many(
+    cube_strs: Iterable[str],
+    jobs: int | None = None,
+    chunk: int = 64,
+    ordered: bool = True,
+    **kwargs,
+) -> Iterator[BatchResult]:
+    """
+    Solves every cube string in `cube_strs` with a `SolverEngine`, which is created with
+    `kwargs`, and yields a `BatchResult` for each of them as soon as it is available.
+
+    :param jobs: The number of worker processes (default: the number of CPUs). With 1, the
+        cubes are solved in this process.
+    :param chunk: The number of cubes handed to a worker at once
+    :param ordered: Whether to yield the results in the order of `cube_strs`. Otherwise, they
+        are yielded as soon as they are solved.
+
+    Each cube is searched by a single process, so `orientations` and `split` search one
+    orientation or subtree after the other.
+    """
+    jobs = max(jobs or os.cpu_count() or 1, 1)
+    options = {**kwargs, "jobs": 1}
+    chunks = _chunks(enumerate(cube_strs), max(chunk, 1))
+
+    if jobs == 1:
+        for items in chunks:
+            yield from _solve_chunk(items, options)
+        return
+
+    pool = _pool(jobs)
+    # The chunk number of every running chunk, and the results of the chunks that are done
+    # but wait for an earlier one to be yielded
+    pending: dict[Future, int] = {}
+    finished: dict[int, list[BatchResult]] = {}
+    submitted = 0
+    next_chunk = 0
+    try:
+        while True:
+            # Keep one chunk queued for every worker on top of the running ones. Results that
+            # cannot be yielded yet count too, which bounds the memory they take.
+            free = max(2 * jobs - len(pending) - len(finished), 0)
+            for items in islice(chunks, free):
+                pending[pool.submit(_solve_chunk, items, options)] = submitted
+                submitted += 1
+            if not pending and not finished:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                number = pending.pop(future)
+                if ordered:
+                    finished[number] = future.result()
+                else:
+                    yield from future.result()
+
+            while next_chunk in finished:
+                yield from finished.pop(next_chunk)
+                next_chunk += 1
+    finally:
+        for future in pending:
+            future.cancel()
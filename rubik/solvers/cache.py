@@ -0,0 +1,76 @@
+"""
+Caching solutions of cubes that are equivalent under the symmetries of the cube.
+
+A cube that is rotated, mirrored or recolored is solved by the moves solving the original cube,
+turned or mirrored the same way. Solutions are therefore stored once for each class of
+equivalent cubes, in the orientation of the class's canonical form (see
+`symmetries.canonical_form`), and mapped to the orientation of every cube looked up.
+"""
+
+from __future__ import annotations
+from collections import OrderedDict
+from threading import Lock
+from rubik.cubes import CubieCube
+from rubik.cubes.cubiecube import MOVE_NAMES, SYM_INVERSE, SYM_MOVE
+from rubik.cubes.symmetries import canonical_form
+
+
+class SolutionCache:
+    """
+    A bounded cache of solutions, keyed by the canonical form of the cube they solve. Once it is
+    full, the least recently used solution is evicted. It can be shared between threads.
+
+    Only engines searching with the same options should share a cache, as a solution found
+    with one `max_length` may be too long for another.
+    """
+
+    def __init__(self, size: int = 4096):
+        """
+        :param size: The largest number of solutions to keep
+        """
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._solutions: OrderedDict[bytes, tuple[int, ...]] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._solutions)
+
+    def get(self, cube: CubieCube) -> list[str] | None:
+        """
+        Returns the moves solving `cube` if a cube equivalent to it has been solved, or None.
+        """
+        key, s = canonical_form(cube)
+        with self._lock:
+            moves = self._solutions.get(key)
+            if moves is None:
+                self.misses += 1
+                return None
+            self._solutions.move_to_end(key)
+            self.hits += 1
+
+        # The moves solve the canonical form, `S cube S^-1`, so their conjugates by `S^-1`
+        # solve the cube
+        conjugate = SYM_MOVE[SYM_INVERSE[s]]
+        return [MOVE_NAMES[conjugate[move]] for move in moves]
+
+    def put(self, cube: CubieCube, moves: list[str]):
+        """
+        Stores `moves`, which solve `cube`, evicting the least recently used solution if the
+        cache is full.
+        """
+        key, s = canonical_form(cube)
+        conjugate = SYM_MOVE[s]
+        moves = tuple(conjugate[MOVE_NAMES.index(move)] for move in moves)
+        with self._lock:
+            self._solutions[key] = moves
+            self._solutions.move_to_end(key)
+            while len(self._solutions) > self.size:
+                self._solutions.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._solutions.clear()
+            self.hits = 0
+            self.misses = 0
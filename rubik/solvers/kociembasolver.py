@@ -1,35 +1,308 @@
+from __future__ import annotations
 import numpy as np
+import mmap
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+from queue import Queue
+from threading import Thread, local
 from time import time
-from rubik.cubes import CoordCube
+from typing import Iterable, Iterator
+from rubik.cubes import CubieCube
 from rubik.cubes import Cube
 from rubik.cubes import Face
-from rubik.cubes import Tables
-from .solver import Solver
+from rubik.cubes import PruningTable, Tables
+from rubik.cubes import coordarrays as ca
+from rubik.cubes.cubiecube import MOVE_NAMES, SYM_INVERSE, SYM_MOVE
+from .cache import SolutionCache
+from .store import SolutionStore
+from .solver import Solution, Solver, to_cubie_cube
 import kociemba
 
 
-class KociembaSolver(Solver):
+# The number of orientations the cube can be searched in, see `_orient`
+ORIENTATIONS = 6
+
+
+def _orient(cube: CubieCube, orientation: int) -> CubieCube:
     """
-    A basic implementation of Herbert Kociemba's Two Phase algorithm. Further details, including
-    the rationale behind certain design decisions of this algorithm, can be found on Kociemba's
-    website (http://kociemba.org/cube.htm).
+    Returns the cube to search in orientation `orientation`: the cube rotated `orientation % 3`
+    times by 120° around the URF-DBL diagonal, which moves the UD axis onto each of the three
+    axes in turn, and inverted for orientations 3 to 5.
     """
+    cube = cube.conjugate(16 * (orientation % 3))
+    return cube.inverse() if orientation >= 3 else cube
 
-    def __init__(self, cube: Cube):
-        super().__init__(cube)
+
+def _unorient(moves: list[str], orientation: int) -> list[str]:
+    """
+    Maps the moves solving `_orient(cube, orientation)` back to moves solving `cube`.
+    """
+    numbers = [MOVE_NAMES.index(move) for move in moves]
+    if orientation >= 3:
+        # A solution of the inverse, inverted, leads from the solved cube to the cube
+        numbers = [3 * (move // 3) + 2 - move % 3 for move in reversed(numbers)]
+    s = SYM_INVERSE[16 * (orientation % 3)]
+    return [MOVE_NAMES[SYM_MOVE[s][move]] for move in numbers]
+
+
+def _packing(table: PruningTable) -> tuple[int, int]:
+    """
+    Returns the `(shift, mask)` with which the search kernels read entry `i` of `table` inline,
+    as `view[i >> shift] >> ((i & shift) << 2) & mask`. This only works for tables storing the
+    depth of every entry in one byte or half a byte, so others raise `TypeError`.
+    """
+    if table.BITS not in (4, 8):
+        raise TypeError(
+            f"The search cannot read the depths of a {type(table).__name__}."
+        )
+    return 8 // table.BITS - 1, (1 << table.BITS) - 1
+
+
+def _init_worker(path: str):
+    Tables.path = path
+    Tables.preload()
+
+
+# The engines of this thread by their options, which workers keep for every task they run
+_local = local()
+
+
+def _engine(options: dict) -> SolverEngine:
+    """
+    Returns the engine of this thread created with `options`, which is created on first use.
+    """
+    if not hasattr(_local, "engines"):
+        _local.engines = {}
+    key = tuple(sorted(options.items()))
+    if key not in _local.engines:
+        _local.engines[key] = SolverEngine(**options)
+    return _local.engines[key]
+
+
+def _search_orientation(
+    cube: CubieCube, orientation: int, options: dict, deadline: float | None
+) -> tuple[list[str], int]:
+    """
+    Searches `cube` in orientation `orientation`, usually in a worker process, and returns the
+    moves solving `cube` and the number of nodes visited.
+    """
+    engine = _engine(options)
+    engine._reset(_orient(cube, orientation), deadline)
+    engine._phase_1()
+    if not engine.moves:
+        raise RuntimeError("Unable to find solution.")
+    return _unorient(engine.moves, orientation), engine.nodes
+
+
+def _search_subtrees(
+    cube: CubieCube,
+    prefixes: list[tuple[int, ...]],
+    depth: int,
+    options: dict,
+    deadline: float | None,
+    bound_path: str,
+) -> tuple[list[str], int]:
+    """
+    Searches the phase 1 solutions of `depth` moves starting with each of `prefixes`, usually
+    in a worker process, and returns the best solution found (if any) and the number of nodes
+    visited. The solution length every worker must beat and whether the search is over are
+    shared through the file at `bound_path` (see `SolverEngine._search_split`).
+    """
+    engine = _engine(options)
+    engine._reset(cube, deadline)
+
+    try:
+        with open(bound_path, "r+b") as f:
+            engine.bound = mmap.mmap(f.fileno(), 2)
+    except FileNotFoundError:
+        # The solve has already ended
+        return [], 0
+
+    try:
+        for prefix in prefixes:
+            for n, move in enumerate(prefix):
+                engine._apply_phase_1_move(n, move)
+            if not engine._phase_1_depth(depth, len(prefix)):
+                break
+    finally:
+        engine.bound.close()
+        engine.bound = None
+    return engine.moves, engine.nodes
+
+
+# The worker pools used to search several orientations, by number of workers
+_pools: dict[int, ProcessPoolExecutor] = {}
+
+
+def _pool(jobs: int) -> ProcessPoolExecutor:
+    """
+    Returns a pool of `jobs` worker processes, which is started on first use and then kept for
+    later solves. The workers map the same table file, so they share one copy of the tables.
+    """
+    if jobs not in _pools:
+        _pools[jobs] = ProcessPoolExecutor(
+            jobs, initializer=_init_worker, initargs=(Tables.path,)
+        )
+    return _pools[jobs]
+
+
+def _make_successors(moves) -> list[tuple[int, ...]]:
+    """
+    Returns the moves among `moves` that may follow every move, and at index 18 the moves that
+    may start a sequence. A face is never turned twice in a row, and as turns of opposite faces
+    commute, they are only allowed in one order (U before D, R before L, F before B). Every
+    sequence of moves is therefore only searched in one canonical form.
+    """
+    successors = []
+    for previous in range(19):
+        face = previous // 3
+        successors.append(
+            tuple(
+                move
+                for move in moves
+                if previous == 18 or (move // 3 != face and move // 3 != face - 3)
+            )
+        )
+    return successors
+
+
+def _make_prefixes(length: int) -> list[tuple[int, ...]]:
+    """
+    Returns every sequence of `length` moves that the search may start with, i.e. the roots of
+    the subtrees a split search is divided into (18 for one move, 243 for two).
+    """
+    prefixes: list[tuple[int, ...]] = [()]
+    for i in range(length):
+        prefixes = [
+            (*prefix, move)
+            for prefix in prefixes
+            for move in SolverEngine.SUCCESSORS[prefix[-1] if prefix else 18]
+        ]
+    return prefixes
+
+
+class SolverEngine:
+    """
+    The search of Herbert Kociemba's Two Phase algorithm, without a cube of its own. An engine
+    holds the tables and the buffers of the search, and every solve only resets the state the
+    search starts from, so a long-lived engine can solve one cube after the other at no setup
+    cost. `KociembaSolver` wraps one for a single cube.
+
+    An engine runs one search at a time.
+    """
+
+    # The moves allowed in phase 2 (U*, D*, R2, L2, F2, B2)
+    PHASE_2_MOVES = (0, 1, 2, 4, 7, 9, 10, 11, 13, 16)
+    # The moves that may follow every move in each phase (see `_make_successors`)
+    SUCCESSORS = _make_successors(range(18))
+    PHASE_2_SUCCESSORS = _make_successors(PHASE_2_MOVES)
+
+    def __init__(
+        self,
+        search: str = "iterative",
+        max_length: int | None = None,
+        timeout: float | None = None,
+        orientations: int = 1,
+        split: int = 0,
+        jobs: int | None = None,
+        cache: SolutionCache | None = None,
+        store: SolutionStore | None = None,
+    ):
+        """
+        :param search: Either "iterative", to search with the iterative kernels, or
+            "recursive", to use the original recursive search. Both find the same solution.
+        :param max_length: If given, keep searching for shorter solutions until one with at
+            most this many moves is found
+        :param timeout: If given, keep searching for shorter solutions for this many seconds
+        :param orientations: The number of orientations to search the cube in, up to 6: the
+            cube with its UD axis turned to each of the three axes, and the inverse of each of
+            them (see `_orient`). The shortest solution found in any of them is returned.
+        :param split: If 1 or 2, split the phase 1 search into the subtrees starting with each
+            sequence of that many moves (18 or 243 of them) and search them in parallel. The
+            workers share the length of the best solution found, so they all prune with it, and
+            stop once a solution meeting `max_length` (or any solution, without `max_length`
+            and `timeout`) is found.
+        :param jobs: The number of worker processes to search the orientations or subtrees in
+            (default: one per orientation, up to the number of CPUs, or the number of CPUs for
+            a split search). With 1, they are searched one after the other in this process.
+        :param cache: If given, `solve` looks every cube up in it before searching, and stores
+            the solutions it finds in it
+        :param store: Like `cache`, but for the persistent store, which `solve` looks cubes
+            given as a `Cube` or a string up in before converting them
+
+        Without `max_length` and `timeout`, the first solution found is returned. Otherwise,
+        the search goes on through longer phase 1 solutions, each followed by a phase 2 search
+        that only looks for solutions shorter than the best one so far, until either limit is
+        reached or no shorter solution exists. The timeout only ends the search once a
+        solution has been found.
+        """
+        if search not in ("iterative", "recursive"):
+            raise ValueError(f"Unknown search {search}.")
+        if not 1 <= orientations <= ORIENTATIONS:
+            raise ValueError(f"Cannot search in {orientations} orientations.")
+        if split not in (0, 1, 2):
+            raise ValueError(f"Cannot split the search after {split} moves.")
+        if split and orientations > 1:
+            raise ValueError("Cannot split the search in several orientations.")
+
+        self.search = search
+        self.orientations = orientations
+        self.split = split
+        if jobs is None:
+            jobs = os.cpu_count() or 1
+            if not split:
+                jobs = min(orientations, jobs)
+        self.jobs = max(jobs, 1)
+        self.max_length = max_length
+        self.timeout = timeout
+        self.cache = cache
+        self.store = store
+        self.deadline: float | None = None
+        # When the search ends even without a solution, see `_expired`
+        self.expires: float | None = None
+        # Whether to go on after the first solution, which `iter_solutions` always does
+        self.keep_searching = max_length is not None or timeout is not None
+        # Set to end the search as soon as possible, keeping the best solution so far
+        self.cancelled = False
+        # Called whenever a shorter solution has been found
+        self.on_solution = None
+        # In the workers of a split search, the two bytes they share: the length of the best
+        # solution found by any of them, and whether the search is over (see `_search_split`)
+        self.bound: mmap.mmap | None = None
         self.max_moves_length = 29  # Upper bound of the kociemba algorithm
         self.moves = []
-        self.start = 0
-        self.end = 0
-        self.time_to_solve = 0
-        self.tables = Tables()
+        # The cube being searched
+        self.cubie_cube: CubieCube | None = None
 
-        self.face_cube = self.cube.to_face_cube()
-        self.cubie_cube = self.face_cube.to_cubie_cube()
-        self.coord_cube = CoordCube.from_cubie_cube(self.cubie_cube)
+        # Memoryviews of the move tables, which return plain ints when indexed by (coord, move)
+        self.twist_move = memoryview(Tables.twist_move)
+        self.flip_move = memoryview(Tables.flip_move)
+        self.udslice_move = memoryview(Tables.udslice_move)
+        self.edge4_move = memoryview(Tables.edge4_move)
+        self.edge8_move = memoryview(Tables.edge8_move)
+        self.corner_move = memoryview(Tables.corner_move)
+        self.slice_sorted_move = memoryview(Tables.slice_sorted_move)
+        self.u_edges_move = memoryview(Tables.u_edges_move)
+        self.d_edges_move = memoryview(Tables.d_edges_move)
+        self.ud_edges_edge8 = memoryview(Tables.ud_edges_edge8)
 
-        # Validate cube
-        self._validate_cube()
+        # The exact phase 1 distances and the phase 2 distances ignoring the UD slice edges, if
+        # they have been built
+        self.flipslice_twist_prune = (
+            Tables.flipslice_twist_prune if Tables.has_tables("phase1") else None
+        )
+        self.corner_edge8_prune = (
+            Tables.corner_edge8_prune if Tables.has_tables("phase2") else None
+        )
+        # Fail now rather than search with wrong distances if a table was replaced by one the
+        # kernels cannot read
+        if self.flipslice_twist_prune is None:
+            _packing(Tables.udslice_twist_prune)
+            _packing(Tables.udslice_flip_prune)
+        _packing(Tables.edge4_corner_prune)
+        _packing(Tables.edge4_edge8_prune)
 
         # `moves_face` stores the moves' face whereas `moves_turn` stores the moves' number of
         # quarter turns (i.e., 1 for clockwise, 2 for clockwise twice, and 3 for counterclockwise).
@@ -39,82 +312,406 @@ class KociembaSolver(Solver):
 
         # Coordinates needed for phase 1
         self.phase_1_corner = [0 for i in range(self.max_moves_length)]
-        self.phase_1_corner[0] = self.coord_cube.phase_1_corner
         self.phase_1_edge = [0 for i in range(self.max_moves_length)]
-        self.phase_1_edge[0] = self.coord_cube.phase_1_edge
         self.phase_1_ud_slice = [0 for i in range(self.max_moves_length)]
-        self.phase_1_ud_slice[0] = self.coord_cube.phase_1_ud_slice
 
         # Coordinates needed for phase 2
         self.phase_2_corner = [0 for i in range(self.max_moves_length)]
-        self.phase_2_corner[0] = self.coord_cube.phase_2_corner
         self.phase_2_edge = [0 for i in range(self.max_moves_length)]
-        self.phase_2_edge[0] = self.coord_cube.phase_2_edge
         self.phase_2_ud_slice = [0 for i in range(self.max_moves_length)]
-        self.phase_2_ud_slice[0] = self.coord_cube.phase_2_ud_slice
+
+        # The corner permutation (in `phase_2_corner`) and these edge coordinates are valid for
+        # all moves, so they are tracked during phase 1 too. When phase 1 ends, they give the
+        # phase 2 coordinates without replaying the moves (see `_phase_2`).
+        self.slice_sorted = [0 for i in range(self.max_moves_length)]
+        self.u_edges = [0 for i in range(self.max_moves_length)]
+        self.d_edges = [0 for i in range(self.max_moves_length)]
 
         # This stores the minimum number of moves required to complete phase 1 or 2 after n moves
         # and are derived from the pruning tables.
         self.phase_1_min_distance = [0 for i in range(self.max_moves_length)]
-        self.phase_1_min_distance[0] = self._phase_1_heuristic(0)
         self.phase_2_min_distance = [0 for i in range(self.max_moves_length)]
+        # The distances from `corner_edge8_prune`, which are needed to compute the next ones
+        self.phase_2_corner_edge8_distance = [0 for i in range(self.max_moves_length)]
 
         # Used for finding out which moves were calculated in phase 1 and phase 2
         self.phase_1_moves_index = 0
 
-    def solve(self):
-        if self.cube.is_solved():
-            print("The cube is already solved.")
+        # The number of nodes visited by the search, i.e. the number of moves tried
+        self.nodes = 0
+        # The moves that may be tried at every depth and the index of the next one to try, used
+        # by the iterative search
+        self.successors = [self.SUCCESSORS[18] for i in range(self.max_moves_length)]
+        self.next_move = [0 for i in range(self.max_moves_length)]
+
+    def solve(
+        self,
+        cube: Cube | CubieCube | str,
+        deadline: float | None = None,
+        keep_searching: bool | None = None,
+        expires: float | None = None,
+    ) -> Solution:
+        """
+        Returns a solution of `cube`, which is a `Cube`, its string or a `CubieCube`, and raises
+        `ValueError` if the cube cannot be solved. A `CubieCube` is assumed to be valid. The
+        search ends at `deadline` (default: after `timeout` seconds) as described in `__init__`.
+
+        :param keep_searching: Whether to keep searching for shorter solutions after the first
+            one until `deadline` (default: if `max_length` or `timeout` is given). If True, the
+            cache and the store are not looked up, as their solution may be longer than the one
+            the search finds, but they are given the new solution.
+        :param expires: When to give up on the search, which then ends with the best solution
+            found so far, or raises `TimeoutError` if there is none. The iterative search
+            checks it every few thousand nodes, the recursive one at every phase 2 search.
+            Searches in other processes (see `orientations` and `split`) are not stopped.
+        """
+        start = time()
+        if keep_searching is None:
+            keep_searching = self.max_length is not None or self.timeout is not None
+        lookup = not keep_searching
+        # The store is keyed by the cube string, so it is looked up before anything else
+        cube_str = str(cube).upper() if not isinstance(cube, CubieCube) else None
+        store = self.store if cube_str is not None else None
+        moves = store.get(cube_str) if store is not None and lookup else None
+
+        if moves is None:
+            if not isinstance(cube, CubieCube):
+                cube = to_cubie_cube(cube)
+            # A cached solution saves setting up the search as well
+            moves = self.cache.get(cube) if self.cache is not None and lookup else None
+            if moves is None:
+                self._reset(cube, self._deadline(start, deadline))
+                self.keep_searching = keep_searching
+                self.expires = expires
+                if not self._is_solved():
+                    self._search()
+                    if self.cache is not None:
+                        self.cache.put(cube, self.moves)
+                moves = self.moves
+            if store is not None:
+                store.put(cube_str, moves)
+
+        if moves is not self.moves:
+            self.moves = moves
+            self.nodes = 0
+        return Solution(list(moves), len(moves), time() - start)
+
+    def iter_solutions(
+        self, cube: Cube | CubieCube | str, deadline: float | None = None
+    ) -> Iterator[Solution]:
+        """
+        Yields every solution of `cube` shorter than the ones before it as soon as it is found.
+        The search ends at `deadline` (or after `timeout` seconds if no deadline is given), once
+        a solution of at most `max_length` moves is found, once no shorter solution exists, or
+        when the generator is closed.
+
+        The search runs in a background thread, so a solution is found while the caller is
+        still busy with the previous one.
+        """
+        start = time()
+        self._reset(cube, self._deadline(start, deadline))
+        if self._is_solved():
+            yield Solution([], 0, 0)
             return
+        self.keep_searching = True
 
-        self.start = time()
+        found: Queue[Solution | BaseException | None] = Queue()
+        self.on_solution = lambda: found.put(
+            Solution(list(self.moves), len(self.moves), time() - start)
+        )
 
-        # My implementation of Kocimeba
-        # We first run phase 1 and when it ends, phase 2 will automatically be called
-        self._phase_1()
+        def search():
+            try:
+                self._search()
+            except BaseException as e:
+                found.put(e)
+            finally:
+                found.put(None)
 
-        # Apply transformations gathered from the solver
-        for transformation in self.moves:
-            self.cube.transform(transformation)
+        thread = Thread(target=search, daemon=True)
+        thread.start()
+        try:
+            while (solution := found.get()) is not None:
+                if isinstance(solution, BaseException):
+                    raise solution
+                yield solution
+        finally:
+            self.cancelled = True
+            thread.join()
 
-        if not self.cube.is_solved():
-            raise RuntimeError("The cube could not be solved!")
+    def _deadline(self, start: float, deadline: float | None) -> float | None:
+        if deadline is None and self.timeout is not None:
+            return start + self.timeout
+        return deadline
 
-        self.end = time()
-        self.time_to_solve = round(self.end - self.start, 5)
+    def _reset(self, cube: Cube | CubieCube | str, deadline: float | None):
+        """
+        Prepares the search of `cube`, which ends at `deadline`. Only the state the search starts
+        from is set, the buffers are reused.
+        """
+        if not isinstance(cube, CubieCube):
+            cube = to_cubie_cube(cube)
+        self.moves = []
+        self.nodes = 0
+        self.deadline = deadline
+        self.expires = None
+        self.keep_searching = self.max_length is not None or self.timeout is not None
+        self.cancelled = False
+        self.on_solution = None
+        self._set_cube(cube)
 
-        print(
-            f"The solution requires {len(self.moves)} moves and took "
-            + f"{self.time_to_solve} seconds."
+    def _set_cube(self, cubie_cube: CubieCube):
+        """
+        Sets the state the search starts from to `cubie_cube`.
+        """
+        self.cubie_cube = cubie_cube
+
+        self.phase_1_corner[0] = cubie_cube.phase_1_corner
+        self.phase_1_edge[0] = cubie_cube.phase_1_edge
+        self.phase_1_ud_slice[0] = cubie_cube.phase_1_ud_slice
+        self.phase_2_corner[0] = cubie_cube.phase_2_corner
+        self.phase_2_edge[0] = cubie_cube.phase_2_edge
+        self.phase_2_ud_slice[0] = cubie_cube.phase_2_ud_slice
+
+        edges = np.array([cubie_cube.edge_permutations])
+        self.slice_sorted[0] = int(ca.encode_slice_sorted(edges)[0])
+        self.u_edges[0] = int(ca.encode_u_edges(edges)[0])
+        self.d_edges[0] = int(ca.encode_d_edges(edges)[0])
+
+        self.phase_1_min_distance[0] = self._phase_1_heuristic(0)
+
+    def _is_solved(self) -> bool:
+        """
+        Returns whether the cube the search starts from is solved, i.e. all its coordinates are 0.
+        """
+        return not (
+            self.phase_1_corner[0]
+            or self.phase_1_edge[0]
+            or self.phase_1_ud_slice[0]
+            or self.phase_2_corner[0]
+            or self.phase_2_edge[0]
+            or self.phase_2_ud_slice[0]
         )
-        print(" ".join(self.moves))
 
-        # Determine which moves were calculated in phase 1 and phase 2
-        # phase_1_moves = " ".join(self.moves[:self.phase_1_moves_index])
-        # phase_2_moves = " ".join(self.moves[self.phase_1_moves_index:])
-        # print(f"\nPhase 1 Moves: {phase_1_moves}")
-        # print(f"Phase 2 Moves: {phase_2_moves}")
+    def _search(self):
+        """
+        Runs the search, in every orientation if there are several, or split into subtrees.
+        """
+        if self.split:
+            self._search_split()
+        elif self.orientations > 1:
+            self._run_tasks(
+                _search_orientation,
+                [
+                    (
+                        self.cubie_cube,
+                        orientation,
+                        self._worker_options(),
+                        self.deadline,
+                    )
+                    for orientation in range(self.orientations)
+                ],
+                wait_all=not self.keep_searching,
+            )
+        else:
+            self._phase_1()
+
+        if not self.moves:
+            raise RuntimeError("Unable to find solution.")
+
+    def _worker_options(self) -> dict:
+        options = {"search": self.search, "max_length": self.max_length}
+        if self.keep_searching:
+            # The deadline is passed on separately, this only keeps the workers searching
+            options["timeout"] = float("inf")
+        return options
+
+    def _search_split(self):
+        """
+        Searches the subtrees starting with every sequence of `split` moves in parallel. Each
+        task searches a few subtrees for phase 1 solutions of one length, and the tasks are
+        queued by length, so the phase 1 solutions are searched in about the same order as
+        without splitting. Phase 1 solutions shorter than `split` are searched as a whole.
+
+        The workers share two bytes through a memory-mapped file: the length of the best
+        solution found so far, which they all prune with, and a flag that is set once the search
+        is over. Its path is passed to every task, so the pool can be reused between solves.
+        """
+        fd, path = tempfile.mkstemp(prefix="rubik-bound-")
+        try:
+            os.write(fd, bytes([self.max_moves_length, 0]))
+            bound = mmap.mmap(fd, 2)
+            options = self._worker_options()
+            prefixes = _make_prefixes(self.split)
+            # About four tasks per worker and length, so that they take turns evenly without
+            # too many tasks for the shorter lengths
+            chunks = [prefixes[i :: 4 * self.jobs] for i in range(4 * self.jobs)]
+            chunks = [chunk for chunk in chunks if chunk]
+
+            def tasks():
+                for depth in range(self.max_moves_length):
+                    if self._finished() or depth >= min(self._best_length(), bound[0]):
+                        return
+                    for chunk in chunks if depth >= self.split else [[()]]:
+                        yield self.cubie_cube, chunk, depth, options, self.deadline, path
+
+            try:
+                self._run_tasks(_search_subtrees, tasks(), wait_all=False)
+            finally:
+                # Stop the workers that are still searching
+                bound[1] = 1
+                bound.close()
+        finally:
+            os.close(fd)
+            os.unlink(path)
+
+    def _run_tasks(self, fn, tasks: Iterable[tuple], wait_all: bool):
+        """
+        Runs `fn(*args)` for every `args` in `tasks` on the worker pool, and records the
+        solutions they return. Tasks are taken from `tasks` as workers become free. Unless
+        `wait_all` is set, this returns as soon as the search is finished (see `_finished`).
+        """
+        tasks = iter(tasks)
+        if self.jobs == 1:
+            for args in tasks:
+                self._add_solution(*fn(*args))
+                if self.cancelled or (not wait_all and self._finished()):
+                    break
+            return
+
+        pool = _pool(self.jobs)
+        pending: set[Future] = set()
+        try:
+            while True:
+                # Keep one task queued for every worker on top of the running ones
+                for args in islice(tasks, 2 * self.jobs - len(pending)):
+                    pending.add(pool.submit(fn, *args))
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._add_solution(*future.result())
+                if self.cancelled or (not wait_all and self._finished()):
+                    break
+        finally:
+            # Tasks that have already started run until their own limits
+            for future in pending:
+                future.cancel()
+
+    def _add_solution(self, moves: list[str], nodes: int):
+        """
+        Records a solution found by a worker if it is the shortest so far.
+        """
+        self.nodes += nodes
+        if moves and (not self.moves or len(moves) < len(self.moves)):
+            self.moves = moves
+            if self.on_solution is not None:
+                self.on_solution()
 
     def _phase_1(self):
         for depth in range(self.max_moves_length):
-            length = self._phase_1_search(0, depth)
-            if length >= 0:
-                self.moves = self._generate_moves(length)
-                return
+            if not self._phase_1_depth(depth):
+                break
 
-        raise RuntimeError("Unable to find solution.")
+    def _phase_1_depth(self, depth: int, start: int = 0) -> bool:
+        """
+        Searches for phase 1 solutions of `depth` moves, each followed by a phase 2 search. The
+        first `start` moves must have been made already (see `_apply_phase_1_move`). Returns
+        whether longer phase 1 solutions are worth searching.
+        """
+        # Phase 1 solutions at least as long as the best solution cannot improve on it
+        if self._finished() or depth >= self._best_length():
+            return False
+
+        if self.search == "iterative":
+            self._phase_1_iterative(depth, start)
+        else:
+            self._phase_1_search(start, depth - start)
+        return True
+
+    def _best_length(self) -> int:
+        """
+        Returns the length of the best solution found so far, including those found by the
+        other workers of a split search.
+        """
+        best = len(self.moves) if self.moves else self.max_moves_length
+        if self.bound is not None:
+            best = min(best, self.bound[0])
+        return best
+
+    def _finished(self) -> bool:
+        """
+        Returns whether the search can stop with the best solution found so far.
+        """
+        if self.bound is not None and self.bound[1]:
+            return True
+        if not self.moves:
+            return False
+        if self.cancelled or not self.keep_searching:
+            return True
+        if self.max_length is not None and len(self.moves) <= self.max_length:
+            return True
+        return self.deadline is not None and time() >= self.deadline
+
+    def _expired(self) -> bool:
+        """
+        Returns whether the search has run past `expires`, which cancels it. Raises
+        `TimeoutError` if no solution has been found by then.
+        """
+        if self.expires is None or time() < self.expires:
+            return False
+        if not self.moves:
+            raise TimeoutError("The cube could not be solved in time.")
+        self.cancelled = True
+        return True
+
+    def _share_solution(self):
+        """
+        Tells the other workers of a split search about the solution just found, and ends the
+        search for all of them if it is good enough.
+        """
+        self.bound[0] = min(self.bound[0], len(self.moves))
+        if not self.keep_searching or (
+            self.max_length is not None and len(self.moves) <= self.max_length
+        ):
+            self.bound[1] = 1
+
+    def _apply_phase_1_move(self, n: int, move: int):
+        """
+        Makes `move` the `n`th move of the phase 1 search and updates the coordinates after it.
+        """
+        self.moves_face[n] = move // 3
+        self.moves_turn[n] = move % 3 + 1
+        self.phase_1_corner[n + 1] = self.twist_move[self.phase_1_corner[n], move]
+        self.phase_1_edge[n + 1] = self.flip_move[self.phase_1_edge[n], move]
+        self.phase_1_ud_slice[n + 1] = self.udslice_move[self.phase_1_ud_slice[n], move]
+        self.phase_2_corner[n + 1] = self.corner_move[self.phase_2_corner[n], move]
+        self.slice_sorted[n + 1] = self.slice_sorted_move[self.slice_sorted[n], move]
+        self.u_edges[n + 1] = self.u_edges_move[self.u_edges[n], move]
+        self.d_edges[n + 1] = self.d_edges_move[self.d_edges[n], move]
+        self.phase_1_min_distance[n + 1] = self._phase_1_heuristic(n + 1)
 
     def _phase_1_heuristic(self, i: int) -> int:
         """
-        This heuristic returns a lower bound on the number of moves to reach phase 2.
+        This heuristic returns a lower bound on the number of moves to reach phase 2. If the
+        flip-slice and twist table has been built, it returns the exact number instead.
         """
+        if self.flipslice_twist_prune is not None:
+            x = (
+                Tables.FLIP * self.phase_1_ud_slice[i] + self.phase_1_edge[i],
+                self.phase_1_corner[i],
+            )
+            # The table stores distances modulo 3, which only determine the distance given that
+            # of the previous state
+            previous = self.phase_1_min_distance[i - 1] if i > 0 else None
+            return self.flipslice_twist_prune.distance(x, previous)
+
         return max(
-            self.tables.udslice_twist_prune[
+            Tables.udslice_twist_prune[
                 self.phase_1_ud_slice[i], self.phase_1_corner[i]
             ],
-            self.tables.udslice_flip_prune[
-                self.phase_1_ud_slice[i], self.phase_1_edge[i]
-            ],
+            Tables.udslice_flip_prune[self.phase_1_ud_slice[i], self.phase_1_edge[i]],
         )
 
     def _phase_1_search(self, n: int, depth: int) -> int:
@@ -122,60 +719,87 @@ class KociembaSolver(Solver):
         An implementation of the IDA* search algorithm, which is used to find the minimum number
         of moves to reduce the corner and edge orientation coordinates to 0 and the ud slice
         coordinate to 0 (i.e. the precondition to move on to phase 2).
+
+        Only phase 1 solutions of exactly `n + depth` moves are passed on to phase 2, and none
+        that end in a phase 2 move, as those are a shorter phase 1 solution followed by the
+        start of a phase 2 solution. Returns the length of the solution once the search is
+        finished (see `_finished`), or -1 to carry on.
         """
         # If the estimated distance to complete phase 1 is 0, then we move on to phase 2
-        if self.phase_1_min_distance[n] == 0:
-            # Move to phase 2
-            self.phase_1_moves_index = n
-            return self._phase_2(n)
+        if depth == 0:
+            if self.phase_1_min_distance[n] == 0 and (
+                n == 0 or self.phase_1_min_distance[n - 1] != 0
+            ):
+                # Move to phase 2
+                self.phase_1_moves_index = n
+                return self._phase_2(n)
         elif self.phase_1_min_distance[n] <= depth:
-            # The range 0...5 represents the 6 main moves (U, R, F, D, L, B) in that order
-            for i in range(6):
-                # We don't want to turn the same and opposite face on consecutive moves
-                if n > 0 and self.moves_face[n - 1] in (i, i + 3):
-                    continue
-
-                # 1 => Clockwise, 2 => Clockwise twice, 3 => Counterclockwise
-                for j in range(1, 4):
-                    self.moves_face[n] = i
-                    self.moves_turn[n] = j
-                    move_num = 3 * i + j - 1
-
-                    # Update phase 1 coordinates using tables and heuristic
-                    self.phase_1_corner[n + 1] = self.tables.twist_move[
-                        self.phase_1_corner[n]
-                    ][move_num]
-                    self.phase_1_edge[n + 1] = self.tables.flip_move[
-                        self.phase_1_edge[n]
-                    ][move_num]
-                    self.phase_1_ud_slice[n + 1] = self.tables.udslice_move[
-                        self.phase_1_ud_slice[n]
-                    ][move_num]
-                    self.phase_1_min_distance[n + 1] = self._phase_1_heuristic(n + 1)
-
-                    # Start search from next node
-                    next = self._phase_1_search(n + 1, depth - 1)
-                    if next >= 0:
-                        return next
+            # Moves 0...17 are the 6 main moves (U, R, F, D, L, B) in that order, each turned
+            # clockwise, clockwise twice and counterclockwise
+            for move_num in self.SUCCESSORS[self._previous_move(n)]:
+                self.moves_face[n] = move_num // 3
+                self.moves_turn[n] = move_num % 3 + 1
+                self.nodes += 1
+
+                # Update phase 1 coordinates using tables and heuristic
+                self.phase_1_corner[n + 1] = self.twist_move[
+                    self.phase_1_corner[n], move_num
+                ]
+                self.phase_1_edge[n + 1] = self.flip_move[
+                    self.phase_1_edge[n], move_num
+                ]
+                self.phase_1_ud_slice[n + 1] = self.udslice_move[
+                    self.phase_1_ud_slice[n], move_num
+                ]
+                self.phase_2_corner[n + 1] = self.corner_move[
+                    self.phase_2_corner[n], move_num
+                ]
+                self.slice_sorted[n + 1] = self.slice_sorted_move[
+                    self.slice_sorted[n], move_num
+                ]
+                self.u_edges[n + 1] = self.u_edges_move[self.u_edges[n], move_num]
+                self.d_edges[n + 1] = self.d_edges_move[self.d_edges[n], move_num]
+                self.phase_1_min_distance[n + 1] = self._phase_1_heuristic(n + 1)
+
+                # Start search from next node
+                next = self._phase_1_search(n + 1, depth - 1)
+                if next >= 0:
+                    return next
 
         # Unable to find an adequate solution at this depth
         return -1
 
     def _phase_2(self, n: int) -> int:
-        # Perform all the moves that we have done in phase 1 to the cubie cube
-        for i in range(n):
-            for j in range(self.moves_turn[i]):
-                self.cubie_cube.move(self.moves_face[i])
-
-        self.phase_2_corner[n] = self.cubie_cube.phase_2_corner
-        self.phase_2_edge[n] = self.cubie_cube.phase_2_edge
-        self.phase_2_ud_slice[n] = self.cubie_cube.phase_2_ud_slice
+        """
+        Searches for the shortest phase 2 solution that makes the whole solution shorter than
+        the best one so far. Returns the length of the solution once the search is finished,
+        or -1 to carry on with phase 1.
+        """
+        if self._expired() or self._finished():
+            return len(self.moves)
+
+        # The corner permutation has been tracked in `phase_2_corner` and now that the UD slice
+        # edges are in the slice, `slice_sorted` is their permutation
+        self.phase_2_edge[n] = self.ud_edges_edge8[
+            self.u_edges[n], self.d_edges[n] % 24
+        ]
+        self.phase_2_ud_slice[n] = self.slice_sorted[n]
         self.phase_2_min_distance[n] = self._phase_2_heuristic(n)
 
-        for depth in range(self.max_moves_length - n):
-            length = self._phase_2_search(n, depth)
+        for depth in range(self._best_length() - n):
+            if self.search == "iterative":
+                length = self._phase_2_iterative(n, depth)
+            else:
+                length = self._phase_2_search(n, depth)
             if length >= 0:
-                return length
+                self.moves = self._generate_moves(length)
+                if self.on_solution is not None:
+                    self.on_solution()
+                if self.bound is not None:
+                    self._share_solution()
+                return length if self._finished() else -1
+            if self.cancelled and self.moves:
+                return len(self.moves)
 
         return -1
 
@@ -183,55 +807,262 @@ class KociembaSolver(Solver):
         """
         This heuristic returns a lower bound on the number of moves to solve the cube.
         """
-        return max(
-            self.tables.edge4_corner_prune[
-                self.phase_2_ud_slice[i], self.phase_2_corner[i]
-            ],
-            self.tables.edge4_edge8_prune[
-                self.phase_2_ud_slice[i], self.phase_2_edge[i]
-            ],
+        distance = max(
+            Tables.edge4_corner_prune[self.phase_2_ud_slice[i], self.phase_2_corner[i]],
+            Tables.edge4_edge8_prune[self.phase_2_ud_slice[i], self.phase_2_edge[i]],
         )
 
+        if self.corner_edge8_prune is not None:
+            # As in phase 1, the distance follows from that of the previous state, except at
+            # the start of phase 2
+            previous = (
+                self.phase_2_corner_edge8_distance[i - 1]
+                if i > self.phase_1_moves_index
+                else None
+            )
+            self.phase_2_corner_edge8_distance[i] = self.corner_edge8_prune.distance(
+                (self.phase_2_corner[i], self.phase_2_edge[i]), previous
+            )
+            distance = max(distance, self.phase_2_corner_edge8_distance[i])
+
+        return distance
+
     def _phase_2_search(self, n: int, depth: int) -> int:
         # If the estimated distance to complete phase 2 is 0, then we return the
         # current depth, `n`
         if self.phase_2_min_distance[n] == 0:
             return n
         elif self.phase_2_min_distance[n] <= depth:
-            # The range 0...5 represents the 6 main moves (U, R, F, D, L, B) in that order
-            for i in range(6):
-                # We don't want to turn the same and opposite face on consecutive moves
-                if n > 0 and self.moves_face[n - 1] in (i, i + 3):
-                    continue
-
-                # 1 => Clockwise, 2 => Clockwise twice, 3 => Counterclockwise
-                for j in range(1, 4):
-                    # We limit moves to U*, D*, R2, L2, F2, B2
-                    if i in (1, 2, 4, 5) and j != 2:
-                        continue
-
-                    self.moves_face[n] = i
-                    self.moves_turn[n] = j
-
-                    move_num = 3 * i + j - 1
-
-                    # Update phase 2 coordinates using tables and heuristic
-                    self.phase_2_corner[n + 1] = self.tables.corner_move[
-                        self.phase_2_corner[n]
-                    ][move_num]
-                    self.phase_2_edge[n + 1] = self.tables.edge8_move[
-                        self.phase_2_edge[n]
-                    ][move_num]
-                    self.phase_2_ud_slice[n + 1] = self.tables.edge4_move[
-                        self.phase_2_ud_slice[n]
-                    ][move_num]
-                    self.phase_2_min_distance[n + 1] = self._phase_2_heuristic(n + 1)
-
-                    # Start search from next node
-                    next = self._phase_2_search(n + 1, depth - 1)
-                    if next >= 0:
-                        return next
+            # We limit moves to U*, D*, R2, L2, F2, B2
+            for move_num in self.PHASE_2_SUCCESSORS[self._previous_move(n)]:
+                self.moves_face[n] = move_num // 3
+                self.moves_turn[n] = move_num % 3 + 1
+                self.nodes += 1
+
+                # Update phase 2 coordinates using tables and heuristic
+                self.phase_2_corner[n + 1] = self.corner_move[
+                    self.phase_2_corner[n], move_num
+                ]
+                self.phase_2_edge[n + 1] = self.edge8_move[
+                    self.phase_2_edge[n], move_num
+                ]
+                self.phase_2_ud_slice[n + 1] = self.edge4_move[
+                    self.phase_2_ud_slice[n], move_num
+                ]
+                self.phase_2_min_distance[n + 1] = self._phase_2_heuristic(n + 1)
+
+                # Start search from next node
+                next = self._phase_2_search(n + 1, depth - 1)
+                if next >= 0:
+                    return next
+
+        return -1
+
+    def _previous_move(self, n: int) -> int:
+        """
+        Returns the move made before the `n`th one, or 18 if there is none.
+        """
+        if n == 0:
+            return 18
+        return 3 * self.moves_face[n - 1] + self.moves_turn[n - 1] - 1
+
+    def _phase_1_iterative(self, depth: int, start: int = 0) -> int:
+        """
+        Does the same search as `_phase_1_search(start, depth - start)` without recursion. The
+        path is kept in the preallocated coordinate lists, `successors` and `next_move` record
+        the moves left to try at every depth, and all tables are bound to local variables and
+        indexed inline.
+        """
+        distance = self.phase_1_min_distance
+        if distance[start] > depth - start:
+            return -1
+        elif depth == start:
+            if distance[start] != 0 or (start > 0 and distance[start - 1] == 0):
+                return -1
+            self.phase_1_moves_index = start
+            return self._phase_2(start)
+
+        twist_move = self.twist_move
+        flip_move = self.flip_move
+        udslice_move = self.udslice_move
+        corner_move = self.corner_move
+        slice_sorted_move = self.slice_sorted_move
+        u_edges_move = self.u_edges_move
+        d_edges_move = self.d_edges_move
+        corner = self.phase_1_corner
+        edge = self.phase_1_edge
+        ud_slice = self.phase_1_ud_slice
+        corner_perm = self.phase_2_corner
+        slice_sorted = self.slice_sorted
+        u_edges = self.u_edges
+        d_edges = self.d_edges
+        faces = self.moves_face
+        turns = self.moves_turn
+        successors = self.successors
+        next_move = self.next_move
+        all_successors = self.SUCCESSORS
+
+        exact = self.flipslice_twist_prune
+        if exact is not None:
+            classes = memoryview(exact.classes)
+            conj = memoryview(exact.conj)
+            exact_view = memoryview(exact.table)
+            exact_stride = exact.stride
+            flip_count = Tables.FLIP
+        else:
+            twist_prune = Tables.udslice_twist_prune
+            flip_prune = Tables.udslice_flip_prune
+            twist_view = memoryview(twist_prune.table)
+            flip_view = memoryview(flip_prune.table)
+            twist_stride = twist_prune.stride
+            flip_stride = flip_prune.stride
+            shift, mask = _packing(twist_prune)
+
+        nodes = 0
+        n = start
+        successors[n] = all_successors[self._previous_move(n)]
+        next_move[n] = 0
+        while n >= start:
+            moves = successors[n]
+            k = next_move[n]
+            if k == len(moves):
+                n -= 1
+                continue
+
+            next_move[n] = k + 1
+            move = moves[k]
+            face = move // 3
+            faces[n] = face
+            turns[n] = move - 3 * face + 1
+            nodes += 1
+            if not nodes & 4095 and self._expired():
+                break
+
+            c = corner[n + 1] = twist_move[corner[n], move]
+            e = edge[n + 1] = flip_move[edge[n], move]
+            u = ud_slice[n + 1] = udslice_move[ud_slice[n], move]
+            corner_perm[n + 1] = corner_move[corner_perm[n], move]
+            slice_sorted[n + 1] = slice_sorted_move[slice_sorted[n], move]
+            u_edges[n + 1] = u_edges_move[u_edges[n], move]
+            d_edges[n + 1] = d_edges_move[d_edges[n], move]
+
+            if exact is not None:
+                x = classes[flip_count * u + e]
+                i = (x >> 4) * exact_stride + conj[c, x & 15]
+                d = distance[n]
+                d += ((exact_view[i >> 2] >> ((i & 3) << 1) & 3) - d + 1) % 3 - 1
+            else:
+                i = u * twist_stride + c
+                d = twist_view[i >> shift] >> ((i & shift) << 2) & mask
+                i = u * flip_stride + e
+                d2 = flip_view[i >> shift] >> ((i & shift) << 2) & mask
+                if d2 > d:
+                    d = d2
+            distance[n + 1] = d
+
+            if d < depth - n:
+                if n + 1 < depth:
+                    n += 1
+                    successors[n] = all_successors[move]
+                    next_move[n] = 0
+                elif distance[n] != 0:
+                    self.phase_1_moves_index = n + 1
+                    length = self._phase_2(n + 1)
+                    if length >= 0:
+                        self.nodes += nodes
+                        return length
+
+        self.nodes += nodes
+        return -1
+
+    def _phase_2_iterative(self, start: int, depth: int) -> int:
+        """
+        Does the same search as `_phase_2_search(start, depth)` without recursion, like
+        `_phase_1_iterative`.
+        """
+        distance = self.phase_2_min_distance
+        if distance[start] == 0:
+            return start
+        elif distance[start] > depth:
+            return -1
+
+        corner_move = self.corner_move
+        edge8_move = self.edge8_move
+        edge4_move = self.edge4_move
+        corner = self.phase_2_corner
+        edge = self.phase_2_edge
+        ud_slice = self.phase_2_ud_slice
+        faces = self.moves_face
+        turns = self.moves_turn
+        successors = self.successors
+        next_move = self.next_move
+        all_successors = self.PHASE_2_SUCCESSORS
+
+        corner_prune = Tables.edge4_corner_prune
+        edge_prune = Tables.edge4_edge8_prune
+        corner_view = memoryview(corner_prune.table)
+        edge_view = memoryview(edge_prune.table)
+        corner_stride = corner_prune.stride
+        edge_stride = edge_prune.stride
+        shift, mask = _packing(corner_prune)
+
+        exact = self.corner_edge8_prune
+        if exact is not None:
+            exact_distance = self.phase_2_corner_edge8_distance
+            classes = memoryview(exact.classes)
+            conj = memoryview(exact.conj)
+            exact_view = memoryview(exact.table)
+            exact_stride = exact.stride
 
+        nodes = 0
+        n = start
+        successors[n] = all_successors[self._previous_move(n)]
+        next_move[n] = 0
+        while n >= start:
+            moves = successors[n]
+            k = next_move[n]
+            if k == len(moves):
+                n -= 1
+                continue
+
+            next_move[n] = k + 1
+            move = moves[k]
+            face = move // 3
+            faces[n] = face
+            turns[n] = move - 3 * face + 1
+            nodes += 1
+            if not nodes & 4095 and self._expired():
+                break
+
+            c = corner[n + 1] = corner_move[corner[n], move]
+            e = edge[n + 1] = edge8_move[edge[n], move]
+            u = ud_slice[n + 1] = edge4_move[ud_slice[n], move]
+
+            i = u * corner_stride + c
+            d = corner_view[i >> shift] >> ((i & shift) << 2) & mask
+            i = u * edge_stride + e
+            d2 = edge_view[i >> shift] >> ((i & shift) << 2) & mask
+            if d2 > d:
+                d = d2
+            if exact is not None:
+                x = classes[c]
+                i = (x >> 4) * exact_stride + conj[e, x & 15]
+                d2 = exact_distance[n]
+                d2 += ((exact_view[i >> 2] >> ((i & 3) << 1) & 3) - d2 + 1) % 3 - 1
+                exact_distance[n + 1] = d2
+                if d2 > d:
+                    d = d2
+            distance[n + 1] = d
+
+            if d == 0:
+                self.nodes += nodes
+                return n + 1
+            elif d < depth - (n - start):
+                n += 1
+                successors[n] = all_successors[move]
+                next_move[n] = 0
+
+        self.nodes += nodes
         return -1
 
     def _generate_moves(self, length: int):
@@ -250,33 +1081,105 @@ class KociembaSolver(Solver):
             map(recover_move, zip(self.moves_face[:length], self.moves_turn[:length]))
         )
 
-    def _validate_cube(self):
-        count = [0 for i in range(6)]
 
-        for char in self.cube.face_str():
-            count[Face[char]] += 1
+class KociembaSolver(Solver):
+    """
+    A basic implementation of Herbert Kociemba's Two Phase algorithm. Further details, including
+    the rationale behind certain design decisions of this algorithm, can be found on Kociemba's
+    website (http://kociemba.org/cube.htm).
+
+    The search itself is done by a `SolverEngine`, which can also be kept to solve many cubes.
+    """
+
+    PHASE_2_MOVES = SolverEngine.PHASE_2_MOVES
+    SUCCESSORS = SolverEngine.SUCCESSORS
+    PHASE_2_SUCCESSORS = SolverEngine.PHASE_2_SUCCESSORS
+
+    def __init__(self, cube: Cube, engine: SolverEngine | None = None, **kwargs):
+        """
+        :param engine: The engine to search with. Otherwise, one is created with `kwargs` (see
+            `SolverEngine`).
+        """
+        super().__init__(cube)
+        self.start = 0
+        self.end = 0
+        self.time_to_solve = 0
+
+        self.face_cube = self.cube.to_face_cube()
+        self.cubie_cube = self.face_cube.to_cubie_cube()
+
+        # Validate cube before any tables are loaded
+        self._validate_cube()
+
+        self.engine = engine if engine is not None else SolverEngine(**kwargs)
+
+    @property
+    def nodes(self) -> int:
+        """The number of nodes visited by the search, i.e. the number of moves tried."""
+        return self.engine.nodes
+
+    def solve(self):
+        if self.cube.is_solved():
+            print("The cube is already solved.")
+            return
+
+        self.start = time()
+
+        # My implementation of Kocimeba
+        # We first run phase 1 and when it ends, phase 2 will automatically be called
+        self.moves = self.engine.solve(self.cubie_cube).moves
+
+        # Apply transformations gathered from the solver
+        for transformation in self.moves:
+            self.cube.transform(transformation)
+
+        if not self.cube.is_solved():
+            raise RuntimeError("The cube could not be solved!")
+
+        self.end = time()
+        self.time_to_solve = round(self.end - self.start, 5)
 
-        for i in range(6):
-            if count[i] != 9:
-                # status = -1
-                raise ValueError("Not all colors appear exactly 9 times.")
+        print(
+            f"The solution requires {len(self.moves)} moves and took "
+            + f"{self.time_to_solve} seconds."
+        )
+        print(" ".join(self.moves))
 
-        status = self.cubie_cube.validate()
-        error_message = ""
+        # Determine which moves were calculated in phase 1 and phase 2
+        # phase_1_moves = " ".join(self.moves[:self.engine.phase_1_moves_index])
+        # phase_2_moves = " ".join(self.moves[self.engine.phase_1_moves_index:])
+        # print(f"\nPhase 1 Moves: {phase_1_moves}")
+        # print(f"Phase 2 Moves: {phase_2_moves}")
 
-        if status == 0:
+    def iter_solutions(self, deadline: float | None = None) -> Iterator[Solution]:
+        """
+        Yields every solution shorter than the ones before it as soon as it is found (see
+        `SolverEngine.iter_solutions`). As with `solve`, the best solution is applied to the
+        cube.
+        """
+        if self.cube.is_solved():
+            yield Solution([], 0, 0)
             return
-        elif status == -1:
-            error_message = "Not all colors appear exactly 9 times."
-        elif status == -2:
-            error_message = "Not all edges exist exactly once."
-        elif status == -3:
-            error_message = "One edge must be flipped."
-        elif status == -4:
-            error_message = "Not all corners exist exactly once."
-        elif status == -5:
-            error_message = "One corner must be twisted."
-        elif status == -6:
-            error_message = "Two corners or edges must be swapped."
-
-        raise ValueError(error_message)
+
+        self.start = time()
+        solutions = self.engine.iter_solutions(self.cubie_cube, deadline)
+        try:
+            yield from solutions
+        finally:
+            # Wait for the search to end
+            solutions.close()
+            self.moves = list(self.engine.moves)
+            self.end = time()
+            self.time_to_solve = round(self.end - self.start, 5)
+            for transformation in self.moves:
+                self.cube.transform(transformation)
+
+
+def iter_solutions(
+    cube: Cube, deadline: float | None = None, **kwargs
+) -> Iterator[Solution]:
+    """
+    Yields ever shorter solutions of `cube` until `deadline` with `KociembaSolver`, which is
+    created with `kwargs` (see `KociembaSolver.iter_solutions`).
+    """
+    return KociembaSolver(cube, **kwargs).iter_solutions(deadline)
@@ -0,0 +1,252 @@
+from __future__ import annotations
+import numpy as np
+from time import time
+from rubik.cubes import Cube
+from rubik.cubes import Tables
+from rubik.cubes import coordarrays as ca
+from rubik.cubes.cubiecube import MOVE_NAMES, SYM_MOVE
+from .kociembasolver import KociembaSolver, _packing
+from .solver import Solver
+
+
+class OptimalSolver(Solver):
+    """
+    Finds a shortest solution with IDA*, as in Richard Korf's optimal solver. The search is
+    guided by pattern databases holding the exact number of moves needed to solve a part of
+    the cube (see the `optimal` table set, built with `python -m rubik tables build optimal`):
+
+    - `corner_twist_prune`: the permutation and orientation of all corners (88M entries)
+    - `slice_sorted_flip_prune` and `u_edges_flip_prune`: the UD slice edges or the U edges,
+      together with the orientation of every edge
+
+    If the `phase1` table set has been built, the exact number of moves needed to finish phase 1
+    of the two phase algorithm is used too, with the cube turned so that each of the three axes
+    is the UD axis in turn (as in Herbert Kociemba's optimal solver).
+
+    The number of nodes visited grows by a factor of about 13 with every move of the solution,
+    so this is only practical for cubes up to about 12 moves from solved.
+    """
+
+    # God's number, the most moves any cube needs
+    MAX_LENGTH = 20
+    # The value of the D edges coordinate of the solved cube
+    SOLVED_D_EDGES = 1656
+    # `ROTATED_MOVES[r][m]` is move `m` seen with the cube turned `r` times around the URF-DBL
+    # diagonal, see `_orient` in `kociembasolver`
+    ROTATED_MOVES = [SYM_MOVE[16 * r] for r in range(3)]
+
+    def __init__(self, cube: Cube, max_length: int = MAX_LENGTH):
+        """
+        :param max_length: The longest solution to search for. A `RuntimeError` is raised if
+            there is no solution of at most this many moves.
+        """
+        super().__init__(cube)
+        self.max_length = max_length
+        self.time_to_solve = 0
+        self.moves = []
+        # The number of nodes visited by the search, i.e. the number of moves tried
+        self.nodes = 0
+
+        self.cubie_cube = self.cube.to_face_cube().to_cubie_cube()
+        self._validate_cube()
+
+        self.corner_twist_prune = Tables.corner_twist_prune
+        self.slice_sorted_flip_prune = Tables.slice_sorted_flip_prune
+        self.u_edges_flip_prune = Tables.u_edges_flip_prune
+        for table in (
+            self.corner_twist_prune,
+            self.slice_sorted_flip_prune,
+            self.u_edges_flip_prune,
+        ):
+            _packing(table)
+        self.flipslice_twist_prune = (
+            Tables.flipslice_twist_prune if Tables.has_tables("phase1") else None
+        )
+
+        size = max_length + 1
+        self.moves_made = [0 for i in range(size)]
+        self.corner = [0 for i in range(size)]
+        self.twist = [0 for i in range(size)]
+        self.flip = [0 for i in range(size)]
+        self.slice_sorted = [0 for i in range(size)]
+        self.u_edges = [0 for i in range(size)]
+        self.d_edges = [0 for i in range(size)]
+        # The phase 1 coordinates and distance with the cube turned to each axis
+        self.axis_twist = [[0 for i in range(size)] for r in range(3)]
+        self.axis_flip = [[0 for i in range(size)] for r in range(3)]
+        self.axis_udslice = [[0 for i in range(size)] for r in range(3)]
+        self.axis_distance = [[0 for i in range(size)] for r in range(3)]
+        self.successors = [KociembaSolver.SUCCESSORS[18] for i in range(size)]
+        self.next_move = [0 for i in range(size)]
+
+        cubie_cube = self.cubie_cube
+        edges = np.array([cubie_cube.edge_permutations])
+        self.corner[0] = cubie_cube.phase_2_corner
+        self.twist[0] = cubie_cube.phase_1_corner
+        self.flip[0] = cubie_cube.phase_1_edge
+        self.slice_sorted[0] = int(ca.encode_slice_sorted(edges)[0])
+        self.u_edges[0] = int(ca.encode_u_edges(edges)[0])
+        self.d_edges[0] = int(ca.encode_d_edges(edges)[0])
+        for r in range(3):
+            rotated = cubie_cube.conjugate(16 * r)
+            self.axis_twist[r][0] = rotated.phase_1_corner
+            self.axis_flip[r][0] = rotated.phase_1_edge
+            self.axis_udslice[r][0] = rotated.phase_1_ud_slice
+            if self.flipslice_twist_prune is not None:
+                self.axis_distance[r][0] = self.flipslice_twist_prune.distance(
+                    (
+                        Tables.FLIP * rotated.phase_1_ud_slice + rotated.phase_1_edge,
+                        rotated.phase_1_corner,
+                    )
+                )
+
+    def solve(self):
+        if self.cube.is_solved():
+            print("The cube is already solved.")
+            return
+
+        start = time()
+        length = -1
+        for depth in range(self._heuristic(), self.max_length + 1):
+            length = self._search(depth)
+            if length >= 0:
+                break
+        if length < 0:
+            raise RuntimeError(
+                f"There is no solution of at most {self.max_length} moves."
+            )
+
+        self.moves = [MOVE_NAMES[move] for move in self.moves_made[:length]]
+        for transformation in self.moves:
+            self.cube.transform(transformation)
+
+        if not self.cube.is_solved():
+            raise RuntimeError("The cube could not be solved!")
+
+        self.time_to_solve = round(time() - start, 5)
+        print(
+            f"The solution requires {len(self.moves)} moves and took "
+            + f"{self.time_to_solve} seconds."
+        )
+        print(" ".join(self.moves))
+
+    def _heuristic(self) -> int:
+        """
+        Returns the lower bound of the pattern databases for the cube the search starts from.
+        """
+        distance = max(
+            self.corner_twist_prune[self.corner[0], self.twist[0]],
+            self.slice_sorted_flip_prune[self.slice_sorted[0], self.flip[0]],
+            self.u_edges_flip_prune[self.u_edges[0], self.flip[0]],
+        )
+        if self.flipslice_twist_prune is not None:
+            distance = max(distance, *(d[0] for d in self.axis_distance))
+        return distance
+
+    def _search(self, depth: int) -> int:
+        """
+        Searches for a solution of exactly `depth` moves without recursion, like
+        `KociembaSolver._phase_1_iterative`, and returns its length or -1 if there is none.
+        """
+        twist_move = memoryview(Tables.twist_move)
+        flip_move = memoryview(Tables.flip_move)
+        udslice_move = memoryview(Tables.udslice_move)
+        corner_move = memoryview(Tables.corner_move)
+        slice_sorted_move = memoryview(Tables.slice_sorted_move)
+        u_edges_move = memoryview(Tables.u_edges_move)
+        d_edges_move = memoryview(Tables.d_edges_move)
+        corner = self.corner
+        twist = self.twist
+        flip = self.flip
+        slice_sorted = self.slice_sorted
+        u_edges = self.u_edges
+        d_edges = self.d_edges
+        moves_made = self.moves_made
+        successors = self.successors
+        next_move = self.next_move
+        all_successors = KociembaSolver.SUCCESSORS
+        solved_d_edges = self.SOLVED_D_EDGES
+
+        corner_view = memoryview(self.corner_twist_prune.table)
+        slice_view = memoryview(self.slice_sorted_flip_prune.table)
+        u_view = memoryview(self.u_edges_flip_prune.table)
+        shift, mask = _packing(self.corner_twist_prune)
+        twist_count = Tables.TWIST
+        flip_count = Tables.FLIP
+
+        exact = self.flipslice_twist_prune
+        if exact is not None:
+            classes = memoryview(exact.classes)
+            conj = memoryview(exact.conj)
+            exact_view = memoryview(exact.table)
+            exact_stride = exact.stride
+            axes = [
+                (
+                    self.ROTATED_MOVES[r],
+                    self.axis_twist[r],
+                    self.axis_flip[r],
+                    self.axis_udslice[r],
+                    self.axis_distance[r],
+                )
+                for r in range(3)
+            ]
+
+        nodes = 0
+        n = 0
+        successors[0] = all_successors[18]
+        next_move[0] = 0
+        while n >= 0:
+            moves = successors[n]
+            k = next_move[n]
+            if k == len(moves):
+                n -= 1
+                continue
+
+            next_move[n] = k + 1
+            move = moves[k]
+            moves_made[n] = move
+            nodes += 1
+
+            c = corner[n + 1] = corner_move[corner[n], move]
+            t = twist[n + 1] = twist_move[twist[n], move]
+            f = flip[n + 1] = flip_move[flip[n], move]
+            s = slice_sorted[n + 1] = slice_sorted_move[slice_sorted[n], move]
+            u = u_edges[n + 1] = u_edges_move[u_edges[n], move]
+            d_edges[n + 1] = d_edges_move[d_edges[n], move]
+
+            i = c * twist_count + t
+            d = corner_view[i >> shift] >> ((i & shift) << 2) & mask
+            i = s * flip_count + f
+            d2 = slice_view[i >> shift] >> ((i & shift) << 2) & mask
+            if d2 > d:
+                d = d2
+            i = u * flip_count + f
+            d2 = u_view[i >> shift] >> ((i & shift) << 2) & mask
+            if d2 > d:
+                d = d2
+
+            if exact is not None and d < depth - n:
+                for rotated, a_twist, a_flip, a_udslice, a_distance in axes:
+                    m = rotated[move]
+                    t = a_twist[n + 1] = twist_move[a_twist[n], m]
+                    f = a_flip[n + 1] = flip_move[a_flip[n], m]
+                    e = a_udslice[n + 1] = udslice_move[a_udslice[n], m]
+                    x = classes[flip_count * e + f]
+                    i = (x >> 4) * exact_stride + conj[t, x & 15]
+                    d2 = a_distance[n]
+                    d2 += ((exact_view[i >> 2] >> ((i & 3) << 1) & 3) - d2 + 1) % 3 - 1
+                    a_distance[n + 1] = d2
+                    if d2 > d:
+                        d = d2
+
+            if d < depth - n:
+                if n + 1 < depth:
+                    n += 1
+                    successors[n] = all_successors[move]
+                    next_move[n] = 0
+                elif d == 0 and d_edges[n + 1] == solved_d_edges:
+                    self.nodes += nodes
+                    return n + 1
+
+        self.nodes += nodes
+        return -1
@@ -0,0 +1,123 @@
+"""
+Solving cubes for a server on a pool of worker processes.
+
+Solving is CPU bound, so a server that solves on its own thread can only handle one cube at a
+time. A `SolverPool` starts its workers up front, each of which loads the tables once and then
+solves every cube it is given with the same `SolverEngine`, so the server only hands out cube
+strings and waits for the solutions.
+"""
+
+from __future__ import annotations
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.util import Finalize
+from time import sleep, time
+from rubik.cubes import Tables
+from .cache import SolutionCache
+from .kociembasolver import SolverEngine
+from .solver import Solution
+from .store import SolutionStore
+
+
+# The engine of a worker process of a `SolverPool`
+_worker_engine: SolverEngine | None = None
+
+
+def _init_worker(
+    path: str,
+    shared: str | None,
+    options: dict,
+    cache_size: int,
+    store: dict | None,
+):
+    global _worker_engine
+    Tables.path = path
+    if shared is not None:
+        Tables.load_shared(shared)
+    Tables.preload()
+    _worker_engine = SolverEngine(
+        jobs=1,
+        cache=SolutionCache(cache_size) if cache_size > 0 else None,
+        store=SolutionStore(**store) if store is not None else None,
+        **options,
+    )
+    if _worker_engine.store is not None:
+        # Write the solutions that have not been written yet when the worker exits. Worker
+        # processes skip `atexit`, but run the finalizers with an exit priority.
+        Finalize(None, _worker_engine.store.close, exitpriority=0)
+
+
+def _solve(
+    cube_str: str, deadline: float | None, search_until: float | None
+) -> Solution:
+    if deadline is not None and time() >= deadline:
+        # The caller has already given up on this cube
+        raise TimeoutError("The cube could not be solved in time.")
+    if search_until is not None:
+        return _worker_engine.solve(
+            cube_str, search_until, keep_searching=True, expires=deadline
+        )
+    return _worker_engine.solve(cube_str, deadline, expires=deadline)
+
+
+def _ready():
+    # Keep the worker busy for a moment, so that every worker takes one of these tasks
+    sleep(0.1)
+
+
+class SolverPool:
+    """
+    A pool of worker processes that solve cubes with a `SolverEngine` each. The workers are
+    started and load the tables when the pool is created.
+    """
+
+    def __init__(
+        self,
+        jobs: int | None = None,
+        shared: str | None = None,
+        cache_size: int = 4096,
+        store: dict | None = None,
+        **kwargs,
+    ):
+        """
+        :param jobs: The number of worker processes (default: the number of CPUs)
+        :param shared: The name of the shared memory segment to load the tables from (see
+            `Tables.load_shared`), so that all workers share one copy of them
+        :param cache_size: The number of solutions every worker keeps in its `SolutionCache`,
+            or 0 for none
+        :param store: If given, the arguments of the `SolutionStore` the workers share
+
+        The engines are created with `kwargs`, but always search in their own process.
+        """
+        self.jobs = max(jobs or os.cpu_count() or 1, 1)
+        self._executor = ProcessPoolExecutor(
+            self.jobs,
+            initializer=_init_worker,
+            initargs=(Tables.path, shared, kwargs, cache_size, store),
+        )
+        # Wait for every worker to load the tables before the first cube comes in
+        for future in [self._executor.submit(_ready) for i in range(self.jobs)]:
+            future.result()
+
+    def submit(
+        self,
+        cube_str: str,
+        deadline: float | None = None,
+        search_until: float | None = None,
+    ) -> Future[Solution]:
+        """
+        Starts solving `cube_str` on a worker and returns the future of its `Solution`. A cube
+        whose `deadline` has passed by the time a worker takes it up fails with `TimeoutError`.
+        Otherwise, the search ends by the deadline, with the best solution found so far or with
+        `TimeoutError` (see `expires` in `SolverEngine.solve`), so that the worker is free again.
+
+        :param search_until: If given, keep searching for shorter solutions until then instead
+        """
+        return self._executor.submit(_solve, cube_str, deadline, search_until)
+
+    def shutdown(self):
+        """
+        Cancels the cubes that have not been started and waits for the workers to finish the
+        others and exit, which writes the solutions their stores hold to disk.
+        """
+        self._executor.shutdown(cancel_futures=True)
@@ -1,5 +1,16 @@
-from rubik.cubes import Cube
+from __future__ import annotations
+from rubik.cubes import Cube, CubieCube, Face
 from abc import ABC, abstractmethod
+from time import time
+from typing import Iterator, NamedTuple
+
+
+class Solution(NamedTuple):
+    """A solution found by a solver and the time it took to find it, in seconds."""
+
+    moves: list[str]
+    length: int
+    elapsed: float
 
 
 class Solver(ABC):
@@ -13,3 +24,66 @@ class Solver(ABC):
     @abstractmethod
     def solve(self):
         ...
+
+    def iter_solutions(self, deadline: float | None = None) -> Iterator[Solution]:
+        """
+        Yields every solution that is shorter than the ones before it as soon as it is found,
+        until `deadline` (a `time.time()` timestamp), so callers can stop consuming once a
+        solution is good enough. Like `solve`, this applies the best solution to the cube.
+
+        Solvers that only find one solution yield just that one.
+        """
+        start = time()
+        self.solve()
+        yield Solution(list(self.moves), len(self.moves), time() - start)
+
+    def _validate_cube(self):
+        """
+        Raises `ValueError` if the cube cannot be solved. Subclasses calling this must set
+        `cubie_cube` first.
+        """
+        _check_cube(self.cube, self.cubie_cube)
+
+
+def to_cubie_cube(cube: Cube | str) -> CubieCube:
+    """
+    Returns the `CubieCube` of `cube`, which is either a `Cube` or its string, and raises
+    `ValueError` if the cube cannot be solved.
+    """
+    if isinstance(cube, str):
+        cube = Cube(cube)
+    cubie_cube = cube.to_face_cube().to_cubie_cube()
+    _check_cube(cube, cubie_cube)
+    return cubie_cube
+
+
+def _check_cube(cube: Cube, cubie_cube: CubieCube):
+    count = [0 for i in range(6)]
+
+    for char in cube.face_str():
+        count[Face[char]] += 1
+
+    for i in range(6):
+        if count[i] != 9:
+            # status = -1
+            raise ValueError("Not all colors appear exactly 9 times.")
+
+    status = cubie_cube.validate()
+    error_message = ""
+
+    if status == 0:
+        return
+    elif status == -1:
+        error_message = "Not all colors appear exactly 9 times."
+    elif status == -2:
+        error_message = "Not all edges exist exactly once."
+    elif status == -3:
+        error_message = "One edge must be flipped."
+    elif status == -4:
+        error_message = "Not all corners exist exactly once."
+    elif status == -5:
+        error_message = "One corner must be twisted."
+    elif status == -6:
+        error_message = "Two corners or edges must be swapped."
+
+    raise ValueError(error_message)
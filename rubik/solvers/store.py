@@ -0,0 +1,154 @@
+"""
+A persistent store of solutions that several processes can share.
+
+The solutions are kept in an SQLite database in WAL mode, so every process (e.g. every worker of
+the web server) reads the solutions the others have found while they write, and the solutions
+outlive the processes. Solutions are keyed by the 54 character cube string and expire after a
+time to live. New solutions are written in batches, which makes a solve only pay for an
+occasional transaction.
+"""
+
+from __future__ import annotations
+import sqlite3
+from threading import Lock, Timer
+from time import time
+
+
+class SolutionStore:
+    """
+    A bounded store of solutions in the SQLite database at `path`, which is created if needed.
+    Once it holds more than `size` solutions, the oldest ones are deleted.
+
+    Solutions written by `put` are kept in memory until `batch` of them have gathered or
+    `interval` seconds have passed, so other processes only see them after that. A timer writes
+    them after `interval` seconds even if nothing else is stored, and `close` writes the
+    remaining ones.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int = 1_000_000,
+        ttl: float = 30 * 24 * 60 * 60,
+        batch: int = 64,
+        interval: float = 1,
+    ):
+        """
+        :param size: The largest number of solutions to keep
+        :param ttl: The number of seconds a solution is kept for
+        :param batch: The number of solutions written at once
+        :param interval: The longest time in seconds a solution waits to be written
+        """
+        self.path = path
+        self.size = size
+        self.ttl = ttl
+        self.batch = batch
+        self.interval = interval
+        self.hits = 0
+        self.misses = 0
+        # The solutions that have not been written yet, by cube string
+        self._pending: dict[str, tuple[str, float]] = {}
+        self._flushed = time()
+        # Writes the pending solutions once `interval` seconds have passed
+        self._timer: Timer | None = None
+        self._lock = Lock()
+
+        # Wait for the writes of other processes instead of failing at once
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS solutions "
+            "(cube TEXT PRIMARY KEY, moves TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS solutions_created ON solutions (created)"
+        )
+        self._db.commit()
+
+    def __len__(self) -> int:
+        """The number of solutions written, including those that have expired."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def get(self, cube_str: str) -> list[str] | None:
+        """
+        Returns the moves solving the cube `cube_str` if they have been stored and have not
+        expired, or None.
+        """
+        cube_str = cube_str.upper()
+        with self._lock:
+            if cube_str in self._pending:
+                moves = self._pending[cube_str][0]
+            else:
+                row = self._db.execute(
+                    "SELECT moves FROM solutions WHERE cube = ? AND created > ?",
+                    (cube_str, time() - self.ttl),
+                ).fetchone()
+                moves = row[0] if row is not None else None
+
+            if moves is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return moves.split()
+
+    def put(self, cube_str: str, moves: list[str]):
+        """
+        Stores `moves`, which solve the cube `cube_str`, with the next batch.
+        """
+        with self._lock:
+            self._pending[cube_str.upper()] = " ".join(moves), time()
+            if (
+                len(self._pending) >= self.batch
+                or time() - self._flushed >= self.interval
+            ):
+                self._flush()
+            elif self._timer is None:
+                self._timer = Timer(self.interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """
+        Writes the solutions that have not been written yet.
+        """
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._db.close()
+
+    def _flush(self):
+        """
+        Writes the pending solutions and deletes the expired ones and those beyond `size`, in
+        one transaction. The lock must be held.
+        """
+        self._flushed = time()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO solutions VALUES (?, ?, ?)",
+                [(cube_str, *solution) for cube_str, solution in self._pending.items()],
+            )
+            self._db.execute(
+                "DELETE FROM solutions WHERE created <= ?", (time() - self.ttl,)
+            )
+            excess = (
+                self._db.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+                - self.size
+            )
+            if excess > 0:
+                self._db.execute(
+                    "DELETE FROM solutions WHERE cube IN "
+                    "(SELECT cube FROM solutions ORDER BY created LIMIT ?)",
+                    (excess,),
+                )
+        self._pending.clear()
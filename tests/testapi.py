@@ -0,0 +1,153 @@
+import asyncio
+import json
+from time import time
+from unittest import TestCase
+from fastapi.testclient import TestClient
+from api import index
+from rubik.cubes import Cube
+
+
+class TestSolveEndpoint(TestCase):
+    cube_str = "OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG"
+
+    @classmethod
+    def setUpClass(cls):
+        # Entering the client runs the startup of the app, which starts the worker pool
+        cls.client = TestClient(index.app).__enter__()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.__exit__(None, None, None)
+
+    def test_solve(self):
+        response = self.client.get("/api/solve", params={"cube": self.cube_str}).json()
+        cube = Cube(self.cube_str)
+        for move in response["moves"]:
+            cube.transform(move)
+        self.assertTrue(cube.is_solved())
+        self.assertEqual(response["cube"], str(cube))
+
+        # Errors of the workers are passed on
+        response = self.client.get(
+            "/api/solve", params={"cube": self.cube_str[:-2] + "GY"}
+        )
+        self.assertEqual(response.json(), {"error": "One edge must be flipped."})
+
+    def test_timeout(self):
+        timeout = index.solve_timeout
+        index.solve_timeout = 0
+        try:
+            response = self.client.get("/api/solve", params={"cube": self.cube_str})
+        finally:
+            index.solve_timeout = timeout
+        self.assertEqual(
+            response.json(), {"error": "The cube could not be solved in time."}
+        )
+
+    def test_batch(self):
+        cube_strs = [self.cube_str, self.cube_str[:-2] + "GY", 42, "OBBOBRBYOG"]
+        for content in (
+            json.dumps(cube_strs),
+            # NDJSON, with plain strings too
+            "\n".join([json.dumps(cube_strs[0]), cube_strs[1], "42", cube_strs[3]]),
+        ):
+            response = self.client.post(
+                "/api/solve/batch",
+                content=content,
+                headers={
+                    "Content-Type": "application/json"
+                    if content.startswith("[")
+                    else "application/x-ndjson"
+                },
+            )
+            self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+            lines = [json.loads(line) for line in response.text.splitlines()]
+            lines.sort(key=lambda line: line["index"])
+            self.assertEqual([line["index"] for line in lines], [0, 1, 2, 3])
+            self.assertEqual(
+                ["error" in line for line in lines], [False, True, True, True]
+            )
+
+            cube = Cube(self.cube_str)
+            for move in lines[0]["moves"]:
+                cube.transform(move)
+            self.assertTrue(cube.is_solved())
+
+        response = self.client.post("/api/solve/batch", json={"cube": self.cube_str})
+        self.assertEqual(response.status_code, 400)
+
+        # The lines of a streamed body are split across its chunks, and a bad line only fails
+        # its own cube
+        body = "\n".join([json.dumps(self.cube_str), '"OBB', self.cube_str]).encode()
+        response = self.client.post(
+            "/api/solve/batch",
+            content=(body[i : i + 10] for i in range(0, len(body), 10)),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        lines.sort(key=lambda line: line["index"])
+        self.assertEqual(["error" in line for line in lines], [False, True, False])
+        self.assertEqual(lines[1]["cube"], '"OBB')
+
+    def test_coalescing(self):
+        async def solve_all():
+            cube_strs = [self.cube_str] * 5 + [self.cube_str.lower()]
+            return await asyncio.gather(*map(index.solve_cube, cube_strs))
+
+        before = self.client.get("/api/stats").json()
+        # Run the solves at once on the event loop of the app
+        solutions = self.client.portal.call(solve_all)
+        after = self.client.get("/api/stats").json()
+        self.assertEqual(after["requests"] - before["requests"], 6)
+        self.assertEqual(after["solves"] - before["solves"], 1)
+        self.assertEqual(len({tuple(solution.moves) for solution in solutions}), 1)
+        self.assertEqual(index.in_flight, {})
+
+    def test_budget(self):
+        cube = Cube(self.cube_str)
+        cube.transform("R")
+        response = self.client.get(
+            "/api/solve", params={"cube": str(cube), "budget_ms": 200}
+        ).json()
+        for move in response["moves"]:
+            cube.transform(move)
+        self.assertTrue(cube.is_solved())
+
+        response = self.client.get(
+            "/api/solve", params={"cube": self.cube_str, "budget_ms": 0}
+        )
+        self.assertEqual(response.status_code, 422)
+
+        # A budget beyond the timeout ends in time with the best solution found
+        timeout = index.solve_timeout
+        index.solve_timeout = 1
+        try:
+            for budget_ms in (1000, 5000):
+                cube = Cube(self.cube_str)
+                cube.transform("U")
+                start = time()
+                response = self.client.get(
+                    "/api/solve", params={"cube": str(cube), "budget_ms": budget_ms}
+                ).json()
+                self.assertLess(time() - start, 1)
+                for move in response["moves"]:
+                    cube.transform(move)
+                self.assertTrue(cube.is_solved())
+        finally:
+            index.solve_timeout = timeout
+
+    def test_queue_full(self):
+        admission = index.admission
+        index.admission = asyncio.Semaphore(0)
+        try:
+            before = self.client.get("/api/stats").json()
+            response = self.client.get("/api/solve", params={"cube": self.cube_str})
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers["retry-after"], str(index.retry_after))
+            response = self.client.post("/api/solve/batch", json=[self.cube_str])
+            self.assertEqual(response.status_code, 503)
+            after = self.client.get("/api/stats").json()
+            self.assertEqual(after["rejected"] - before["rejected"], 1)
+        finally:
+            index.admission = admission
+        self.assertEqual(index.in_flight, {})
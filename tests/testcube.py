@@ -1,5 +1,5 @@
 from unittest import TestCase
-from rubik.cubes import Cube
+from rubik.cubes import Cube, CubieCube, SYM_INVERSE, SYM_MOVE
 
 
 class TestCube(TestCase):
@@ -10,3 +10,30 @@ class TestCube(TestCase):
     def test_transformation(self):
         cube = Cube("OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRROOORYWYRYRYGWRGWGGWRYG")
         self.assertEqual(0, 0)
+
+
+class TestCubieCube(TestCase):
+    def scrambled(self) -> CubieCube:
+        cube = Cube("OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG")
+        return cube.to_face_cube().to_cubie_cube()
+
+    def test_inverse(self):
+        cube = self.scrambled()
+        cube.multiply(cube.inverse())
+        self.assertEqual(vars(cube), vars(CubieCube()))
+
+    def test_conjugate(self):
+        cube = self.scrambled()
+        for s in range(48):
+            conjugate = cube.conjugate(s)
+            self.assertEqual(vars(conjugate.conjugate(SYM_INVERSE[s])), vars(cube))
+
+            # Conjugating a move gives the conjugated move
+            for move in range(18):
+                moved = cube.copy()
+                for i in range(move % 3 + 1):
+                    moved.move(move // 3)
+                expected = conjugate.copy()
+                for i in range(SYM_MOVE[s][move] % 3 + 1):
+                    expected.move(SYM_MOVE[s][move] // 3)
+                self.assertEqual(vars(moved.conjugate(s)), vars(expected))
@@ -1,6 +1,27 @@
-from unittest import TestCase
-from rubik.solvers import KociembaSolver
-from rubik.cubes import Cube
+import os
+import tempfile
+from unittest import TestCase, skipUnless
+from time import sleep, time
+from rubik.solvers import (
+    KociembaSolver,
+    OptimalSolver,
+    SolutionCache,
+    SolutionStore,
+    SolverEngine,
+    SolverPool,
+    iter_solutions,
+    solve_many,
+)
+from rubik.solvers.kociembasolver import _make_prefixes
+from rubik.cubes import (
+    MOVE_NAMES,
+    CubieCube,
+    Cube,
+    NibblePruningTable,
+    PruningTable,
+    Tables,
+)
+from rubik.cubes.tables import Mod3PruningTable
 
 
 class TestKociembaSolver(TestCase):
@@ -10,3 +31,358 @@ class TestKociembaSolver(TestCase):
         solver.solve()
         self.assertEqual(cube.is_solved(), True)
         print("Tests passed!")
+
+    def test_searches_agree(self):
+        cube_str = "OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG"
+        recursive = KociembaSolver(Cube(cube_str), search="recursive")
+        recursive.solve()
+        iterative = KociembaSolver(Cube(cube_str), search="iterative")
+        iterative.solve()
+        self.assertEqual(iterative.moves, recursive.moves)
+        self.assertEqual(iterative.nodes, recursive.nodes)
+
+    def test_successors(self):
+        successors = KociembaSolver.SUCCESSORS
+        self.assertEqual(successors[18], tuple(range(18)))
+        for a in range(18):
+            for b in range(18):
+                allowed = b in successors[a]
+                if a // 3 == b // 3:
+                    self.assertFalse(allowed)
+                elif a // 3 % 3 == b // 3 % 3:
+                    # Opposite faces commute, so only one of the two orders is allowed
+                    self.assertNotEqual(allowed, a in successors[b])
+                else:
+                    self.assertTrue(allowed)
+
+    def test_max_length(self):
+        cube_str = "OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG"
+        first = KociembaSolver(Cube(cube_str))
+        first.solve()
+
+        cube = Cube(cube_str)
+        shorter = KociembaSolver(cube, max_length=len(first.moves) - 2, timeout=30)
+        shorter.solve()
+        self.assertTrue(cube.is_solved())
+        self.assertLessEqual(len(shorter.moves), len(first.moves) - 2)
+
+    def test_orientations(self):
+        cube_str = "OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG"
+        single = KociembaSolver(Cube(cube_str))
+        single.solve()
+        for jobs in (1, None):
+            cube = Cube(cube_str)
+            solver = KociembaSolver(cube, orientations=6, jobs=jobs)
+            solver.solve()
+            self.assertTrue(cube.is_solved())
+            self.assertLessEqual(len(solver.moves), len(single.moves))
+
+    def test_split(self):
+        self.assertEqual(len(_make_prefixes(1)), 18)
+        self.assertEqual(len(_make_prefixes(2)), 243)
+
+        cube_str = "OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG"
+        first = KociembaSolver(Cube(cube_str))
+        first.solve()
+        for split, jobs in ((1, 1), (2, 2)):
+            cube = Cube(cube_str)
+            solver = KociembaSolver(cube, split=split, jobs=jobs)
+            solver.solve()
+            self.assertTrue(cube.is_solved())
+
+            cube = Cube(cube_str)
+            solver = KociembaSolver(
+                cube,
+                split=split,
+                jobs=jobs,
+                max_length=len(first.moves) - 2,
+                timeout=30,
+            )
+            solver.solve()
+            self.assertTrue(cube.is_solved())
+            self.assertLessEqual(len(solver.moves), len(first.moves) - 2)
+
+    def test_iter_solutions(self):
+        cube = Cube("OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG")
+        solutions = list(iter_solutions(cube, deadline=time() + 0.5))
+        lengths = [solution.length for solution in solutions]
+        self.assertEqual(lengths, sorted(set(lengths), reverse=True))
+        self.assertTrue(cube.is_solved())
+
+        # Closing the generator keeps the best solution found so far
+        cube = Cube("OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG")
+        solutions = iter_solutions(cube)
+        self.assertEqual(next(solutions).length, lengths[0])
+        solutions.close()
+        self.assertTrue(cube.is_solved())
+
+
+class TestSolverEngine(TestCase):
+    def test_solve(self):
+        cube_strs = [
+            "OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG",
+            "RRRRRRRRRBBBBBBBBBWWWWWWWWWGGGGGGGGGYYYYYYYYYOOOOOOOOO",
+            "OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRGY",
+            "OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG",
+        ]
+        engine = SolverEngine()
+        for cube_str in cube_strs:
+            try:
+                solution = engine.solve(cube_str)
+            except ValueError:
+                continue
+            cube = Cube(cube_str)
+            for move in solution.moves:
+                cube.transform(move)
+            self.assertTrue(cube.is_solved())
+
+        # The engine finds the same solution as a new solver
+        solver = KociembaSolver(Cube(cube_strs[0]))
+        solver.solve()
+        self.assertEqual(solution.moves, solver.moves)
+        self.assertEqual(engine.solve(cube_strs[1]).moves, [])
+
+    def test_keep_searching(self):
+        cube_str = "OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG"
+        engine = SolverEngine(cache=SolutionCache())
+        first = engine.solve(cube_str)
+        # The cache is not looked up, so the search goes on for shorter solutions
+        solution = engine.solve(cube_str, time() + 0.5, keep_searching=True)
+        self.assertGreater(engine.nodes, 0)
+        self.assertLessEqual(solution.length, first.length)
+        # The shorter solution is cached
+        self.assertEqual(engine.solve(cube_str).moves, solution.moves)
+        self.assertEqual(engine.nodes, 0)
+
+        # Nor is it by default for an engine with a time budget
+        engine = SolverEngine(cache=engine.cache, timeout=0.5)
+        engine.solve(cube_str)
+        self.assertGreater(engine.nodes, 0)
+        self.assertEqual(engine.cache.hits, 1)
+
+    def test_expires(self):
+        cube_str = "OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG"
+        for search in ("iterative", "recursive"):
+            engine = SolverEngine(search=search)
+            with self.assertRaises(TimeoutError):
+                engine.solve(cube_str, expires=time())
+
+            # The search for shorter solutions ends with the best one so far
+            start = time()
+            solution = engine.solve(
+                cube_str, start + 60, keep_searching=True, expires=start + 0.2
+            )
+            self.assertLess(time() - start, 1)
+            self.assertGreater(solution.length, 0)
+
+    def test_pruning_table_packing(self):
+        cube_str = "OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG"
+        moves = SolverEngine().solve(cube_str).moves
+        names = [
+            "udslice_twist_prune",
+            "udslice_flip_prune",
+            "edge4_corner_prune",
+            "edge4_edge8_prune",
+        ]
+        tables = {name: getattr(Tables, name) for name in names}
+        try:
+            # The search reads the depths the same way whichever way they are stored
+            for table_cls in (PruningTable, NibblePruningTable):
+                for name, table in tables.items():
+                    setattr(Tables, name, table_cls.pack(table.unpack(), table.stride))
+                self.assertEqual(SolverEngine().solve(cube_str).moves, moves)
+
+            # Tables holding the depths modulo 3 cannot be read by it
+            for name, table in tables.items():
+                setattr(
+                    Tables, name, Mod3PruningTable.pack(table.unpack(), table.stride)
+                )
+            with self.assertRaises(TypeError):
+                SolverEngine()
+        finally:
+            for name, table in tables.items():
+                setattr(Tables, name, table)
+
+
+class TestSolutionCache(TestCase):
+    def assertSolves(self, cube: CubieCube, moves: list[str]):
+        cube = cube.copy()
+        for move in moves:
+            for i in range(MOVE_NAMES.index(move) % 3 + 1):
+                cube.move(MOVE_NAMES.index(move) // 3)
+        self.assertEqual(cube.corner_permutations, list(range(8)))
+        self.assertEqual(cube.corner_orientations, [0] * 8)
+        self.assertEqual(cube.edge_permutations, list(range(12)))
+        self.assertEqual(cube.edge_orientations, [0] * 12)
+
+    def test_symmetric_cubes(self):
+        cube = Cube("OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG")
+        cubie_cube = cube.to_face_cube().to_cubie_cube()
+        cache = SolutionCache()
+        engine = SolverEngine(cache=cache)
+        moves = engine.solve(cube).moves
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+        # Every rotated and mirrored version of the cube is solved from the cache
+        for s in range(48):
+            symmetric = cubie_cube.conjugate(s)
+            solution = engine.solve(symmetric)
+            self.assertEqual(solution.length, len(moves))
+            self.assertSolves(symmetric, solution.moves)
+        self.assertEqual((cache.hits, cache.misses), (48, 1))
+
+    def test_eviction(self):
+        cache = SolutionCache(size=1)
+        first = CubieCube()
+        first.move(0)
+        second = CubieCube()
+        second.move(1)
+        second.move(2)
+        cache.put(first, ["U'"])
+        self.assertEqual(cache.get(first), ["U'"])
+        cache.put(second, ["F'", "R'"])
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.get(first))
+        self.assertSolves(second, cache.get(second))
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+
+class TestSolutionStore(TestCase):
+    cube_str = "OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG"
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "solutions.db")
+
+    def test_shared(self):
+        store = SolutionStore(self.path, batch=2, interval=60)
+        other = SolutionStore(self.path)
+        self.addCleanup(store.close)
+        self.addCleanup(other.close)
+
+        # Solutions are written in batches
+        store.put(self.cube_str, ["R", "U"])
+        self.assertEqual(store.get(self.cube_str.lower()), ["R", "U"])
+        self.assertIsNone(other.get(self.cube_str))
+        store.put("RRRRRRRRRBBBBBBBBBWWWWWWWWWGGGGGGGGGYYYYYYYYYOOOOOOOOO", [])
+        self.assertEqual(other.get(self.cube_str), ["R", "U"])
+        self.assertEqual((other.hits, other.misses), (1, 1))
+
+        # Another engine finds the solution in the store without searching
+        moves = SolverEngine().solve(self.cube_str).moves
+        store.put(self.cube_str, moves)
+        store.flush()
+        engine = SolverEngine(store=SolutionStore(self.path))
+        self.assertEqual(engine.solve(Cube(self.cube_str)).moves, moves)
+        self.assertEqual(engine.nodes, 0)
+
+    def test_eviction(self):
+        store = SolutionStore(self.path, size=2, batch=1)
+        self.addCleanup(store.close)
+        for moves in (["R"], ["U"], ["F"]):
+            store.put(moves[0] * 54, moves)
+        self.assertEqual(len(store), 2)
+        self.assertIsNone(store.get("R" * 54))
+        self.assertEqual(store.get("F" * 54), ["F"])
+
+        expired = SolutionStore(self.path, ttl=0)
+        self.addCleanup(expired.close)
+        self.assertIsNone(expired.get("F" * 54))
+
+    def test_interval(self):
+        store = SolutionStore(self.path, interval=0.1)
+        other = SolutionStore(self.path)
+        self.addCleanup(store.close)
+        self.addCleanup(other.close)
+
+        # A solution is written after the interval even if nothing else is stored
+        store.put(self.cube_str, ["R", "U"])
+        sleep(0.5)
+        self.assertEqual(other.get(self.cube_str), ["R", "U"])
+
+
+class TestSolveMany(TestCase):
+    cube_strs = [
+        "OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG",
+        "OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRGY",
+        "RRRRRRRRRBBBBBBBBBWWWWWWWWWGGGGGGGGGYYYYYYYYYOOOOOOOOO",
+        "OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWR",
+    ]
+
+    def test_solve_many(self):
+        for jobs, ordered in ((1, True), (2, True), (2, False)):
+            results = list(
+                solve_many(self.cube_strs, jobs=jobs, chunk=1, ordered=ordered)
+            )
+            if not ordered:
+                results.sort()
+            self.assertEqual([result.index for result in results], [0, 1, 2, 3])
+            self.assertEqual([result.cube for result in results], self.cube_strs)
+
+            # Errors are reported for the cubes that caused them
+            self.assertEqual(
+                [result.error is None for result in results], [True, False, True, False]
+            )
+            self.assertEqual(results[2].solution.moves, [])
+
+            cube = Cube(self.cube_strs[0])
+            for move in results[0].solution.moves:
+                cube.transform(move)
+            self.assertTrue(cube.is_solved())
+
+
+class TestSolverPool(TestCase):
+    cube_str = "OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG"
+
+    def test_deadline_frees_worker(self):
+        pool = SolverPool(1)
+        try:
+            # A search that would go on for a minute ends at the deadline of its request
+            start = time()
+            future = pool.submit(self.cube_str, start + 0.3, search_until=start + 60)
+            self.assertGreater(future.result().length, 0)
+            self.assertLess(time() - start, 1)
+
+            # A cube whose deadline has passed before it was started is not searched at all
+            with self.assertRaises(TimeoutError):
+                pool.submit(self.cube_str, time()).result()
+
+            # Either way, the worker takes the next cube right away
+            start = time()
+            self.assertGreater(pool.submit(self.cube_str).result().length, 0)
+            self.assertLess(time() - start, 1)
+        finally:
+            pool.shutdown()
+
+    def test_shutdown_writes_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "solutions.db")
+            pool = SolverPool(1, store={"path": path, "interval": 60})
+            try:
+                moves = pool.submit(self.cube_str).result().moves
+            finally:
+                pool.shutdown()
+
+            store = SolutionStore(path)
+            self.assertEqual(store.get(self.cube_str), moves)
+            store.close()
+
+
+@skipUnless(Tables.has_tables("optimal"), "The optimal table set has not been built")
+class TestOptimalSolver(TestCase):
+    def test_solve(self):
+        solved = "RRRRRRRRRBBBBBBBBBWWWWWWWWWGGGGGGGGGYYYYYYYYYOOOOOOOOO"
+        for scramble in (["R", "U"], ["F", "R'", "D2", "L", "B", "U'", "F2"]):
+            cube = Cube(solved)
+            for move in scramble:
+                cube.transform(move)
+            solver = OptimalSolver(cube)
+            solver.solve()
+            self.assertTrue(cube.is_solved())
+            self.assertEqual(len(solver.moves), len(scramble))
+
+    def test_max_length(self):
+        cube = Cube("OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG")
+        with self.assertRaises(RuntimeError):
+            OptimalSolver(cube, max_length=5).solve()
@@ -0,0 +1,388 @@
+import os
+import tempfile
+import numpy as np
+from unittest import TestCase, skipUnless
+from rubik.cubes import Cube, CubieCube, Tables, sharedtables, tablefile
+from rubik.cubes.cubiecube import SYM_INVERSE
+from rubik.cubes.tablebuild import build_tables, checkpoint_directory
+from rubik.cubes.tables import (
+    Mod3PruningTable,
+    NibblePruningTable,
+    SymmetricPruningTable,
+    _LazyTable,
+)
+from rubik.cubes import coordarrays as ca
+from rubik.cubes import symmetries as sy
+from rubik.solvers import SolverEngine
+
+
+def _bfs_layers(neighbours, depth: int) -> list[np.ndarray]:
+    """
+    Returns the states at every distance up to `depth` from state 0, by a breadth-first search
+    without any symmetry reduction. `neighbours(states)` must return the states one move away
+    from every state in `states`.
+    """
+    layers = [np.array([0])]
+    seen = layers[0]
+    for _ in range(depth):
+        found = np.setdiff1d(neighbours(layers[-1]), seen)
+        seen = np.union1d(seen, found)
+        layers.append(found)
+    return layers
+
+
+class TestTableFile(TestCase):
+    def test_round_trip(self):
+        tables = {
+            "moves": np.arange(36, dtype=np.int16).reshape(2, 18),
+            "prune": np.array([0, 1, 2, -1], dtype=np.int8),
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tables.bin")
+            tablefile.write_tables(path, tables)
+            loaded = tablefile.read_tables(path)
+
+            self.assertEqual(loaded.keys(), tables.keys())
+            for name, table in tables.items():
+                self.assertEqual(loaded[name].dtype, table.dtype)
+                np.testing.assert_array_equal(loaded[name], table)
+            self.assertFalse(loaded["moves"].flags.writeable)
+
+    def test_bad_magic(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tables.bin")
+            with open(path, "wb") as f:
+                f.write(b"\0" * 64)
+            with self.assertRaises(ValueError):
+                tablefile.read_tables(path)
+
+
+class TestTables(TestCase):
+    def test_prune_table_is_distance(self):
+        Tables.load_tables()
+        prune = Tables.make_udslice_flip_prune().unpack().astype(np.int64)
+        index = np.arange(len(prune))
+        neighbours = (
+            Tables.udslice_move[index // Tables.FLIP].astype(np.int64) * Tables.FLIP
+            + Tables.flip_move[index % Tables.FLIP]
+        )
+
+        # Every state is one move away from a state one closer to the goal, and no move changes
+        # the distance by more than one
+        self.assertEqual(prune[0], 0)
+        self.assertTrue((prune >= 0).all())
+        self.assertTrue((np.abs(prune[neighbours] - prune[:, None]) <= 1).all())
+        self.assertTrue((prune[neighbours].min(axis=1)[1:] == prune[1:] - 1).all())
+
+    def test_phase_2_prune_table_is_distance(self):
+        Tables.load_tables()
+        prune = Tables.make_edge4_corner_prune().unpack().astype(np.int64)
+        index = np.arange(len(prune))
+        a = Tables.edge4_move[index // Tables.CORNER].astype(np.int64)
+        neighbours = a * Tables.CORNER + Tables.corner_move[index % Tables.CORNER]
+
+        # Only the moves allowed in phase 2 (the others are stored as -1) are followed
+        allowed = a >= 0
+        distance = np.where(allowed, prune[neighbours], 127)
+        self.assertTrue((prune >= 0).all())
+        self.assertTrue(
+            (np.abs(prune[neighbours] - prune[:, None])[allowed] <= 1).all()
+        )
+        self.assertTrue((distance.min(axis=1)[1:] == prune[1:] - 1).all())
+
+
+class TestLazyTables(TestCase):
+    def test_preload(self):
+        Tables.load_tables()
+        self.assertIsInstance(vars(Tables)["corner_move"], _LazyTable)
+
+        Tables.preload(phases=(2,))
+        self.assertIsInstance(vars(Tables)["corner_move"], np.ndarray)
+        self.assertIsInstance(vars(Tables)["twist_move"], _LazyTable)
+        self.assertEqual(Tables.twist_move.shape, (Tables.TWIST, Tables.MOVES))
+        self.assertIsInstance(vars(Tables)["twist_move"], np.ndarray)
+
+
+class TestCoordArrays(TestCase):
+    def test_encodings_match_cubie_cube(self):
+        cube = CubieCube()
+        for move in [0, 4, 2, 5, 1, 3, 2, 4, 0, 1]:
+            cube.move(move)
+
+        cp = np.array([cube.corner_permutations])
+        co = np.array([cube.corner_orientations])
+        ep = np.array([cube.edge_permutations])
+        eo = np.array([cube.edge_orientations])
+
+        self.assertEqual(ca.encode_twist(co)[0], cube.phase_1_corner)
+        self.assertEqual(ca.encode_flip(eo)[0], cube.phase_1_edge)
+        self.assertEqual(ca.encode_udslice(ep)[0], cube.phase_1_ud_slice)
+        self.assertEqual(ca.encode_corner(cp)[0], cube.phase_2_corner)
+        np.testing.assert_array_equal(ca.decode_twist(ca.encode_twist(co)), co)
+        np.testing.assert_array_equal(ca.decode_flip(ca.encode_flip(eo)), eo)
+        np.testing.assert_array_equal(ca.decode_corner(ca.encode_corner(cp)), cp)
+
+    def test_phase_2_entry_coordinates(self):
+        def apply(moves):
+            cube = CubieCube()
+            coords = {"slice_sorted": 0, "u_edges": 0, "d_edges": 1656}
+            for move in moves:
+                for _ in range(move % 3 + 1):
+                    cube.move(move // 3)
+                for name in coords:
+                    coords[name] = getattr(Tables, f"{name}_move")[coords[name], move]
+            return cube, coords
+
+        cube, coords = apply([3, 7, 15, 0, 4, 10, 13, 2, 16, 9])
+        ep = np.array([cube.edge_permutations])
+        for name, coord in coords.items():
+            self.assertEqual(getattr(ca, f"encode_{name}")(ep)[0], coord)
+
+        # After phase 2 moves only, they give the phase 2 edge coordinates
+        cube, coords = apply([0, 4, 9, 16, 2, 13, 7, 10])
+        self.assertEqual(
+            Tables.ud_edges_edge8[coords["u_edges"], coords["d_edges"] % 24],
+            cube.phase_2_edge,
+        )
+        self.assertEqual(coords["slice_sorted"], cube.phase_2_ud_slice)
+
+
+class TestPruningTable(TestCase):
+    def test_packing(self):
+        Tables.load_tables()
+        depths = Tables.udslice_twist_prune.unpack()
+        moves = (Tables.udslice_move, Tables.twist_move)
+
+        nibble = NibblePruningTable.pack(depths, Tables.TWIST)
+        mod3 = Mod3PruningTable.pack(depths, Tables.TWIST, moves)
+        np.testing.assert_array_equal(nibble.unpack(), depths)
+        np.testing.assert_array_equal(mod3.unpack(), depths % 3)
+        self.assertEqual(mod3.table.nbytes, -(-len(depths) // 4))
+        self.assertEqual(nibble.table.nbytes, -(-len(depths) // 2))
+
+        for ud_slice, twist in [(0, 0), (17, 1000), (494, 2186), (250, 3)]:
+            depth = depths[ud_slice * Tables.TWIST + twist]
+            self.assertEqual(nibble[ud_slice, twist], depth)
+            self.assertEqual(mod3.distance((ud_slice, twist)), depth)
+
+            # One move away, the distance follows from the previous one
+            next_ud_slice = int(Tables.udslice_move[ud_slice, 3])
+            next_twist = int(Tables.twist_move[twist, 3])
+            self.assertEqual(
+                mod3.distance((next_ud_slice, next_twist), int(depth)),
+                depths[next_ud_slice * Tables.TWIST + next_twist],
+            )
+
+    def test_mod3_unreachable(self):
+        # State 1 has no neighbour closer to the solved state, and states 2, 3 and 4 lead to
+        # each other in a cycle of ever decreasing stored depths
+        move_a = np.tile(np.arange(5)[:, None], 18)
+        move_a[2:, 0] = [3, 4, 2]
+        move_b = np.zeros((1, 18), dtype=np.int64)
+        mod3 = Mod3PruningTable.pack([0, 1, 5, 4, 3], 1, (move_a, move_b))
+
+        for a in range(1, 5):
+            with self.assertRaises(ValueError):
+                mod3.distance((a, 0))
+
+
+class TestSymmetries(TestCase):
+    def test_symmetric_prune_table(self):
+        # Reduce the twist by symmetry and compare with the plain UD slice and twist table
+        Tables.load_tables()
+        classidx, sym = sy.make_classes(
+            sy.make_conjugation_table(sy.conjugate_twist, Tables.TWIST)
+        )
+        representatives = np.flatnonzero(sym == 0)
+        stabilizers = sy.make_stabilizers(sy.conjugate_twist, representatives)
+        moved = np.asarray(Tables.twist_move)[representatives]
+        udslice_conj = sy.make_conjugation_table(
+            lambda coords, s: sy.conjugate_flipslice(2048 * coords, s) // 2048,
+            Tables.UDSLICE,
+        ).T
+
+        depths = sy.make_symmetric_prune_table(
+            classidx[moved], sym[moved], stabilizers, Tables.udslice_move, udslice_conj
+        )
+        table = SymmetricPruningTable(
+            Mod3PruningTable.pack(depths, Tables.UDSLICE).table,
+            Tables.UDSLICE,
+            len(depths),
+            classidx * sy.N_SYM + sym,
+            udslice_conj,
+        )
+
+        expected = Tables.udslice_twist_prune.unpack().reshape(-1, Tables.TWIST)
+        for twist in range(0, Tables.TWIST, 7):
+            for ud_slice in range(0, Tables.UDSLICE, 11):
+                self.assertEqual(table[twist, ud_slice], expected[ud_slice, twist] % 3)
+
+
+class TestSymmetricTables(TestCase):
+    @skipUnless(Tables.has_tables("phase1"), "The phase1 table set has not been built")
+    def test_flipslice_class(self):
+        classes = np.asarray(Tables.flipslice_class, dtype=np.int64)
+        classidx, sym = np.divmod(classes, sy.N_SYM)
+        representatives = np.flatnonzero(sym == 0)
+        self.assertEqual(len(representatives), 64430)
+        self.assertEqual(Tables.FLIPSLICE_CLASSES, 64430)
+        np.testing.assert_array_equal(classidx[representatives], np.arange(64430))
+
+        # The stored symmetry conjugates every coordinate to the representative of its class
+        for s in range(sy.N_SYM):
+            coords = np.flatnonzero(sym == s)
+            np.testing.assert_array_equal(
+                sy.conjugate_flipslice(coords, s), representatives[classidx[coords]]
+            )
+
+    @skipUnless(Tables.has_tables("phase1"), "The phase1 table set has not been built")
+    def test_flipslice_twist_prune(self):
+        def neighbours(states):
+            flipslice, twist = np.divmod(states, Tables.TWIST)
+            ud_slice, flip = np.divmod(flipslice, Tables.FLIP)
+            flipslice = (
+                Tables.FLIP * Tables.udslice_move[ud_slice].astype(np.int64)
+                + Tables.flip_move[flip]
+            )
+            return flipslice * Tables.TWIST + Tables.twist_move[twist]
+
+        rng = np.random.default_rng(0)
+        table = Tables.flipslice_twist_prune
+
+        # The distances are exact for the states close to the goal
+        for depth, states in enumerate(_bfs_layers(neighbours, 6)):
+            for state in rng.choice(states, min(len(states), 20), replace=False):
+                x = divmod(int(state), Tables.TWIST)
+                self.assertEqual(table.distance(x), depth)
+
+        # Elsewhere, they are at least the bound given by the two smaller tables
+        for _ in range(50):
+            flipslice = int(rng.integers(Tables.FLIPSLICE))
+            twist = int(rng.integers(Tables.TWIST))
+            ud_slice, flip = divmod(flipslice, Tables.FLIP)
+            bound = max(
+                Tables.udslice_twist_prune[ud_slice, twist],
+                Tables.udslice_flip_prune[ud_slice, flip],
+            )
+            self.assertGreaterEqual(table.distance((flipslice, twist)), bound)
+
+    @skipUnless(Tables.has_tables("phase2"), "The phase2 table set has not been built")
+    def test_phase_2_conjugation(self):
+        for conjugate, count in (
+            (sy.conjugate_corner, Tables.CORNER),
+            (sy.conjugate_edge8, Tables.EDGE8),
+        ):
+            coords = np.arange(count)
+            np.testing.assert_array_equal(conjugate(coords, 0), coords)
+            for s in range(sy.N_SYM):
+                conjugates = conjugate(conjugate(coords, s), SYM_INVERSE[s])
+                np.testing.assert_array_equal(conjugates, coords)
+
+        edge8_conj = np.asarray(Tables.edge8_conj, dtype=np.int64)
+        coords = np.arange(Tables.EDGE8)
+        for s in range(sy.N_SYM):
+            conjugates = edge8_conj[edge8_conj[:, s], SYM_INVERSE[s]]
+            np.testing.assert_array_equal(conjugates, coords)
+
+        classes = np.asarray(Tables.corner_class, dtype=np.int64)
+        classidx, sym = np.divmod(classes, sy.N_SYM)
+        representatives = np.flatnonzero(sym == 0)
+        self.assertEqual(len(representatives), Tables.CORNER_CLASSES)
+        for s in range(sy.N_SYM):
+            coords = np.flatnonzero(sym == s)
+            np.testing.assert_array_equal(
+                sy.conjugate_corner(coords, s), representatives[classidx[coords]]
+            )
+
+    @skipUnless(Tables.has_tables("phase2"), "The phase2 table set has not been built")
+    def test_corner_edge8_prune(self):
+        moves = ca.PHASE_2_MOVES
+
+        def neighbours(states):
+            corner, edge8 = np.divmod(states, Tables.EDGE8)
+            corner = Tables.corner_move[corner][:, moves].astype(np.int64)
+            return corner * Tables.EDGE8 + Tables.edge8_move[edge8][:, moves]
+
+        rng = np.random.default_rng(0)
+        table = Tables.corner_edge8_prune
+        for depth, states in enumerate(_bfs_layers(neighbours, 7)):
+            for state in rng.choice(states, min(len(states), 20), replace=False):
+                x = divmod(int(state), Tables.EDGE8)
+                self.assertEqual(table.distance(x), depth)
+
+    @skipUnless(Tables.has_tables("phase2"), "The phase2 table set has not been built")
+    def test_corner_edge8_prune_solutions(self):
+        # The table only speeds up phase 2, whose solutions stay the shortest ones
+        cube_strs = []
+        for moves in (
+            ["R", "U", "F'", "L2", "D"],
+            ["B", "R'", "U2", "F", "L", "D'", "R2"],
+        ):
+            cube = Cube("OBBOBRBYOGYYBOOBOGOBWBWYWWGBGRRRWOORYWYRYRYGWRGWGGWRYG")
+            for move in moves:
+                cube.transform(move)
+            cube_strs.append(str(cube))
+
+        for search in ("iterative", "recursive"):
+            engine = SolverEngine(search=search)
+            reference = SolverEngine(search=search)
+            reference.corner_edge8_prune = None
+            for cube_str in cube_strs:
+                self.assertEqual(
+                    engine.solve(cube_str).length, reference.solve(cube_str).length
+                )
+
+
+class TestBuildTables(TestCase):
+    def test_resume(self):
+        class Interrupt(Exception):
+            pass
+
+        def interrupt(message):
+            if message.startswith("[3/"):
+                raise Interrupt()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tables.bin")
+            with self.assertRaises(Interrupt):
+                build_tables(path, log=interrupt)
+            self.assertFalse(os.path.exists(path))
+
+            messages = []
+            build_tables(path, log=messages.append)
+            self.assertTrue(messages[0].startswith("Resuming build, 3 of 14"))
+            self.assertFalse(os.path.exists(checkpoint_directory(path)))
+
+            Tables.load_tables()
+            tables = tablefile.read_tables(path)
+            np.testing.assert_array_equal(tables["corner_move"], Tables.corner_move)
+            np.testing.assert_array_equal(
+                tables["edge4_corner_prune"], Tables.edge4_corner_prune.table
+            )
+
+
+class TestSharedTables(TestCase):
+    name = "rubik-tables-test"
+
+    def tearDown(self):
+        sharedtables.unlink(self.name)
+
+    def test_attach(self):
+        Tables.load_tables()
+        tables = sharedtables.attach(self.name, Tables.VERSION, lambda: Tables.path)
+        np.testing.assert_array_equal(tables["flip_move"], Tables.flip_move)
+
+        # A corrupted segment is replaced by a fresh copy
+        with open(Tables.path, "rb") as f:
+            image = bytearray(f.read())
+        image[-1] ^= 0xFF
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "corrupt.bin")
+            with open(path, "wb") as f:
+                f.write(image)
+            sharedtables.publish(self.name, path)
+
+        tables = sharedtables.attach(self.name, Tables.VERSION, lambda: Tables.path)
+        np.testing.assert_array_equal(
+            tables["edge4_corner_prune"], Tables.edge4_corner_prune.table
+        )